@@ -0,0 +1,66 @@
+"""
+Compara el volumen hacia RabbitMQ y la base de datos publicando cada muestra cruda (una entrada por muestra en
+sensor.update y dos filas, acceleration y vibrations) con la etapa de agregación (un sensor.summary y tres
+filas por ventana), para un trayecto simulado:
+
+    python -m benchmarks.aggregation --rate 200 --minutes 10 --window 10 --mode tumbling
+    python -m benchmarks.aggregation --rate 200 --minutes 10 --window 10 --mode sliding --hop 5
+
+Los mensajes crudos se agrupan como en add_sample (RABBITMQ_BATCH_SIZE muestras por mensaje). También mide la
+CPU por muestra de WindowAggregator.add, que corre en el loop de la app.
+"""
+import argparse
+import json
+import math
+import random
+import time
+from datetime import datetime, timedelta
+from services.aggregation import SLIDING, TUMBLING, WindowAggregator
+
+def make_samples(rng: random.Random, rate: float, seconds: float):
+    # Conducción tranquila con una frenada y un acelerón cada ~20 s
+    for i in range(int(rate * seconds)):
+        t = i / rate
+        phase = t % 20
+        ax = rng.gauss(0, 0.05) + (0.45 if 5 < phase < 6 else 0) - (0.6 if 12 < phase < 12.5 else 0)
+        yield t, {
+            "acc_x": ax, "acc_y": rng.gauss(0, 0.08), "acc_z": rng.gauss(1, 0.02),
+            "gyro_x": rng.gauss(0, 3), "gyro_y": rng.gauss(0, 3), "gyro_z": rng.gauss(0, 3),
+            "vibration": rng.random() < 0.01, "shock": False,
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=200)
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--window", type=float, default=10)
+    parser.add_argument("--mode", choices=(TUMBLING, SLIDING), default=TUMBLING)
+    parser.add_argument("--hop", type=float, default=None)
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args()
+
+    seconds = args.minutes * 60
+    samples = list(make_samples(random.Random(1), args.rate, seconds))
+    aggregator = WindowAggregator(args.window, args.mode, args.hop, args.rate)
+    start = datetime(2024, 1, 1)
+
+    summaries, summary_bytes = 0, 0
+    started = time.perf_counter()
+    for t, sample in samples:
+        for summary in aggregator.add(sample, t, start + timedelta(seconds=t)):
+            summaries += 1
+            summary_bytes += len(json.dumps(summary, default=str))
+    elapsed = time.perf_counter() - started
+    last = aggregator.flush(seconds, start + timedelta(seconds=seconds))
+    summaries += last is not None
+
+    raw_bytes = sum(len(json.dumps(dict(sample, datetime=start.isoformat()))) for _, sample in samples)
+    raw_messages = math.ceil(len(samples) / args.batch_size)
+    print(f"{len(samples)} samples ({args.rate:g} Hz, {args.minutes:g} min), {args.mode} windows of {args.window:g} s")
+    print(f"  raw        {raw_messages:>8} messages  {len(samples) * 2:>8} rows  {raw_bytes / 1024:>9.0f} KiB payload")
+    print(f"  aggregated {summaries:>8} messages  {summaries * 3:>8} rows  {summary_bytes / 1024:>9.0f} KiB payload")
+    print(f"  reduction  {raw_messages / summaries:>7.0f}x messages {len(samples) * 2 / (summaries * 3):>7.0f}x rows")
+    print(f"  aggregator {elapsed / len(samples) * 1e6:.1f} us/sample on the event loop, stats {aggregator.get_stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Compara tiempo de codificación y tamaño del mensaje entre el formato anterior (JSON dentro de un
+string JSON), el sobre JSON codificado una sola vez y msgpack.
+
+    python -m benchmarks.codec --iterations 20000
+"""
+import argparse
+import json
+import timeit
+from datetime import datetime
+from services.codec import JsonCodec, MsgpackCodec, encode_message
+from services.rabbitmq_service import pack_samples
+
+def crash_data():
+    return {
+        "kit_id": "kit-0001",
+        "driver_id": "driver-0001",
+        "datetime": datetime(2024, 1, 1, 8, 30, 15, 123456).isoformat(),
+        "impact_force": 4.73,
+        "crash_coordinates": "POINT(-99.133209 19.432608)",
+    }
+
+def sensor_data():
+    return {
+        "datetime": datetime(2024, 1, 1, 8, 30, 15, 123456).isoformat(),
+        "acceleration": 0.0123,
+        "deceleration": -0.0456,
+        "vibrations": 0,
+        "inclination_angle": 0,
+        "angular_velocity": 0,
+        "g_force_x": 0.0123,
+        "g_force_y": -0.0456,
+    }
+
+def sensor_batch():
+    return pack_samples("kit-0001", "driver-0001", [sensor_data() for _ in range(50)])
+
+def legacy_encode(event, data):
+    # Formato anterior: el controlador serializaba a texto y send_message volvía a serializar
+    return json.dumps({"data": json.dumps(data), "event": event}).encode()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    encoders = {
+        "legacy json-in-json": legacy_encode,
+        "json (once)": lambda event, data: encode_message(JsonCodec(), event, data),
+        "msgpack": lambda event, data: encode_message(MsgpackCodec(), event, data),
+    }
+    for event, data in (("crash.detected", crash_data()), ("sensor.update", sensor_data()), ("sensor.update x50", sensor_batch())):
+        baseline = len(legacy_encode(event, data))
+        for label, encode in encoders.items():
+            size = len(encode(event, data))
+            seconds = timeit.timeit(lambda: encode(event, data), number=args.iterations)
+            print(
+                f"{event:<18} {label:<20} {size:>6} B ({100 * size / baseline:5.1f}%)  "
+                f"{seconds / args.iterations * 1e6:7.2f} us/msg"
+            )
+
+if __name__ == "__main__":
+    main()
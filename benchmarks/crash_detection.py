@@ -0,0 +1,139 @@
+"""
+Evalúa CrashDetector sobre un trayecto sintético con baches, frenadas bruscas y choques inyectados, y mide la
+latencia de publicación de crash.detected con el publicador cargado de mensajes de telemetría:
+
+    python -m benchmarks.crash_detection --rate 200 --minutes 10 --crashes 10 --rtt-ms 2 --backlog 500
+
+- detector: choques detectados, falsos positivos, retardo desde el inicio del impacto y CPU por muestra.
+- 1 Hz: choques en los que la comprobación por muestra de SensorReader (g_force > 3.5 a 1 Hz) habría visto
+  el impacto; con el rango de ±2 g del sensor, ninguno.
+- publish: detección -> llegada al broker, publicando directo (GpioService.report_crash) frente a encolar
+  con --backlog mensajes sensor.summary pendientes.
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import time
+
+# Sin spool en disco: solo se mide el camino en memoria
+os.environ["RABBITMQ_SPOOL_DIR"] = ""
+
+from database.metrics import LatencyHistogram
+from services.crash_detector import CrashDetector
+from services.rabbitmq_service import RabbitMQService
+from services.transports.memory import InMemoryBroker, MemoryTransport
+
+FULL_SCALE_G = 2.0
+IMPACT_SECONDS = 0.08
+
+def clip(value: float) -> float:
+    # El acelerómetro satura en ±2 g
+    return max(-FULL_SCALE_G, min(FULL_SCALE_G, value))
+
+def make_drive(rng: random.Random, rate: float, seconds: float, crashes: int):
+    """
+    Devuelve (muestras, inicios de choque). Cada ~7 s un bache (pico vertical de 0.8 g, 30 ms) y cada ~11 s una
+    frenada de 0.7 g; los choques saturan acc_x durante 80 ms y activan el pin de golpes.
+    """
+    crash_starts = [seconds * (i + 0.5) / crashes for i in range(crashes)]
+    samples = []
+    for i in range(int(rate * seconds)):
+        t = i / rate
+        ax, ay, az = rng.gauss(0, 0.03), rng.gauss(0, 0.03), 1 + rng.gauss(0, 0.03)
+        if t % 7 < 0.03:
+            az += 0.8
+        if 3 < t % 11 < 4.5:
+            ax -= 0.7
+        shock = False
+        for start in crash_starts:
+            if 0 <= t - start < IMPACT_SECONDS:
+                ax -= 3.0 * math.sin(math.pi * (t - start) / IMPACT_SECONDS) + 0.5
+                ay += rng.gauss(0, 0.5)
+                shock = t - start > 0.01
+        samples.append((t, {"acc_x": clip(ax), "acc_y": clip(ay), "acc_z": clip(az), "shock": shock}))
+    return samples, crash_starts
+
+def run_detector(samples, crash_starts):
+    detector = CrashDetector.from_env()
+    detections = []
+    started = time.perf_counter()
+    for t, sample in samples:
+        crash = detector.update(sample, t)
+        if crash is not None:
+            detections.append(crash)
+    elapsed = time.perf_counter() - started
+    delays, false_positives = [], 0
+    for crash in detections:
+        matches = [start for start in crash_starts if 0 <= crash["timestamp"] - start < 1]
+        if matches:
+            delays.append((crash["timestamp"] - matches[0]) * 1000)
+        else:
+            false_positives += 1
+    return detections, delays, false_positives, elapsed / len(samples), detector
+
+def seen_at_1hz(samples, crash_starts):
+    # SensorReader lee una muestra por segundo y compara g_force > 3.5
+    seen = 0
+    for start in crash_starts:
+        window = [sample for t, sample in samples if start <= t < start + IMPACT_SECONDS and (t * 1) % 1 < 1 / 200]
+        if any(math.sqrt(s["acc_x"] ** 2 + s["acc_y"] ** 2 + s["acc_z"] ** 2) > 3.5 for s in window):
+            seen += 1
+    return seen
+
+async def bench_publish(rtt: float, backlog: int, reports: int, direct: bool):
+    broker = InMemoryBroker(rtt, seed=1)
+    service = RabbitMQService(MemoryTransport(broker))
+    await service.start()
+    delivered = LatencyHistogram()
+    arrived = asyncio.Event()
+
+    async def on_message(message):
+        if message.headers["event"] == "crash.detected":
+            arrived.set()
+
+    consumer = broker.consume("#", on_message)
+    for _ in range(reports):
+        for _ in range(backlog):
+            await service.enqueue({"count": 2000, "metrics": {"acc_x": {"mean": 0.01}}}, "sensor.summary")
+        arrived.clear()
+        detected = time.monotonic()
+        message = {"kit_id": "1", "driver_id": "1", "impact_force": 2.2}
+        if direct:
+            await service.publish(message, "crash.detected")
+        else:
+            await service.enqueue(message, "crash.detected")
+        await arrived.wait()
+        delivered.observe((time.monotonic() - detected) * 1000)
+        await service.drain()
+        await service.flush()
+    consumer.cancel()
+    await service.stop()
+    return delivered.to_dict()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=200)
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--crashes", type=int, default=10)
+    parser.add_argument("--rtt-ms", type=float, default=2)
+    parser.add_argument("--backlog", type=int, default=500)
+    parser.add_argument("--reports", type=int, default=20)
+    args = parser.parse_args()
+
+    samples, crash_starts = make_drive(random.Random(1), args.rate, args.minutes * 60, args.crashes)
+    detections, delays, false_positives, cpu, detector = run_detector(samples, crash_starts)
+    print(f"{len(samples)} samples ({args.rate:g} Hz, {args.minutes:g} min), {args.crashes} crashes")
+    print(f"  detector  {len(delays)}/{args.crashes} detected, {false_positives} false positives, "
+          f"delay from impact onset {min(delays, default=0):.0f}-{max(delays, default=0):.0f} ms, {cpu * 1e6:.1f} us/sample")
+    print(f"  1 Hz      {seen_at_1hz(samples, crash_starts)}/{args.crashes} impacts above 3.5 g at a 1 Hz sample; "
+          f"max g seen by the detector {detector.stats['max_g']:.2f}")
+
+    for label, direct in (("direct", True), ("queued", False)):
+        delivered = asyncio.run(bench_publish(args.rtt_ms / 1000, args.backlog, args.reports, direct))
+        print(f"  {label:<9} detection->broker p50 {delivered['p50_ms']:g} p99 {delivered['p99_ms']:g} max {delivered['max_ms']:.1f} ms "
+              f"({args.backlog} summaries queued before it, rtt {args.rtt_ms:g} ms)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compara el throughput de inserción fila a fila y por lotes de los backends MySQL y SQLite.
+
+    python -m benchmarks.db_backends --rows 5000 --batch 200 --backend sqlite --backend mysql
+
+Para MySQL basta un servidor local compatible (p. ej. `docker run -e MARIADB_ROOT_PASSWORD=... -p 3306:3306 mariadb`)
+configurado con las variables DATABASE_* de local.env.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime
+from database.connector import DatabaseConnector
+from database.metrics import QueryMetrics
+
+CREATE_TABLE = {
+    "mysql": """
+        CREATE TABLE IF NOT EXISTS bench_samples (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            kit_id VARCHAR(64), driver_id VARCHAR(64), date DATETIME(6),
+            data_acceleration DOUBLE, data_deceleration DOUBLE, g_force_x DOUBLE, g_force_y DOUBLE
+        )
+    """,
+    "sqlite": """
+        CREATE TABLE IF NOT EXISTS bench_samples (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kit_id TEXT, driver_id TEXT, date TIMESTAMP,
+            data_acceleration REAL, data_deceleration REAL, g_force_x REAL, g_force_y REAL
+        )
+    """,
+}
+
+INSERT = """
+    INSERT INTO bench_samples (kit_id, driver_id, date, data_acceleration, data_deceleration, g_force_x, g_force_y)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+def make_rows(count):
+    now = datetime.now()
+    return [("kit", "driver", now, i * 0.01, -i * 0.01, 0.1, 0.2) for i in range(count)]
+
+async def bench_backend(name, rows, batch):
+    database = DatabaseConnector(QueryMetrics(), backend=name)
+    await database.connect()
+    try:
+        await database.query_post(CREATE_TABLE[name], None)
+        await database.query_post("DELETE FROM bench_samples", None)
+
+        start = time.perf_counter()
+        for row in rows:
+            await database.query_post(INSERT, row)
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(0, len(rows), batch):
+            await database.query_post_many([(INSERT, rows[i:i + batch])])
+        batched = time.perf_counter() - start
+
+        await database.query_post("DROP TABLE bench_samples", None)
+    finally:
+        await database.close()
+
+    print(f"{name:>6}: per-insert {len(rows) / single:10.0f} rows/s | batched({batch}) {len(rows) / batched:10.0f} rows/s")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--backend", action="append", choices=["mysql", "sqlite"])
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_SQLITE_PATH"):
+        os.environ["DATABASE_SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+    rows = make_rows(args.rows)
+    for name in args.backend or ["sqlite", "mysql"]:
+        try:
+            await bench_backend(name, rows, args.batch)
+        except Exception as e:
+            print(f"{name:>6}: skipped ({e})")
+
+if __name__ == "__main__":
+    asyncio.run(main())
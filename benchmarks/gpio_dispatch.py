@@ -0,0 +1,112 @@
+"""
+Mide la latencia por muestra (captura en el hilo del sensor -> fin del procesamiento) de tres formas de
+llevar las lecturas de los hilos de sensores al código asyncio de GpioService:
+
+    asyncio.run       queue.Queue consumida en un hilo que crea un loop nuevo por muestra (implementación original)
+    threadsafe        queue.Queue consumida en un hilo que espera cada corrutina en el loop de la app
+    call_soon         loop.call_soon_threadsafe -> asyncio.Queue consumida por una tarea del loop de la app
+
+    python -m benchmarks.gpio_dispatch --rate 100 --seconds 5 --threads 2
+
+El procesamiento simulado cede el loop (como un add_sample o un get_kit_id en caché) y gasta --work-us de CPU.
+No necesita el hardware del kit.
+"""
+import argparse
+import asyncio
+import queue
+import threading
+import time
+from database.metrics import LatencyHistogram
+
+async def process(sample, work_us: float):
+    await asyncio.sleep(0)
+    deadline = time.perf_counter() + work_us / 1e6
+    while time.perf_counter() < deadline:
+        pass
+
+def producers(count: int, rate: float, seconds: float, submit):
+    def run():
+        interval = 1 / rate
+        next_at = time.monotonic()
+        for _ in range(int(rate * seconds)):
+            submit({"captured": time.monotonic()})
+            next_at += interval
+            time.sleep(max(0.0, next_at - time.monotonic()))
+
+    threads = [threading.Thread(target=run) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+async def bench_asyncio_run(args, latency):
+    data_queue, done = queue.Queue(), threading.Event()
+
+    def consume():
+        while not done.is_set() or not data_queue.empty():
+            try:
+                sample = data_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            asyncio.run(process(sample, args.work_us))
+            latency.observe((time.monotonic() - sample["captured"]) * 1000)
+
+    consumer = asyncio.create_task(asyncio.to_thread(consume))
+    threads = producers(args.threads, args.rate, args.seconds, data_queue.put)
+    await asyncio.to_thread(lambda: [thread.join() for thread in threads])
+    done.set()
+    await consumer
+
+async def bench_threadsafe(args, latency):
+    data_queue, done, loop = queue.Queue(), threading.Event(), asyncio.get_running_loop()
+
+    def consume():
+        while not done.is_set() or not data_queue.empty():
+            try:
+                sample = data_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            asyncio.run_coroutine_threadsafe(process(sample, args.work_us), loop).result()
+            latency.observe((time.monotonic() - sample["captured"]) * 1000)
+
+    consumer = asyncio.create_task(asyncio.to_thread(consume))
+    threads = producers(args.threads, args.rate, args.seconds, data_queue.put)
+    await asyncio.to_thread(lambda: [thread.join() for thread in threads])
+    done.set()
+    await consumer
+
+async def bench_call_soon(args, latency):
+    data_queue, loop = asyncio.Queue(), asyncio.get_running_loop()
+    expected = args.threads * int(args.rate * args.seconds)
+
+    async def consume():
+        for _ in range(expected):
+            sample = await data_queue.get()
+            await process(sample, args.work_us)
+            latency.observe((time.monotonic() - sample["captured"]) * 1000)
+
+    consumer = asyncio.create_task(consume())
+    threads = producers(args.threads, args.rate, args.seconds, lambda s: loop.call_soon_threadsafe(data_queue.put_nowait, s))
+    await asyncio.to_thread(lambda: [thread.join() for thread in threads])
+    await consumer
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=100, help="muestras por segundo de cada hilo")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--threads", type=int, default=2)
+    parser.add_argument("--work-us", type=float, default=50)
+    args = parser.parse_args()
+
+    for label, bench in (("asyncio.run", bench_asyncio_run), ("threadsafe", bench_threadsafe), ("call_soon", bench_call_soon)):
+        latency = LatencyHistogram()
+        cpu = time.process_time()
+        await bench(args, latency)
+        cpu = time.process_time() - cpu
+        stats = latency.to_dict()
+        print(
+            f"{label:<12} samples={stats['count']:<6} avg={stats['avg_ms']:>7.3f} ms p95<={stats['p95_ms']:>6g} ms "
+            f"max={stats['max_ms']:>8.3f} ms  cpu/sample={cpu / max(stats['count'], 1) * 1e6:>7.1f} us"
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
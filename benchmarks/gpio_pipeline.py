@@ -0,0 +1,86 @@
+"""
+Corre GpioService completo fuera del kit con SENSOR_BACKEND=synthetic (o replay), SQLite y el broker en memoria,
+y reporta muestreo, latencias de la cola, agregación, choques y publicación:
+
+    python -m benchmarks.gpio_pipeline --seconds 30 --rate 200 --crash-every 10
+    python -m benchmarks.gpio_pipeline --seconds 30 --imu-mode fifo
+    SENSOR_REPLAY_FILE=drive.jsonl python -m benchmarks.gpio_pipeline --backend replay
+
+Para perfilar: python -m cProfile -o gpio.prof -m benchmarks.gpio_pipeline --seconds 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+
+def configure(args):
+    # Antes de importar los servicios, que leen la configuración al crear sus singletons
+    os.environ.update(
+        SENSOR_BACKEND=args.backend,
+        GPIO_IMU_MODE=args.imu_mode,
+        GPIO_SENSOR_RATES=f"sensors:{args.rate:g},gps:10",
+        SENSOR_SYNTHETIC_CRASH_EVERY=str(args.crash_every),
+        DATABASE_BACKEND="sqlite",
+        DATABASE_SQLITE_PATH=args.database,
+        RABBITMQ_TRANSPORT="memory",
+        RABBITMQ_SPOOL_DIR="",
+    )
+
+async def run(seconds: float) -> dict:
+    from database.batch_writer import batch_writer
+    from database.connector import database_connector
+    from database.schema import prepare_database
+    from services.gpio_service import gpio_service
+    from services.rabbitmq_service import rabbitmq_service
+
+    await database_connector.connect()
+    await prepare_database(database_connector)
+    await batch_writer.start()
+    await rabbitmq_service.start()
+    stop_event = threading.Event()
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    task = asyncio.create_task(gpio_service.start(stop_event))
+    await asyncio.sleep(seconds)
+    stop_event.set()
+    await gpio_service.stop()
+    await task
+    cpu = time.process_time() - cpu_started
+    elapsed = time.perf_counter() - started
+    await rabbitmq_service.close_connection()
+    await batch_writer.close()
+    await database_connector.close()
+
+    stats = gpio_service.get_stats()
+    return {
+        "backend": stats["backend"],
+        "cpu_percent": round(cpu / elapsed * 100, 1),
+        "processed_per_s": round(stats["processed"] / elapsed, 1),
+        "dropped": stats["dropped"],
+        "sampling": stats["sampling"].get("sensors"),
+        "queue_latency": {k: v for k, v in stats["queue_latency"].items() if k != "buckets"},
+        "process_latency": {k: v for k, v in stats["process_latency"].items() if k != "buckets"},
+        "aggregation": stats["aggregation"],
+        "crash": stats["crash"] and {
+            "detections": stats["crash"]["detections"],
+            "publish_ms": {k: v for k, v in stats["crash"]["latency"]["publish"].items() if k != "buckets"},
+        },
+        "broker": {"published": rabbitmq_service.stats["published"], "confirmed": rabbitmq_service.stats["confirmed"]},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("synthetic", "replay"), default="synthetic")
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--rate", type=float, default=200)
+    parser.add_argument("--imu-mode", choices=("poll", "fifo"), default="poll")
+    parser.add_argument("--crash-every", type=float, default=10)
+    parser.add_argument("--database", default="/tmp/gpio_pipeline.db")
+    args = parser.parse_args()
+    configure(args)
+    print(json.dumps(asyncio.run(run(args.seconds)), indent=2, default=str))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Compara una muestra completa del MPU-6050 (acelerómetro + giroscopio) leída registro a registro
+(dos read_byte_data por eje, 12 transacciones) con una sola lectura en ráfaga de 0x3B-0x48.
+
+    python -m benchmarks.i2c_reads --samples 2000 --bus-khz 100 --bus-khz 400 --transaction-us 150
+
+Sobre MockSMBus; --transaction-us simula el coste fijo por transacción del driver i2c-dev en el kit.
+El tiempo en el bus se estima con 9 ciclos de reloj por byte (8 bits + ACK) más start, restart y stop.
+"""
+import argparse
+import time
+from services.i2c_service import ACCEL_XOUT_H, BURST_LENGTH, GYRO_XOUT_H, I2CService
+from services.mock_smbus import MockSMBus
+
+AXES = [ACCEL_XOUT_H + 2 * i for i in range(3)] + [GYRO_XOUT_H + 2 * i for i in range(3)]
+
+def bus_clocks(data_bytes: int) -> int:
+    # Dirección + registro, restart + dirección, datos; 3 ciclos de start/restart/stop
+    return 9 * (2 + 1 + data_bytes) + 3
+
+def read_per_register(service):
+    return [service.read_raw_data(register) for register in AXES]
+
+def read_burst(service):
+    return service.read_burst()
+
+def measure(read, samples, transaction_us):
+    bus = MockSMBus(transaction_delay=transaction_us / 1e6)
+    service = I2CService(bus_factory=bus.factory())
+    bus.transactions = 0
+    started = time.perf_counter()
+    for _ in range(samples):
+        read(service)
+    elapsed = time.perf_counter() - started
+    return bus.transactions / samples, elapsed / samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--bus-khz", type=float, action="append")
+    parser.add_argument("--transaction-us", type=float, default=0.0)
+    args = parser.parse_args()
+
+    variants = (
+        ("per-register", read_per_register, 12 * bus_clocks(1)),
+        ("burst", read_burst, bus_clocks(BURST_LENGTH)),
+    )
+    for label, read, clocks in variants:
+        transactions, seconds = measure(read, args.samples, args.transaction_us)
+        bus_times = "  ".join(
+            f"bus@{khz:g}kHz={clocks / khz:.2f} ms (max {khz * 1000 / clocks:.0f} Hz)" for khz in args.bus_khz or [100, 400]
+        )
+        print(f"{label:<13} {transactions:>4.0f} transactions/sample  {seconds * 1e6:>8.1f} us/sample  {bus_times}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Mide el throughput sostenido del camino de publicación contra el broker en memoria (sin servicios externos):
+esperando cada confirmación (secuencial), con varios mensajes en vuelo (pipeline) y de punta a punta
+(enqueue -> cola -> publicación -> enrutado topic -> consumidor).
+
+    python -m benchmarks.rabbitmq_publish --messages 5000 --rtt-ms 2 --in-flight 64 --in-flight 256
+
+--fail-rate inyecta rechazos del broker para comprobar que los fallos se cuentan por mensaje.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+# Sin spool en disco: solo se mide el camino en memoria
+os.environ["RABBITMQ_SPOOL_DIR"] = ""
+
+from services.rabbitmq_service import RabbitMQService
+from services.transports.memory import InMemoryBroker, MemoryTransport
+
+PAYLOAD = {"acc_x": 0.1, "acc_y": -0.2}
+
+def make_service(broker, in_flight):
+    os.environ["RABBITMQ_MAX_IN_FLIGHT"] = str(in_flight)
+    os.environ["RABBITMQ_ROUTING_KEY"] = "kit.telemetry"
+    return RabbitMQService(MemoryTransport(broker))
+
+async def bench_sequential(messages, rtt, fail_rate):
+    broker = InMemoryBroker(rtt, fail_rate, seed=1)
+    service = make_service(broker, 1)
+    started = time.perf_counter()
+    for _ in range(messages):
+        try:
+            await service.send_message(PAYLOAD, "sensor.update")
+        except ConnectionError:
+            pass
+    return time.perf_counter() - started, service.get_stats()
+
+async def bench_pipelined(messages, rtt, fail_rate, in_flight):
+    broker = InMemoryBroker(rtt, fail_rate, seed=1)
+    service = make_service(broker, in_flight)
+    started = time.perf_counter()
+    for _ in range(messages):
+        await service.publish(PAYLOAD, "sensor.update")
+    await service.flush()
+    return time.perf_counter() - started, service.get_stats()
+
+async def bench_end_to_end(messages, rtt, in_flight):
+    broker = InMemoryBroker(rtt, seed=1)
+    service = make_service(broker, in_flight)
+    received = 0
+    done = asyncio.Event()
+
+    async def on_message(message):
+        nonlocal received
+        received += 1
+        if received == messages:
+            done.set()
+
+    consumer = broker.consume("kit.#", on_message)
+    started = time.perf_counter()
+    for _ in range(messages):
+        # travel.register usa la política block: ningún mensaje se descarta
+        await service.enqueue(PAYLOAD, "travel.register")
+    await done.wait()
+    elapsed = time.perf_counter() - started
+    consumer.cancel()
+    await service.close_connection()
+    return elapsed, service.get_stats()
+
+def report(label, messages, elapsed, stats):
+    print(
+        f"{label:<28} {messages / elapsed:>10.0f} msg/s  confirmed={stats['confirmed']} "
+        f"failed={stats['failed']} max_in_flight={stats['max_in_flight_seen']}"
+    )
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--rtt-ms", type=float, default=2.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--in-flight", type=int, action="append")
+    args = parser.parse_args()
+    rtt = args.rtt_ms / 1000
+
+    elapsed, stats = await bench_sequential(args.messages, rtt, args.fail_rate)
+    report("sequential", args.messages, elapsed, stats)
+    for in_flight in args.in_flight or [64, 256]:
+        elapsed, stats = await bench_pipelined(args.messages, rtt, args.fail_rate, in_flight)
+        report(f"pipelined in_flight={in_flight}", args.messages, elapsed, stats)
+    for in_flight in args.in_flight or [64, 256]:
+        elapsed, stats = await bench_end_to_end(args.messages, rtt, in_flight)
+        report(f"end-to-end in_flight={in_flight}", args.messages, elapsed, stats)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""
+Compara el búfer de lista de diccionarios (readings.py / gpio_service_backup.py) con RingBuffer
+a la frecuencia de muestreo dada, sobre ventanas de --window segundos:
+
+    python -m benchmarks.ring_buffer --rate 100 --window 30 --windows 20
+
+- append: coste de agregar una muestra.
+- averages: promedios del registro de conducción (calculate_averages original vs driving_averages).
+- stats: mean/min/max/std/p50/p95 de todos los canales (statistics por campo vs un cálculo vectorizado).
+- memory: memoria del búfer lleno medida con tracemalloc.
+"""
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+from utils.ring_buffer import DRIVING_CHANNELS, RingBuffer, driving_averages
+
+def make_sample(rng: random.Random) -> dict:
+    ax, ay, az = rng.gauss(0, 0.3), rng.gauss(0, 0.3), rng.gauss(1, 0.05)
+    return {
+        "acc_x": round(ax * 9.81, 2), "acc_y": round(ay * 9.81, 2), "acc_z": round(az * 9.81, 2),
+        "gyro_x": rng.gauss(0, 5), "gyro_y": rng.gauss(0, 5), "gyro_z": rng.gauss(0, 5),
+        "angle": int((ay - 1) * 180 / -2), "vibrations": rng.randint(0, 3), "shocks": 0,
+        "g_force_x": ax, "g_force_y": ay, "g_force": (ax ** 2 + ay ** 2 + az ** 2) ** 0.5,
+    }
+
+def list_averages(buffer: list) -> dict:
+    # calculate_averages de gpio_service_backup.SensorService antes del RingBuffer
+    mean = statistics.mean
+    return {
+        "acceleration": mean([d['acc_x'] for d in buffer if d['acc_x'] > 0]) if [d['acc_x'] for d in buffer if d['acc_x'] > 0] else 0,
+        "deceleration": abs(mean([d['acc_x'] for d in buffer if d['acc_x'] < 0])) if [d['acc_x'] for d in buffer if d['acc_x'] < 0] else 0,
+        "vibrations": sum(d['vibrations'] for d in buffer),
+        "inclination_angle": mean([d['angle'] for d in buffer]),
+        "angular_velocity": mean([d['gyro_x'] for d in buffer]),
+        "g_force_x": mean([d['g_force_x'] for d in buffer]),
+        "g_force_y": mean([d['g_force_y'] for d in buffer]),
+    }
+
+def list_stats(buffer: list) -> dict:
+    stats = {}
+    for name in DRIVING_CHANNELS:
+        values = [d[name] for d in buffer]
+        quantiles = statistics.quantiles(values, n=100, method="inclusive")
+        stats[name] = {
+            "mean": statistics.mean(values), "min": min(values), "max": max(values),
+            "std": statistics.pstdev(values), "p50": quantiles[49], "p95": quantiles[94],
+        }
+    return stats
+
+def timed(function, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat
+
+def buffer_memory(make) -> int:
+    tracemalloc.start()
+    buffer = make()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del buffer
+    return size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=100)
+    parser.add_argument("--window", type=float, default=30)
+    parser.add_argument("--windows", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    count = int(args.rate * args.window)
+    samples = [make_sample(rng) for _ in range(count)]
+
+    items = []
+    list_append = timed(lambda: items.append(samples[len(items) % count]), count) if count else 0
+    ring = RingBuffer(count, DRIVING_CHANNELS)
+    ring_append = timed(lambda: ring.append(samples[ring.total % count]), count)
+    items = samples[:]
+
+    assert abs(list_averages(items)["g_force_x"] - driving_averages(ring)["g_force_x"]) < 1e-9
+    list_memory = buffer_memory(lambda: [dict(sample) for sample in samples])
+    ring_memory = buffer_memory(lambda: RingBuffer(count, DRIVING_CHANNELS))
+
+    rows = (
+        ("append", list_append, ring_append, "us/sample"),
+        ("averages", timed(lambda: list_averages(items), args.windows), timed(lambda: driving_averages(ring), args.windows), "us/window"),
+        ("stats", timed(lambda: list_stats(items), args.windows), timed(lambda: ring.stats(), args.windows), "us/window"),
+    )
+    print(f"{args.rate:g} Hz, {args.window:g} s window ({count} samples, {len(DRIVING_CHANNELS)} channels)")
+    for label, list_time, ring_time, unit in rows:
+        print(f"  {label:<9} list {list_time * 1e6:>10.1f}  ring {ring_time * 1e6:>9.1f} {unit}  {list_time / ring_time:>6.1f}x")
+    print(f"  memory    list {list_memory / 1024:>10.1f}  ring {ring_memory / 1024:>9.1f} KiB  (ring is fixed at {ring.nbytes / 1024:.1f} KiB)")
+    # Muestras por segundo que el hilo de lectura puede agregar y resumir en una ventana
+    for label, append, summary in (("list", list_append, rows[2][1]), ("ring", ring_append, rows[2][2])):
+        print(f"  {label} throughput: {count / (append * count + summary):>10.0f} samples/s including one stats pass per window")
+
+if __name__ == "__main__":
+    main()
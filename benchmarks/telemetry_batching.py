@@ -0,0 +1,80 @@
+"""
+Estima mensajes/s y bytes/s de sensor.update y geolocation.update con y sin el envoltorio por lotes
+a 1, 10 y 100 Hz. Usa el mismo cuerpo que publica RabbitMQService.
+
+    python -m benchmarks.telemetry_batching --rate 1 --rate 10 --rate 100 --samples 50 --max-ms 5000
+
+Cada mensaje AMQP suma su encuadre (basic.publish, cabecera de contenido y cuerpo, 3 frames)
+y, en un enlace celular, la cabecera TCP/IP de su segmento (--tcp-overhead).
+"""
+import argparse
+import os
+from datetime import datetime, timedelta
+from services.rabbitmq_service import RabbitMQService, pack_samples
+
+FRAME_OVERHEAD = 8          # tipo, canal, tamaño y fin de frame
+PUBLISH_METHOD = 4 + 2 + 1  # clase/método, reservado y bits mandatory/immediate
+CONTENT_HEADER = 4 + 8 + 2  # clase/peso, tamaño del cuerpo y flags de propiedades
+
+def amqp_overhead(exchange: str, routing_key: str) -> int:
+    method = FRAME_OVERHEAD + PUBLISH_METHOD + 1 + len(exchange) + 1 + len(routing_key)
+    header = FRAME_OVERHEAD + CONTENT_HEADER
+    body = FRAME_OVERHEAD
+    return method + header + body
+
+def sensor_sample(when: datetime) -> dict:
+    return {
+        "datetime": when.isoformat(),
+        "acceleration": 0.0123,
+        "deceleration": -0.0456,
+        "vibrations": 0,
+        "inclination_angle": 0,
+        "angular_velocity": 0,
+        "g_force_x": 0.0123,
+        "g_force_y": -0.0456,
+    }
+
+def gps_sample(when: datetime) -> dict:
+    return {"datetime": when.isoformat(), "coordinates": "19.432608,-99.133209"}
+
+def measure(service, event, make_sample, rate, seconds, batch_size, overhead):
+    start = datetime(2024, 1, 1, 8, 0, 0)
+    samples = [make_sample(start + timedelta(seconds=i / rate)) for i in range(int(rate * seconds))]
+    single = [len(service._build_body(dict(s, kit_id="kit-0001", driver_id="driver-0001"), event)) for s in samples]
+    batched = [
+        len(service._build_body(pack_samples("kit-0001", "driver-0001", samples[i:i + batch_size]), event))
+        for i in range(0, len(samples), batch_size)
+    ]
+    return (
+        (len(single) / seconds, (sum(single) + overhead * len(single)) / seconds),
+        (len(batched) / seconds, (sum(batched) + overhead * len(batched)) / seconds),
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, action="append")
+    parser.add_argument("--seconds", type=int, default=60)
+    parser.add_argument("--samples", type=int, default=50, help="máximo de muestras por lote")
+    parser.add_argument("--max-ms", type=float, default=5000, help="antigüedad máxima del lote")
+    parser.add_argument("--tcp-overhead", type=int, default=52)
+    args = parser.parse_args()
+
+    service = RabbitMQService()
+    overhead = amqp_overhead(os.getenv("RABBITMQ_EXCHANGE", "exchange"), service.routing_key or "kit") + args.tcp_overhead
+    print(f"per-message overhead: {overhead} bytes")
+    for event, make_sample in (("sensor.update", sensor_sample), ("geolocation.update", gps_sample)):
+        for rate in args.rate or [1, 10, 100]:
+            # El lote se cierra por número de muestras o por antigüedad, lo que ocurra antes
+            batch_size = max(1, min(args.samples, int(rate * args.max_ms / 1000)))
+            (single_msgs, single_bytes), (batch_msgs, batch_bytes) = measure(
+                service, event, make_sample, rate, args.seconds, batch_size, overhead
+            )
+            print(
+                f"{event:<19} {rate:>5g} Hz  batch={batch_size:<3} "
+                f"single: {single_msgs:>7.2f} msg/s {single_bytes:>9.0f} B/s  "
+                f"batched: {batch_msgs:>6.2f} msg/s {batch_bytes:>8.0f} B/s  "
+                f"saved: {100 * (1 - batch_bytes / single_bytes):5.1f}% bytes"
+            )
+
+if __name__ == "__main__":
+    main()
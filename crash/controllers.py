@@ -1,8 +1,7 @@
-import json
 from fastapi import HTTPException, status
-from database.connector import DatabaseConnector
+from database.connector import DatabaseConnector, database_connector
 from crash.models import CrashRequestModel, CrashModel
-from services.rabbitmq_service import RabbitMQService
+from services.rabbitmq_service import RabbitMQService, rabbitmq_service
 from travel.controllers import travel_controller
 import logging
 
@@ -25,7 +24,7 @@ class CrashController:
             )
         
         crash_message = self.create_crash_message(crash_model)
-        await self.rabbitmq_service.send_message(crash_message, "crash.detected")
+        await self.rabbitmq_service.enqueue(crash_message, "crash.detected")
 
         await self.save_crash_data(crash_model)
 
@@ -60,7 +59,7 @@ class CrashController:
                 crash_coordinates=coordinates,
             )
             
-            await self.rabbitmq_service.send_message(crash_message, "crash.detected")
+            await self.rabbitmq_service.enqueue(crash_message, "crash.detected")
             await self.save_crash_data(crash_details)
 
             return "Crash data registered successfully"
@@ -69,16 +68,20 @@ class CrashController:
             return str(e)
 
     def create_crash_message(self, crash_model: CrashModel, kit_id=None, coordinates=None):
-        return json.dumps({
+        return {
             "kit_id": kit_id or crash_model.kit_id,
             "driver_id": crash_model.driver_id,
             "datetime": crash_model.datetime.isoformat(),
             "impact_force": crash_model.impact_force,
             "crash_coordinates": coordinates or crash_model.crash_coordinates,
-        })
+        }
 
     async def save_crash_data(self, crash_model: CrashModel):
-        await self.database.query_post(
+        async with self.database.transaction() as unit:
+            await self.insert_crash_row(unit, crash_model)
+
+    async def insert_crash_row(self, unit, crash_model: CrashModel):
+        await unit.execute(
             """
             INSERT INTO crashes (kit_id, driver_id, crash_date, impact_g_force, crash_coordinates)
             VALUES (%s, %s, %s, %s, ST_GeomFromText(%s));
@@ -93,19 +96,13 @@ class CrashController:
         )
 
     async def get_driver_by_id(self, driver_id: str) -> dict:
-        drivers = await self.database.query_get(
-            """
-            SELECT id, kit_id FROM drivers WHERE id = %s
-            """,
-            (driver_id,),
-        )
-        if not drivers:
+        # Consulta compartida (y en caché) con el controlador de viajes
+        driver = await travel_controller.get_driver_by_id(driver_id)
+        if not driver:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail=DRIVER_NOT_FOUND
             )
-        return drivers[0]
+        return driver
 
 # Instanciar el controlador
-database = DatabaseConnector()
-rabbitmq_service = RabbitMQService()
-crash_controller = CrashController(database, rabbitmq_service)
\ No newline at end of file
+crash_controller = CrashController(database_connector, rabbitmq_service)
\ No newline at end of file
@@ -0,0 +1,13 @@
+from database.backends.base import BackendConnection, DatabaseBackend, ExecuteResult
+
+BACKENDS = ("mysql", "sqlite")
+
+def create_backend(name: str, metrics, acquire_timeout: float) -> DatabaseBackend:
+    # Importación diferida: cada backend solo carga su propio driver
+    if name == "mysql":
+        from database.backends.mysql import MySQLBackend
+        return MySQLBackend(metrics, acquire_timeout)
+    if name == "sqlite":
+        from database.backends.sqlite import SQLiteBackend
+        return SQLiteBackend(metrics, acquire_timeout)
+    raise EnvironmentError(f"Unknown DATABASE_BACKEND '{name}', expected one of {BACKENDS}")
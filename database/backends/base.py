@@ -0,0 +1,92 @@
+import asyncio
+import time
+from collections import namedtuple
+from database.metrics import QueryMetrics
+
+# Resultado de una sentencia de escritura
+ExecuteResult = namedtuple("ExecuteResult", ["lastrowid", "rowcount"])
+
+class BackendConnection:
+    """
+    Conexión de un backend. Los parámetros usan el estilo %s de MySQL;
+    cada backend los traduce a su propio dialecto.
+    """
+
+    async def begin(self):
+        raise NotImplementedError
+
+    async def commit(self):
+        raise NotImplementedError
+
+    async def rollback(self):
+        raise NotImplementedError
+
+    async def execute(self, sql, param=None) -> ExecuteResult:
+        raise NotImplementedError
+
+    async def executemany(self, sql, params) -> int:
+        raise NotImplementedError
+
+    async def fetch_all(self, sql, param=None) -> list:
+        raise NotImplementedError
+
+    def stream(self, sql, param=None, chunk_size=1000, as_dict=False):
+        # Generador asíncrono que produce listas de filas de tamaño chunk_size
+        raise NotImplementedError
+
+class DatabaseBackend:
+    """
+    Interfaz de los backends de DatabaseConnector: ciclo de vida y adquisición de conexiones.
+    """
+
+    dialect = None
+
+    def __init__(self, metrics: QueryMetrics, acquire_timeout: float):
+        self.metrics = metrics
+        self.acquire_timeout = acquire_timeout
+        self.stats = {
+            "acquired": 0,
+            "acquire_timeouts": 0,
+            "acquire_wait_total": 0.0,
+            "acquire_wait_max": 0.0,
+            "health_check_failures": 0,
+        }
+
+    async def connect(self):
+        raise NotImplementedError
+
+    async def close(self):
+        raise NotImplementedError
+
+    def acquire(self):
+        # Context manager asíncrono que entrega una BackendConnection
+        raise NotImplementedError
+
+    def is_transient(self, error: Exception) -> bool:
+        """
+        Indica si el error es de conectividad (reintentar más tarde) y no de la sentencia o de sus datos.
+        """
+        return isinstance(error, (OSError, asyncio.TimeoutError))
+
+    async def _wait_for(self, awaitable):
+        # Espera una conexión con timeout y registra el tiempo de adquisición
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(awaitable, timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.stats["acquire_timeouts"] += 1
+            self.metrics.observe_acquire(time.perf_counter() - start, timeout=True)
+            raise TimeoutError(f"Timed out after {self.acquire_timeout}s waiting for a database connection")
+        wait = time.perf_counter() - start
+        self.metrics.observe_acquire(wait)
+        self.stats["acquired"] += 1
+        self.stats["acquire_wait_total"] += wait
+        self.stats["acquire_wait_max"] = max(self.stats["acquire_wait_max"], wait)
+        return result
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        acquired = stats["acquired"]
+        stats["backend"] = self.dialect
+        stats["acquire_wait_avg"] = stats["acquire_wait_total"] / acquired if acquired else 0.0
+        return stats
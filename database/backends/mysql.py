@@ -0,0 +1,149 @@
+import asyncio
+import os
+import time
+import logging
+from contextlib import asynccontextmanager
+import aiomysql
+from database.backends.base import BackendConnection, DatabaseBackend, ExecuteResult
+from database.metrics import QueryMetrics
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Códigos de error de conexión, bloqueo y sobrecarga; el resto se atribuye a la sentencia o a sus datos
+TRANSIENT_ERROR_CODES = {1040, 1053, 1205, 1213, 2002, 2003, 2006, 2013, 2055}
+
+class MySQLConnection(BackendConnection):
+    def __init__(self, connection):
+        self.connection = connection
+
+    async def begin(self):
+        await self.connection.begin()
+
+    async def commit(self):
+        await self.connection.commit()
+
+    async def rollback(self):
+        await self.connection.rollback()
+
+    async def execute(self, sql, param=None) -> ExecuteResult:
+        async with self.connection.cursor() as cursor:
+            await cursor.execute(sql, param)
+            return ExecuteResult(cursor.lastrowid, cursor.rowcount)
+
+    async def executemany(self, sql, params) -> int:
+        async with self.connection.cursor() as cursor:
+            await cursor.executemany(sql, params)
+            return cursor.rowcount
+
+    async def fetch_all(self, sql, param=None) -> list:
+        async with self.connection.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(sql, param)
+            return await cursor.fetchall()
+
+    async def stream(self, sql, param=None, chunk_size=1000, as_dict=False):
+        # Cursor del lado del servidor: las filas se leen por bloques sin cargar todo el resultado
+        cursor_class = aiomysql.SSDictCursor if as_dict else aiomysql.SSCursor
+        async with self.connection.cursor(cursor_class) as cursor:
+            await cursor.execute(sql, param)
+            while True:
+                rows = await cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+
+class MySQLBackend(DatabaseBackend):
+    dialect = "mysql"
+
+    def __init__(self, metrics: QueryMetrics, acquire_timeout: float):
+        super().__init__(metrics, acquire_timeout)
+        self.host = os.getenv("DATABASE_HOST")
+        self.user = os.getenv("DATABASE_USERNAME")
+        self.password = os.getenv("DATABASE_PASSWORD")
+        self.database = os.getenv("DATABASE")
+        self.port = int(os.getenv("DATABASE_PORT"))
+        if not self.host:
+            raise EnvironmentError("DATABASE_HOST environment variable not found")
+        if not self.user:
+            raise EnvironmentError("DATABASE_USERNAME environment variable not found")
+        if not self.password:
+            raise EnvironmentError("DATABASE_PASSWORD environment variable not found")
+        if not self.database:
+            raise EnvironmentError("DATABASE environment variable not found")
+
+        # Configuración del pool de conexiones
+        self.pool_min_size = int(os.getenv("DATABASE_POOL_MIN_SIZE", "1"))
+        self.pool_max_size = int(os.getenv("DATABASE_POOL_MAX_SIZE", "5"))
+        self.pool_recycle = int(os.getenv("DATABASE_POOL_RECYCLE", "3600"))
+        self.ping_interval = float(os.getenv("DATABASE_POOL_PING_INTERVAL", "30"))
+
+        self.pool = None
+        self._pool_lock = asyncio.Lock()
+        self._last_used = {}
+
+    async def connect(self):
+        async with self._pool_lock:
+            if self.pool is not None:
+                return
+            self.pool = await aiomysql.create_pool(
+                host=self.host,
+                port=self.port,
+                user=self.user,
+                password=self.password,
+                db=self.database,
+                minsize=self.pool_min_size,
+                maxsize=self.pool_max_size,
+                pool_recycle=self.pool_recycle,
+                autocommit=True
+            )
+            logger.info(f"Database pool created (min={self.pool_min_size}, max={self.pool_max_size}).")
+
+    async def close(self):
+        if self.pool is None:
+            return
+        self.pool.close()
+        await self.pool.wait_closed()
+        self.pool = None
+        self._last_used.clear()
+        logger.info("Database pool closed.")
+
+    @asynccontextmanager
+    async def acquire(self):
+        # El pool se crea en el lifespan; se crea aquí solo si se usa antes (scripts, pruebas)
+        if self.pool is None:
+            await self.connect()
+
+        connection = await self._wait_for(self.pool.acquire())
+        try:
+            await self._check_connection(connection)
+            yield MySQLConnection(connection)
+        finally:
+            self._last_used[id(connection)] = time.monotonic()
+            self.pool.release(connection)
+
+    def is_transient(self, error: Exception) -> bool:
+        if isinstance(error, aiomysql.InterfaceError):
+            return True
+        if isinstance(error, aiomysql.OperationalError):
+            return bool(error.args) and error.args[0] in TRANSIENT_ERROR_CODES
+        return super().is_transient(error)
+
+    async def _check_connection(self, connection):
+        # Solo se hace ping a conexiones que llevan tiempo inactivas
+        last_used = self._last_used.get(id(connection))
+        if last_used is not None and time.monotonic() - last_used < self.ping_interval:
+            return
+        try:
+            await connection.ping(reconnect=True)
+        except Exception:
+            self.stats["health_check_failures"] += 1
+            raise
+
+    def get_stats(self) -> dict:
+        stats = super().get_stats()
+        if self.pool is not None:
+            stats["size"] = self.pool.size
+            stats["free"] = self.pool.freesize
+            stats["minsize"] = self.pool.minsize
+            stats["maxsize"] = self.pool.maxsize
+        return stats
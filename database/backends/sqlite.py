@@ -0,0 +1,247 @@
+import asyncio
+import os
+import re
+import sqlite3
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from functools import partial
+from database.backends.base import BackendConnection, DatabaseBackend, ExecuteResult
+from database.metrics import QueryMetrics
+from database.schema import SQLITE_SCHEMA
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Columnas espaciales de MySQL; en SQLite se guardan como pares <columna>_lon / <columna>_lat
+GEOMETRY_COLUMNS = {
+    "init_travels": ("start_coordinates",),
+    "travels": ("start_coordinates", "end_coordinates"),
+    "travels_location": ("travel_coordinates",),
+    "crashes": ("crash_coordinates",),
+    "geolocation": ("coordinates",),
+}
+
+# Mensajes de sqlite3.OperationalError que no dependen de la sentencia ("no such table" sí depende)
+TRANSIENT_ERRORS = ("database is locked", "unable to open", "disk i/o error", "database or disk is full")
+
+_INSERT = re.compile(r"^\s*INSERT\s+INTO\s+(\w+)\s*\(([^)]*)\)\s*VALUES\s*\((.*)\)([^)]*)$", re.IGNORECASE | re.DOTALL)
+_GEOM_PLACEHOLDER = re.compile(r"^\s*ST_GeomFromText\(\s*%s\s*\)\s*$", re.IGNORECASE)
+_SELECT_LIST = re.compile(r"^(\s*(?:EXPLAIN\s+QUERY\s+PLAN\s+)?SELECT\s+)(.*?)(\s+FROM\s+.*)$", re.IGNORECASE | re.DOTALL)
+_POINT = re.compile(r"^\s*POINT\s*\(\s*([-+\d.eE]+)[\s,]+([-+\d.eE]+)\s*\)\s*$", re.IGNORECASE)
+
+_ALL_GEOMETRY = sorted({column for columns in GEOMETRY_COLUMNS.values() for column in columns})
+_ST_XY = re.compile(r"ST_([XY])\(\s*(" + "|".join(_ALL_GEOMETRY) + r")\s*\)", re.IGNORECASE)
+_BARE_GEOMETRY = re.compile(r"\b(" + "|".join(_ALL_GEOMETRY) + r")\b")
+
+def _adapt_datetime(value: datetime) -> str:
+    return value.isoformat(" ")
+
+def _convert_timestamp(value: bytes) -> datetime:
+    return datetime.fromisoformat(value.decode())
+
+def _convert_date(value: bytes) -> date:
+    return datetime.fromisoformat(value.decode()).date()
+
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_converter("TIMESTAMP", _convert_timestamp)
+sqlite3.register_converter("DATE", _convert_date)
+
+def parse_point(wkt):
+    # "POINT(lon lat)" -> (lon, lat); cualquier otro valor se guarda como NULL
+    match = _POINT.match(wkt) if isinstance(wkt, str) else None
+    if not match:
+        return None, None
+    return float(match.group(1)), float(match.group(2))
+
+def point_wkt(lon, lat):
+    if lon is None or lat is None:
+        return None
+    return f"POINT({lon} {lat})"
+
+def _split_top_level(text: str) -> list:
+    # Separa por comas que no estén dentro de paréntesis
+    parts, depth, current = [], 0, []
+    for char in text:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return parts
+
+def translate(sql: str):
+    """
+    Traduce una sentencia escrita para MySQL al dialecto de SQLite.
+    Devuelve (sql, indices) donde indices son las posiciones de los parámetros
+    WKT que deben expandirse a (lon, lat).
+    """
+    point_params = []
+    insert = _INSERT.match(sql)
+    if insert and insert.group(1) in GEOMETRY_COLUMNS:
+        table, columns, values, tail = insert.groups()
+        geometry = GEOMETRY_COLUMNS[table]
+        columns = [c.strip() for c in columns.split(",")]
+        values = _split_top_level(values)
+        new_columns, new_values, param_index = [], [], 0
+        for column, value in zip(columns, values):
+            if column in geometry and _GEOM_PLACEHOLDER.match(value):
+                new_columns += [f"{column}_lon", f"{column}_lat"]
+                new_values += ["%s", "%s"]
+                point_params.append(param_index)
+            else:
+                new_columns.append(column)
+                new_values.append(value.strip())
+            param_index += value.count("%s")
+        sql = f"INSERT INTO {table} ({', '.join(new_columns)}) VALUES ({', '.join(new_values)}){tail}"
+    else:
+        sql = _ST_XY.sub(lambda m: f"{m.group(2)}_{'lon' if m.group(1).upper() == 'X' else 'lat'}", sql)
+        select = _SELECT_LIST.match(sql)
+        if select:
+            head, select_list, rest = select.groups()
+            select_list = _BARE_GEOMETRY.sub(lambda m: f"point_wkt({m.group(1)}_lon, {m.group(1)}_lat) AS {m.group(1)}", select_list)
+            sql = head + select_list + rest
+    return sql.replace("%s", "?"), tuple(point_params)
+
+class SQLiteConnection(BackendConnection):
+    def __init__(self, backend: "SQLiteBackend"):
+        self.backend = backend
+
+    def _prepare(self, sql, param):
+        sql, point_params = self.backend.translate(sql)
+        if param is None:
+            return sql, ()
+        if not point_params:
+            return sql, tuple(param)
+        expanded = []
+        for index, value in enumerate(param):
+            if index in point_params:
+                expanded.extend(parse_point(value))
+            else:
+                expanded.append(value)
+        return sql, tuple(expanded)
+
+    async def begin(self):
+        await self.backend.run(self.backend.connection.execute, "BEGIN")
+
+    async def commit(self):
+        await self.backend.run(self.backend.connection.execute, "COMMIT")
+
+    async def rollback(self):
+        if self.backend.connection.in_transaction:
+            await self.backend.run(self.backend.connection.execute, "ROLLBACK")
+
+    async def execute(self, sql, param=None) -> ExecuteResult:
+        sql, param = self._prepare(sql, param)
+        cursor = await self.backend.run(self.backend.connection.execute, sql, param)
+        return ExecuteResult(cursor.lastrowid, cursor.rowcount)
+
+    async def executemany(self, sql, params) -> int:
+        translated, point_params = self.backend.translate(sql)
+        rows = [self._prepare(sql, row)[1] for row in params] if point_params else [tuple(row) for row in params]
+        cursor = await self.backend.run(self.backend.connection.executemany, translated, rows)
+        return cursor.rowcount
+
+    async def fetch_all(self, sql, param=None) -> list:
+        sql, param = self._prepare(sql, param)
+        return await self.backend.run(self.backend.fetch_dicts, sql, param)
+
+    async def stream(self, sql, param=None, chunk_size=1000, as_dict=False):
+        sql, param = self._prepare(sql, param)
+        cursor = await self.backend.run(self.backend.connection.execute, sql, param)
+        columns = [d[0] for d in cursor.description]
+        try:
+            while True:
+                rows = await self.backend.run(cursor.fetchmany, chunk_size)
+                if not rows:
+                    break
+                yield [dict(zip(columns, row)) for row in rows] if as_dict else rows
+        finally:
+            await self.backend.run(cursor.close)
+
+class SQLiteBackend(DatabaseBackend):
+    """
+    Base de datos embebida para kits sin servidor MySQL. Una sola conexión en modo WAL,
+    usada siempre desde el mismo hilo; las coordenadas se guardan como pares REAL.
+    """
+
+    dialect = "sqlite"
+
+    def __init__(self, metrics: QueryMetrics, acquire_timeout: float):
+        super().__init__(metrics, acquire_timeout)
+        self.path = os.getenv("DATABASE_SQLITE_PATH", "taxitracker.db")
+        self.connection = None
+        self.executor = None
+        self._lock = asyncio.Lock()
+        self._translations = {}
+
+    async def run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, partial(function, *args))
+
+    def translate(self, sql: str):
+        translated = self._translations.get(sql)
+        if translated is None:
+            translated = self._translations[sql] = translate(sql)
+        return translated
+
+    def _open(self):
+        connection = sqlite3.connect(self.path, detect_types=sqlite3.PARSE_DECLTYPES, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA busy_timeout=5000")
+        connection.create_function("point_wkt", 2, point_wkt, deterministic=True)
+        connection.executescript(SQLITE_SCHEMA)
+        return connection
+
+    def fetch_dicts(self, sql, param):
+        cursor = self.connection.execute(sql, param)
+        columns = [d[0] for d in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    async def connect(self):
+        if self.connection is not None:
+            return
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self.connection = await self.run(self._open)
+        logger.info(f"SQLite database opened at {self.path} (WAL).")
+
+    async def close(self):
+        if self.connection is None:
+            return
+        async with self._lock:
+            await self.run(self.connection.close)
+            self.connection = None
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        logger.info("SQLite database closed.")
+
+    @asynccontextmanager
+    async def acquire(self):
+        if self.connection is None:
+            await self.connect()
+        # Una sola conexión: el lock serializa transacciones y sentencias
+        await self._wait_for(self._lock.acquire())
+        try:
+            yield SQLiteConnection(self)
+        finally:
+            self._lock.release()
+
+    def is_transient(self, error: Exception) -> bool:
+        if isinstance(error, sqlite3.OperationalError):
+            message = str(error).lower()
+            return any(text in message for text in TRANSIENT_ERRORS)
+        return super().is_transient(error)
+
+    def get_stats(self) -> dict:
+        stats = super().get_stats()
+        stats["path"] = self.path
+        stats["size"] = 1 if self.connection is not None else 0
+        stats["free"] = 0 if self._lock.locked() else stats["size"]
+        return stats
@@ -0,0 +1,219 @@
+import asyncio
+import os
+import time
+import logging
+from dotenv import load_dotenv
+from database.connector import DatabaseConnector, database_connector
+from database.outbox import Outbox, outbox
+
+load_dotenv('local.env')
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Sentencias de inserción por tabla; cada fila agregada debe respetar el orden de columnas
+BATCH_TABLES = {
+    "acceleration": """
+        INSERT INTO acceleration (kit_id, driver_id, date, data_acceleration, data_deceleration, inclination_angle, angular_velocity, g_force_x, g_force_y)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """,
+    "vibrations": """
+        INSERT INTO vibrations (kit_id, driver_id, date, data_vibration)
+        VALUES (%s, %s, %s, %s)
+    """,
+    "sensor_window_summaries": """
+        INSERT INTO sensor_window_summaries (kit_id, driver_id, window_start, window_end, window_mode, sample_count, harsh_events, metrics, events)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """,
+    "crashes": """
+        INSERT INTO crashes (kit_id, driver_id, crash_date, impact_g_force, crash_coordinates)
+        VALUES (%s, %s, %s, %s, ST_GeomFromText(%s))
+    """,
+    "travels_location": """
+        INSERT INTO travels_location (travel_id, travel_coordinates, travel_datetime)
+        VALUES (%s, ST_GeomFromText(%s), %s)
+    """,
+}
+
+class BatchWriter:
+    """
+    Buffer write-behind: acumula filas por tabla y las inserta con executemany
+    en una sola transacción cuando se alcanza el número de filas o la antigüedad máxima.
+    """
+
+    def __init__(self, database: DatabaseConnector, outbox: Outbox = None, tables: dict = None):
+        self.database = database
+        # Si la base de datos no responde, los lotes se guardan en el outbox en lugar de reintentarse en memoria
+        self.outbox = outbox
+        self.tables = tables or BATCH_TABLES
+        self.default_size = int(os.getenv("DATABASE_BATCH_SIZE", "50"))
+        self.default_max_age = float(os.getenv("DATABASE_BATCH_MAX_AGE", "5"))
+        self.max_buffered = int(os.getenv("DATABASE_BATCH_MAX_BUFFERED", "10000"))
+        # Tamaños y antigüedades por tabla, p. ej. DATABASE_BATCH_ACCELERATION_SIZE=200
+        self.flush_sizes = {
+            table: int(os.getenv(f"DATABASE_BATCH_{table.upper()}_SIZE", self.default_size))
+            for table in self.tables
+        }
+        self.max_ages = {
+            table: float(os.getenv(f"DATABASE_BATCH_{table.upper()}_MAX_AGE", self.default_max_age))
+            for table in self.tables
+        }
+        self.buffers = {table: [] for table in self.tables}
+        self.first_row_at = {table: None for table in self.tables}
+        self.stats = {"rows_added": 0, "rows_flushed": 0, "rows_deferred": 0, "rows_dropped": 0, "flushes": 0, "flush_errors": 0}
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = None
+        self._task = None
+        self.running = False
+
+    def add(self, table: str, row: tuple):
+        if table not in self.buffers:
+            raise ValueError(f"Table {table} is not configured for batch inserts")
+        buffer = self.buffers[table]
+        if not buffer:
+            self.first_row_at[table] = time.monotonic()
+        buffer.append(row)
+        self.stats["rows_added"] += 1
+
+        if len(buffer) > self.max_buffered:
+            # La base de datos no está drenando; se descartan las filas más antiguas
+            del buffer[0]
+            self.stats["rows_dropped"] += 1
+
+        if len(buffer) >= self.flush_sizes[table] and self._wakeup is not None:
+            self._wakeup.set()
+
+    def pending(self) -> dict:
+        return {table: len(rows) for table, rows in self.buffers.items()}
+
+    def _due_tables(self, now: float) -> list:
+        due = []
+        for table, rows in self.buffers.items():
+            if not rows:
+                continue
+            if len(rows) >= self.flush_sizes[table] or now - self.first_row_at[table] >= self.max_ages[table]:
+                due.append(table)
+        return due
+
+    async def flush(self, tables: list = None):
+        async with self._flush_lock:
+            tables = [t for t in (tables or list(self.buffers)) if self.buffers[t]]
+            if not tables:
+                return 0
+
+            batches = {}
+            for table in tables:
+                batches[table] = self.buffers[table]
+                self.buffers[table] = []
+                self.first_row_at[table] = None
+
+            deferred = {}
+            if self.outbox is not None:
+                deferred = {t: rows for t, rows in batches.items() if self.outbox.should_defer(t)}
+                batches = {t: rows for t, rows in batches.items() if t not in deferred}
+
+            flushed = 0
+            if batches:
+                try:
+                    await self.database.query_post_many(
+                        [(self.tables[table], rows) for table, rows in batches.items()]
+                    )
+                    flushed = sum(len(rows) for rows in batches.values())
+                    self.stats["flushes"] += 1
+                    self.stats["rows_flushed"] += flushed
+                except Exception as e:
+                    self.stats["flush_errors"] += 1
+                    logger.error(f"Error flushing batch for {list(batches)}: {e}")
+                    if self.database.is_transient(e):
+                        if self.outbox is None:
+                            self._requeue(batches)
+                        else:
+                            self.outbox.mark_unavailable()
+                            deferred.update(batches)
+                    else:
+                        # La base responde pero rechaza el lote: cada tabla por separado para no arrastrar a las demás
+                        written, failed = await self._flush_tables(batches)
+                        flushed += written
+                        if self.outbox is not None:
+                            # El outbox las reintenta y las aparta tras DATABASE_OUTBOX_MAX_ATTEMPTS rechazos
+                            deferred.update(failed)
+                        else:
+                            # Sin outbox, reintentarlas en memoria bloquearía la tabla para siempre
+                            for table, rows in failed.items():
+                                self.stats["rows_dropped"] += len(rows)
+                                logger.error(f"Dropping {len(rows)} rows of {table} rejected by the database")
+
+            for table, rows in deferred.items():
+                try:
+                    await self.outbox.defer(table, self.tables[table], rows)
+                    self.stats["rows_deferred"] += len(rows)
+                except Exception as e:
+                    logger.error(f"Error deferring {len(rows)} rows of {table} to the outbox: {e}")
+                    self._requeue({table: rows})
+            return flushed
+
+    async def _flush_tables(self, batches: dict):
+        # Una transacción por tabla. Devuelve (filas escritas, {tabla: filas que fallaron})
+        written, failed = 0, {}
+        for table, rows in batches.items():
+            try:
+                await self.database.query_post_many([(self.tables[table], rows)])
+            except Exception as e:
+                logger.error(f"Error flushing {len(rows)} rows of {table}: {e}")
+                transient = self.database.is_transient(e)
+                if transient and self.outbox is None:
+                    self._requeue({table: rows})
+                    continue
+                if transient:
+                    self.outbox.mark_unavailable()
+                failed[table] = rows
+                continue
+            written += len(rows)
+            self.stats["rows_flushed"] += len(rows)
+        return written, failed
+
+    def _requeue(self, batches: dict):
+        # Se devuelven las filas al frente del buffer para reintentar en el siguiente flush
+        for table, rows in batches.items():
+            merged = rows + self.buffers[table]
+            overflow = len(merged) - self.max_buffered
+            if overflow > 0:
+                del merged[:overflow]
+                self.stats["rows_dropped"] += overflow
+            self.buffers[table] = merged
+            if merged:
+                self.first_row_at[table] = time.monotonic()
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self.running = True
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Batch writer started.")
+
+    async def _run(self):
+        tick = min(self.max_ages.values()) / 2 if self.max_ages else 1
+        while self.running:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=tick)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            due = self._due_tables(time.monotonic())
+            if due:
+                await self.flush(due)
+
+    async def close(self):
+        # Drena todas las filas pendientes antes de cerrar el pool
+        self.running = False
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        if any(self.buffers.values()):
+            logger.error(f"Batch writer closed with unflushed rows: {self.pending()}")
+        logger.info("Batch writer stopped.")
+
+batch_writer = BatchWriter(database_connector, outbox)
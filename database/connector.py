@@ -1,91 +1,154 @@
-import aiomysql
-import asyncio
+import logging
+from contextlib import aclosing, asynccontextmanager
 from typing import Tuple, Any
 from fastapi import HTTPException, status
 import os
 from dotenv import load_dotenv
+from database.metrics import QueryMetrics, query_metrics
+from database.backends import BackendConnection, create_backend
 
-load_dotenv('local.env') 
+load_dotenv('local.env')
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class UnitOfWork:
+    """
+    Agrupa varias sentencias sobre una misma conexión y transacción.
+    Se obtiene con DatabaseConnector.transaction(); el commit se hace una sola vez al salir.
+    """
+
+    def __init__(self, connection: BackendConnection, metrics: QueryMetrics):
+        self.connection = connection
+        self.metrics = metrics
+
+    async def execute(self, sql, param=None):
+        with self.metrics.track(sql) as tracked:
+            result = await self.connection.execute(sql, param)
+            tracked["rows"] = result.rowcount
+            return result.lastrowid
+
+    async def executemany(self, sql, params):
+        with self.metrics.track(sql) as tracked:
+            rowcount = await self.connection.executemany(sql, params)
+            tracked["rows"] = rowcount
+            return rowcount
+
+    async def fetch_all(self, sql, param=None):
+        with self.metrics.track(sql) as tracked:
+            result = await self.connection.fetch_all(sql, param)
+            tracked["rows"] = len(result)
+            return result
 
 class DatabaseConnector:
-    def __init__(self):
-        self.host = os.getenv("DATABASE_HOST")
-        self.user = os.getenv("DATABASE_USERNAME")
-        self.password = os.getenv("DATABASE_PASSWORD")
-        self.database = os.getenv("DATABASE")
-        self.port = int(os.getenv("DATABASE_PORT"))
-        if not self.host:
-            raise EnvironmentError("DATABASE_HOST environment variable not found")
-        if not self.user:
-            raise EnvironmentError("DATABASE_USERNAME environment variable not found")
-        if not self.password:
-            raise EnvironmentError("DATABASE_PASSWORD environment variable not found")
-        if not self.database:
-            raise EnvironmentError("DATABASE environment variable not found")
-
-    async def get_connection(self):
-        return await aiomysql.connect(
-            host=self.host,
-            port=self.port,
-            user=self.user,
-            password=self.password,
-            db=self.database,
-            loop=asyncio.get_event_loop(),
-            autocommit=True
-        )
+    def __init__(self, metrics: QueryMetrics = query_metrics, backend: str = None):
+        # DATABASE_BACKEND=mysql (servidor) o sqlite (embebida, para kits sin MySQL)
+        self.backend_name = (backend or os.getenv("DATABASE_BACKEND", "mysql")).lower()
+        self.acquire_timeout = float(os.getenv("DATABASE_POOL_ACQUIRE_TIMEOUT", "5"))
+        self.metrics = metrics
+        self.backend = create_backend(self.backend_name, metrics, self.acquire_timeout)
+
+    @property
+    def dialect(self) -> str:
+        return self.backend.dialect
+
+    async def connect(self):
+        await self.backend.connect()
+
+    async def close(self):
+        await self.backend.close()
+
+    def acquire(self):
+        return self.backend.acquire()
+
+    def get_pool_stats(self) -> dict:
+        return self.backend.get_stats()
+
+    def is_transient(self, error: Exception) -> bool:
+        # Las consultas envuelven los errores en HTTPException; se clasifica la causa original
+        if isinstance(error, HTTPException) and error.__cause__ is not None:
+            error = error.__cause__
+        return self.backend.is_transient(error)
 
     async def query_get(self, sql, param=None):
         try:
-            connection = await self.get_connection()
-            async with connection.cursor(aiomysql.DictCursor) as cursor:
-                await cursor.execute(sql, param)
-                result = await cursor.fetchall()
-            connection.close()
-            return result
+            async with self.acquire() as connection:
+                return await UnitOfWork(connection, self.metrics).fetch_all(sql, param)
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Database error: " + str(e),
-            )
+            ) from e
 
     async def query_post(self, sql, param):
         try:
-            connection = await self.get_connection()
-            async with connection.cursor() as cursor:
-                await cursor.execute(sql, param)
-                result = cursor.lastrowid
-            connection.close()
-            return result
+            async with self.acquire() as connection:
+                return await UnitOfWork(connection, self.metrics).execute(sql, param)
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Database error: " + str(e),
-            )
+            ) from e
 
-    async def query_post_travel(self, travel_data: Tuple[Any, ...]) -> int:
+    @asynccontextmanager
+    async def transaction(self):
+        try:
+            async with self.acquire() as connection:
+                await connection.begin()
+                try:
+                    yield UnitOfWork(connection, self.metrics)
+                    await connection.commit()
+                except BaseException:
+                    await connection.rollback()
+                    raise
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error: " + str(e),
+            ) from e
+
+    async def query_stream(self, sql, param=None, chunk_size=1000, as_dict=False):
+        # Las filas se leen por bloques sin cargar todo el resultado en memoria
         try:
-            connection = await self.get_connection()
-            async with connection.cursor() as cursor:
-                # Insertar el viaje
-                await cursor.execute("""
-                    INSERT INTO travels (driver_id, date, start_hour, end_hour, start_coordinates, end_coordinates)
-                    VALUES (%s, %s, %s, %s, ST_GeomFromText(%s), ST_GeomFromText(%s))
-                    RETURNING id;
-                """, travel_data)
-                
-                new_travel_id = await cursor.fetchone()
-                
-                # Actualizar travels_location
-                await cursor.execute("""
-                    UPDATE travels_location
-                    SET travel_id = %s
-                    WHERE travel_id = 9999;
-                """, (new_travel_id,))
-                
-                connection.close()
-                return new_travel_id
+            async with self.acquire() as connection:
+                with self.metrics.track(sql) as tracked:
+                    # aclosing: el cursor se cierra antes de devolver la conexión
+                    async with aclosing(connection.stream(sql, param, chunk_size, as_dict)) as chunks:
+                        async for rows in chunks:
+                            tracked["rows"] += len(rows)
+                            yield rows
+        except GeneratorExit:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Database error: " + str(e),
-            )
+            ) from e
+
+    async def query_post_many(self, statements):
+        # Ejecuta varias sentencias executemany en una sola transacción
+        async with self.transaction() as unit:
+            for sql, params in statements:
+                await unit.executemany(sql, params)
+
+    async def query_post_travel(self, travel_data: Tuple[Any, ...]) -> int:
+        async with self.transaction() as unit:
+            # Insertar el viaje
+            new_travel_id = await unit.execute("""
+                INSERT INTO travels (driver_id, date, start_hour, end_hour, start_coordinates, end_coordinates)
+                VALUES (%s, %s, %s, %s, ST_GeomFromText(%s), ST_GeomFromText(%s));
+            """, travel_data)
+
+            # Actualizar travels_location
+            await unit.execute("""
+                UPDATE travels_location
+                SET travel_id = %s
+                WHERE travel_id = 9999;
+            """, (new_travel_id,))
+
+            return new_travel_id
+
+# Conector compartido; el pool se abre y se cierra en main.lifespan
+database_connector = DatabaseConnector()
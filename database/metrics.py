@@ -0,0 +1,156 @@
+import re
+import time
+import threading
+from contextlib import contextmanager
+
+# Máximo de textos SQL distintos cuya normalización se guarda en caché
+MAX_NORMALIZED_CACHE = 1024
+
+# Límites superiores de los buckets del histograma, en milisegundos
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|%\(\w+\)s")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_sql(sql: str) -> str:
+    # Agrupa sentencias equivalentes: sin literales ni espacios redundantes
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    return _WHITESPACE.sub(" ", sql).strip().rstrip(";").strip()
+
+class LatencyHistogram:
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        index = len(LATENCY_BUCKETS_MS)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if ms <= bound:
+                index = i
+                break
+        self.buckets[index] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, fraction: float) -> float:
+        # Aproximación: límite superior del bucket que contiene el percentil, sin pasar del máximo observado
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= target:
+                return min(float(LATENCY_BUCKETS_MS[i]), self.max_ms) if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        labels = [f"le_{bound}ms" for bound in LATENCY_BUCKETS_MS] + ["le_inf"]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": round(self.percentile(0.50), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "p99_ms": round(self.percentile(0.99), 3),
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+class StatementStats:
+    def __init__(self, statement: str):
+        self.statement = statement
+        self.latency = LatencyHistogram()
+        self.rows = 0
+        self.errors = 0
+
+    def to_dict(self) -> dict:
+        data = {"statement": self.statement, "rows": self.rows, "errors": self.errors}
+        data.update(self.latency.to_dict())
+        return data
+
+class QueryMetrics:
+    """
+    Registro en proceso de latencias por sentencia SQL normalizada,
+    filas devueltas/afectadas, tiempo de adquisición de conexión y errores.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._statements = {}
+        self._normalized = {}
+        self.acquire_latency = LatencyHistogram()
+        self.acquire_timeouts = 0
+
+    def _stats_for(self, sql: str) -> StatementStats:
+        key = self._normalized.get(sql)
+        if key is None:
+            key = normalize_sql(sql)
+            if len(self._normalized) >= MAX_NORMALIZED_CACHE:
+                self._normalized.clear()
+            self._normalized[sql] = key
+        stats = self._statements.get(key)
+        if stats is None:
+            stats = self._statements[key] = StatementStats(key)
+        return stats
+
+    def observe(self, sql: str, seconds: float, rows: int = 0, error: bool = False):
+        with self._lock:
+            stats = self._stats_for(sql)
+            stats.latency.observe(seconds * 1000)
+            stats.rows += max(rows or 0, 0)
+            if error:
+                stats.errors += 1
+
+    @contextmanager
+    def track(self, sql: str):
+        # Mide la sentencia; quien la ejecuta actualiza result["rows"]
+        result = {"rows": 0}
+        start = time.perf_counter()
+        try:
+            yield result
+        except GeneratorExit:
+            # El consumidor de un stream lo cerró antes de terminar; no es un error
+            self.observe(sql, time.perf_counter() - start, result["rows"])
+            raise
+        except BaseException:
+            self.observe(sql, time.perf_counter() - start, error=True)
+            raise
+        self.observe(sql, time.perf_counter() - start, result["rows"])
+
+    def observe_acquire(self, seconds: float, timeout: bool = False):
+        with self._lock:
+            if timeout:
+                self.acquire_timeouts += 1
+            else:
+                self.acquire_latency.observe(seconds * 1000)
+
+    def snapshot(self, limit: int = None) -> dict:
+        with self._lock:
+            statements = sorted(
+                (stats.to_dict() for stats in self._statements.values()),
+                key=lambda s: s["total_ms"],
+                reverse=True,
+            )
+            acquire = self.acquire_latency.to_dict()
+            acquire["timeouts"] = self.acquire_timeouts
+        return {
+            "acquire": acquire,
+            "statements": statements[:limit] if limit else statements,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._normalized.clear()
+            self.acquire_latency = LatencyHistogram()
+            self.acquire_timeouts = 0
+
+query_metrics = QueryMetrics()
@@ -0,0 +1,342 @@
+import asyncio
+import json
+import os
+import sqlite3
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+from functools import partial
+from dotenv import load_dotenv
+from database.connector import DatabaseConnector, database_connector
+
+load_dotenv('local.env')
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+OUTBOX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name TEXT NOT NULL,
+    sql TEXT NOT NULL,
+    rows TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+# Entradas que la base de datos rechazó max_attempts veces; se guardan con el error para revisarlas a mano
+DEAD_LETTER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox_dead_letter (
+    id INTEGER PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    sql TEXT NOT NULL,
+    rows TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    attempts INTEGER NOT NULL,
+    error TEXT NOT NULL
+)
+"""
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"$d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Cannot store {type(value).__name__} in the outbox")
+
+def _decode(obj):
+    if "$dt" in obj:
+        return datetime.fromisoformat(obj["$dt"])
+    if "$d" in obj:
+        return date.fromisoformat(obj["$d"])
+    return obj
+
+class Outbox:
+    """
+    Outbox local y durable (SQLite, solo anexar) para escrituras que no pudieron llegar a la base de datos.
+    Una tarea en segundo plano las reenvía por lotes, en orden de llegada y con límite de filas por segundo.
+
+    Un error de conectividad detiene el reenvío hasta el siguiente intento. Si la base responde pero rechaza
+    el lote, se reenvía entrada por entrada: la que falla suma un intento y tras max_attempts pasa a
+    outbox_dead_letter, sin bloquear a las demás.
+    """
+
+    def __init__(self, database: DatabaseConnector):
+        self.database = database
+        self.path = os.getenv("DATABASE_OUTBOX_PATH", "outbox.db")
+        self.max_bytes = int(os.getenv("DATABASE_OUTBOX_MAX_BYTES", str(50 * 1024 * 1024)))
+        self.replay_batch = int(os.getenv("DATABASE_OUTBOX_REPLAY_BATCH", "500"))
+        self.replay_rate = float(os.getenv("DATABASE_OUTBOX_REPLAY_RATE", "2000"))
+        self.retry_interval = float(os.getenv("DATABASE_OUTBOX_RETRY_INTERVAL", "5"))
+        self.max_attempts = int(os.getenv("DATABASE_OUTBOX_MAX_ATTEMPTS", "10"))
+        self.connection = None
+        self.executor = None
+        self.available = True
+        self.pending_rows = {}
+        self.pending_bytes = 0
+        # Ids del lote que se está reenviando; _trim no los descarta
+        self.replaying = set()
+        self.stats = {
+            "rows_deferred": 0, "rows_replayed": 0, "rows_dropped": 0, "rows_dead_lettered": 0,
+            "replay_errors": 0, "statement_errors": 0,
+        }
+        self._wakeup = None
+        self._task = None
+        self.running = False
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, partial(function, *args))
+
+    def _open(self):
+        connection = sqlite3.connect(self.path, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(OUTBOX_SCHEMA)
+        connection.execute(DEAD_LETTER_SCHEMA)
+        # Outbox creado antes de contar los intentos
+        if "attempts" not in {column[1] for column in connection.execute("PRAGMA table_info(outbox)")}:
+            connection.execute("ALTER TABLE outbox ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+        return connection
+
+    def _load_pending(self):
+        pending = {}
+        for table, rows in self.connection.execute("SELECT table_name, SUM(row_count) FROM outbox GROUP BY table_name"):
+            pending[table] = rows
+        total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM outbox").fetchone()[0]
+        return pending, total
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outbox")
+        self.connection = await self._run(self._open)
+        self.pending_rows, self.pending_bytes = await self._run(self._load_pending)
+        if self.has_pending():
+            # Lo que quedó de una ejecución anterior se reenvía antes que las filas nuevas
+            self.available = False
+            logger.info(f"Outbox has pending rows from a previous run: {self.pending_rows}")
+        self.running = True
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._replay_loop())
+        logger.info(f"Outbox started at {self.path}.")
+
+    async def close(self):
+        self.running = False
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        if self.connection is not None:
+            await self._run(self.connection.close)
+            self.connection = None
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        logger.info("Outbox stopped.")
+
+    def has_pending(self, table: str = None) -> bool:
+        if table is None:
+            return any(self.pending_rows.values())
+        return self.pending_rows.get(table, 0) > 0
+
+    def should_defer(self, table: str) -> bool:
+        # Si hay filas anteriores de la tabla en el outbox, las nuevas van detrás para no romper el orden
+        return self.connection is not None and (not self.available or self.has_pending(table))
+
+    def _append(self, table, sql, rows):
+        payload = json.dumps(rows, default=_encode)
+        size = len(payload) + len(sql)
+        self.connection.execute(
+            "INSERT INTO outbox (table_name, sql, rows, row_count, size) VALUES (?, ?, ?, ?, ?)",
+            (table, sql, payload, len(rows), size),
+        )
+        return size
+
+    def _trim(self, excess, replaying=frozenset()):
+        # Descarta las entradas más antiguas hasta volver al límite de disco, salvo las que se están reenviando
+        dropped_rows, freed = {}, 0
+        cursor = self.connection.execute("SELECT id, table_name, row_count, size FROM outbox ORDER BY id")
+        ids = []
+        for entry_id, table, row_count, size in cursor:
+            if freed >= excess:
+                break
+            if entry_id in replaying:
+                continue
+            ids.append((entry_id,))
+            dropped_rows[table] = dropped_rows.get(table, 0) + row_count
+            freed += size
+        self.connection.executemany("DELETE FROM outbox WHERE id = ?", ids)
+        return dropped_rows, freed
+
+    async def defer(self, table: str, sql: str, rows: list):
+        if self.connection is None:
+            raise RuntimeError("Outbox is not started")
+        size = await self._run(self._append, table, sql, rows)
+        self.pending_rows[table] = self.pending_rows.get(table, 0) + len(rows)
+        self.pending_bytes += size
+        self.stats["rows_deferred"] += len(rows)
+
+        if self.pending_bytes > self.max_bytes:
+            dropped_rows, freed = await self._run(
+                self._trim, self.pending_bytes - self.max_bytes, frozenset(self.replaying)
+            )
+            for dropped_table, count in dropped_rows.items():
+                self.pending_rows[dropped_table] -= count
+                self.stats["rows_dropped"] += count
+            self.pending_bytes -= freed
+            logger.warning(f"Outbox over {self.max_bytes} bytes, dropped oldest rows: {dropped_rows}")
+
+        self._wakeup.set()
+
+    def mark_unavailable(self):
+        if self.available:
+            logger.warning("Database unavailable, deferring writes to the outbox.")
+        self.available = False
+
+    def _read_batch(self):
+        # Entradas consecutivas de la misma sentencia se agrupan en un solo executemany
+        entries = self.connection.execute(
+            "SELECT id, table_name, sql, rows, size FROM outbox ORDER BY id LIMIT ?", (self.replay_batch,)
+        ).fetchall()
+        batch, total = [], 0
+        for entry_id, table, sql, rows, size in entries:
+            rows = [tuple(row) for row in json.loads(rows, object_hook=_decode)]
+            if batch and total + len(rows) > self.replay_batch:
+                break
+            batch.append((entry_id, table, sql, rows, size))
+            total += len(rows)
+        return batch
+
+    def _delete(self, ids) -> set:
+        # Devuelve los ids que seguían en el outbox: solo esos se descuentan de lo pendiente
+        deleted = set()
+        for entry_id in ids:
+            if self.connection.execute("DELETE FROM outbox WHERE id = ?", (entry_id,)).rowcount:
+                deleted.add(entry_id)
+        return deleted
+
+    def _record_failure(self, entry_id, error: str) -> int:
+        # Suma un intento; al llegar a max_attempts la entrada pasa a outbox_dead_letter. Devuelve los intentos
+        self.connection.execute("BEGIN")
+        try:
+            self.connection.execute("UPDATE outbox SET attempts = attempts + 1 WHERE id = ?", (entry_id,))
+            row = self.connection.execute("SELECT attempts FROM outbox WHERE id = ?", (entry_id,)).fetchone()
+            # Sin fila: _trim ya la descartó por espacio
+            attempts = row[0] if row else 0
+            if attempts >= self.max_attempts:
+                self.connection.execute(
+                    """
+                    INSERT INTO outbox_dead_letter (id, table_name, sql, rows, row_count, attempts, error)
+                    SELECT id, table_name, sql, rows, row_count, attempts, ? FROM outbox WHERE id = ?
+                    """,
+                    (error, entry_id),
+                )
+                self.connection.execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        return attempts
+
+    def _remove_pending(self, entries) -> int:
+        removed = 0
+        for _, table, _, rows, size in entries:
+            self.pending_rows[table] -= len(rows)
+            self.pending_bytes -= size
+            removed += len(rows)
+        return removed
+
+    async def replay_once(self) -> int:
+        batch = await self._run(self._read_batch)
+        if not batch:
+            return 0
+        self.replaying = {entry[0] for entry in batch}
+        try:
+            return await self._replay_batch(batch)
+        finally:
+            self.replaying = set()
+
+    async def _replay_batch(self, batch: list) -> int:
+        statements = []
+        for _, _, sql, rows, _ in batch:
+            if statements and statements[-1][0] == sql:
+                statements[-1][1].extend(rows)
+            else:
+                statements.append((sql, list(rows)))
+        try:
+            await self.database.query_post_many(statements)
+        except Exception as e:
+            if self.database.is_transient(e):
+                raise
+            # La base responde pero rechaza el lote: se reenvía entrada por entrada para aislar la que falla
+            return await self._replay_entries(batch)
+
+        # Entrega al menos una vez: si el proceso muere antes de borrar, el lote se reenvía
+        deleted = await self._run(self._delete, [entry[0] for entry in batch])
+        replayed = self._remove_pending([entry for entry in batch if entry[0] in deleted])
+        self.stats["rows_replayed"] += replayed
+        return replayed
+
+    async def _replay_entries(self, batch: list) -> int:
+        replayed, rejected = 0, None
+        for entry in batch:
+            entry_id, table, sql, rows, _ = entry
+            try:
+                await self.database.query_post_many([(sql, rows)])
+            except Exception as e:
+                if self.database.is_transient(e):
+                    raise
+                self.stats["statement_errors"] += 1
+                attempts = await self._run(self._record_failure, entry_id, str(e))
+                if attempts >= self.max_attempts:
+                    self.stats["rows_dead_lettered"] += self._remove_pending([entry])
+                    logger.error(f"Outbox entry {entry_id} ({len(rows)} rows of {table}) rejected {attempts} times, moved to dead letter: {e}")
+                else:
+                    rejected = rejected or e
+                continue
+            if await self._run(self._delete, [entry_id]):
+                replayed += self._remove_pending([entry])
+        self.stats["rows_replayed"] += replayed
+        if rejected is not None:
+            # Las entradas rechazadas se reintentan tras retry_interval
+            raise rejected
+        return replayed
+
+    async def _replay_loop(self):
+        while self.running:
+            if not self.has_pending():
+                self.available = True
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.retry_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                replayed = await self.replay_once()
+            except Exception as e:
+                self.stats["replay_errors"] += 1
+                if self.database.is_transient(e):
+                    self.mark_unavailable()
+                    logger.error(f"Outbox replay failed, retrying in {self.retry_interval}s: {e}")
+                else:
+                    # Un error de la sentencia o de sus datos no indica una caída de la base de datos
+                    logger.error(f"Outbox entry rejected by the database, retrying in {self.retry_interval}s: {e}")
+                await asyncio.sleep(self.retry_interval)
+                continue
+            # Límite de filas por segundo para no saturar la base de datos al reconectar
+            await asyncio.sleep(replayed / self.replay_rate if self.replay_rate > 0 else 0)
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["available"] = self.available
+        stats["pending_rows"] = dict(self.pending_rows)
+        stats["pending_bytes"] = self.pending_bytes
+        stats["max_bytes"] = self.max_bytes
+        return stats
+
+outbox = Outbox(database_connector)
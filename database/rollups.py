@@ -0,0 +1,248 @@
+import asyncio
+import math
+import os
+import time
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from database.connector import DatabaseConnector, database_connector
+
+load_dotenv('local.env')
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tablas crudas que se agregan y sus columnas numéricas
+ROLLUP_SOURCES = {
+    "acceleration": ("data_acceleration", "data_deceleration", "inclination_angle", "angular_velocity", "g_force_x", "g_force_y"),
+    "vibrations": ("data_vibration",),
+}
+
+RESOLUTIONS = {
+    "minute": ("sensor_rollups_minute", timedelta(minutes=1)),
+    "hour": ("sensor_rollups_hour", timedelta(hours=1)),
+}
+
+# Inicio del bucket por dialecto; en MySQL el % va duplicado porque la sentencia lleva parámetros
+BUCKET_EXPRESSIONS = {
+    "mysql": {
+        "minute": "DATE_FORMAT(date, '%%Y-%%m-%%d %%H:%%i:00')",
+        "hour": "DATE_FORMAT(date, '%%Y-%%m-%%d %%H:00:00')",
+    },
+    "sqlite": {
+        "minute": "strftime('%Y-%m-%d %H:%M:00', date)",
+        "hour": "strftime('%Y-%m-%d %H:00:00', date)",
+    },
+}
+
+UPSERT_CLAUSES = {
+    "mysql": """
+        ON DUPLICATE KEY UPDATE
+        sample_count = sample_count + VALUES(sample_count),
+        min_value = LEAST(min_value, VALUES(min_value)),
+        max_value = GREATEST(max_value, VALUES(max_value)),
+        sum_value = sum_value + VALUES(sum_value),
+        sum_squares = sum_squares + VALUES(sum_squares)
+    """,
+    "sqlite": """
+        ON CONFLICT (source, metric, kit_id, driver_id, bucket_start) DO UPDATE SET
+        sample_count = sample_count + excluded.sample_count,
+        min_value = MIN(min_value, excluded.min_value),
+        max_value = MAX(max_value, excluded.max_value),
+        sum_value = sum_value + excluded.sum_value,
+        sum_squares = sum_squares + excluded.sum_squares
+    """,
+}
+
+def rollup_sql(dialect: str, source: str, metric: str, resolution: str) -> str:
+    table = RESOLUTIONS[resolution][0]
+    bucket = BUCKET_EXPRESSIONS[dialect][resolution]
+    return f"""
+        INSERT INTO {table} (source, metric, kit_id, driver_id, bucket_start, sample_count, min_value, max_value, sum_value, sum_squares)
+        SELECT '{source}', '{metric}', COALESCE(kit_id, ''), COALESCE(driver_id, ''), {bucket},
+        COUNT(*), MIN({metric}), MAX({metric}), SUM({metric}), SUM({metric} * {metric})
+        FROM {source}
+        WHERE id > %s AND id <= %s AND {metric} IS NOT NULL AND date IS NOT NULL
+        GROUP BY COALESCE(kit_id, ''), COALESCE(driver_id, ''), {bucket}
+        {UPSERT_CLAUSES[dialect]}
+    """
+
+class RollupService:
+    """
+    Agrega de forma incremental las filas crudas de acceleration y vibrations en buckets
+    por minuto y por hora, por (kit_id, driver_id). Una marca de agua por tabla guarda el último id
+    procesado; cada pasada solo lee filas nuevas y el upsert fusiona las que llegan tarde (p. ej. del outbox).
+
+    InnoDB puede confirmar los ids autoincrementales fuera de orden: la marca solo avanza hasta el MAX(id)
+    observado hace al menos settle_seconds, cuando las transacciones con ids menores ya confirmaron.
+    """
+
+    def __init__(self, database: DatabaseConnector, sources: dict = None):
+        self.database = database
+        self.sources = sources or ROLLUP_SOURCES
+        self.interval = float(os.getenv("DATABASE_ROLLUP_INTERVAL", "60"))
+        self.batch_rows = int(os.getenv("DATABASE_ROLLUP_BATCH", "50000"))
+        # Los rangos más largos que esto se leen de la tabla por hora
+        self.minute_max_span = timedelta(hours=float(os.getenv("DATABASE_ROLLUP_MINUTE_MAX_HOURS", "6")))
+        self.settle_seconds = float(os.getenv("DATABASE_ROLLUP_SETTLE_SECONDS", "30"))
+        # (instante monótono, MAX(id)) por tabla, y el último MAX(id) que ya cumplió settle_seconds
+        self._observed = {source: deque() for source in self.sources}
+        self._settled = {}
+        self.stats = {"runs": 0, "rows_rolled_up": 0, "errors": 0, "last_run_ms": None}
+        self._sql = {}
+        self._wakeup = None
+        self._task = None
+        self.running = False
+
+    def _statements(self, source: str) -> list:
+        dialect = self.database.dialect
+        key = (dialect, source)
+        if key not in self._sql:
+            self._sql[key] = [
+                rollup_sql(dialect, source, metric, resolution)
+                for metric in self.sources[source]
+                for resolution in RESOLUTIONS
+            ]
+        return self._sql[key]
+
+    async def roll_up(self, source: str):
+        """
+        Procesa un lote de filas nuevas de la tabla. Devuelve (filas agregadas, quedan más pendientes).
+        """
+        # Watermark, agregación y avance de la marca en la misma transacción
+        async with self.database.transaction() as unit:
+            watermark = await unit.fetch_all(
+                "SELECT last_id FROM sensor_rollup_watermarks WHERE source = %s", (source,)
+            )
+            last_id = watermark[0]["last_id"] if watermark else 0
+            bounds = await unit.fetch_all(f"SELECT MAX(id) AS max_id FROM {source} WHERE id > %s", (last_id,))
+            max_id = self._settled_max_id(source, bounds[0]["max_id"])
+            if max_id is None or max_id <= last_id:
+                return 0, False
+            # Se acota el rango de ids para no mantener la transacción abierta mucho tiempo
+            upto = min(max_id, last_id + self.batch_rows)
+            counted = await unit.fetch_all(
+                f"SELECT COUNT(*) AS row_count FROM {source} WHERE id > %s AND id <= %s", (last_id, upto)
+            )
+
+            for sql in self._statements(source):
+                await unit.execute(sql, (last_id, upto))
+
+            if watermark:
+                await unit.execute(
+                    "UPDATE sensor_rollup_watermarks SET last_id = %s WHERE source = %s", (upto, source)
+                )
+            else:
+                await unit.execute(
+                    "INSERT INTO sensor_rollup_watermarks (source, last_id) VALUES (%s, %s)", (source, upto)
+                )
+            return counted[0]["row_count"], upto < max_id
+
+    def _settled_max_id(self, source: str, max_id) -> int:
+        # Devuelve el mayor MAX(id) observado hace al menos settle_seconds, o None
+        now = time.monotonic()
+        observed = self._observed[source]
+        if max_id is not None:
+            observed.append((now, max_id))
+        while observed and now - observed[0][0] >= self.settle_seconds:
+            self._settled[source] = observed.popleft()[1]
+        return self._settled.get(source)
+
+    async def run_once(self) -> int:
+        started = datetime.now()
+        total = 0
+        for source in self.sources:
+            # Se repite hasta alcanzar la última fila si hay más pendientes que el tamaño de lote
+            more = True
+            while more:
+                rolled, more = await self.roll_up(source)
+                total += rolled
+        self.stats["runs"] += 1
+        self.stats["rows_rolled_up"] += total
+        self.stats["last_run_ms"] = round((datetime.now() - started).total_seconds() * 1000, 3)
+        return total
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self.running = True
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Rollup service started.")
+
+    async def _run(self):
+        while self.running:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Error rolling up sensor data: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def close(self):
+        self.running = False
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        logger.info("Rollup service stopped.")
+
+    def pick_resolution(self, start: datetime, end: datetime) -> str:
+        return "minute" if end - start <= self.minute_max_span else "hour"
+
+    async def get_rollups(self, source: str, metric: str, start: datetime, end: datetime,
+                          kit_id=None, driver_id=None, resolution: str = None) -> list:
+        """
+        Devuelve los buckets de [start, end) con count/min/max/mean/stddev.
+        Si no se indica resolución se elige por la longitud del rango.
+        """
+        if metric not in self.sources.get(source, ()):
+            raise ValueError(f"No rollups for {source}.{metric}")
+        if end <= start:
+            raise ValueError("end must be after start")
+        if resolution is not None and resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution {resolution}, expected one of {sorted(RESOLUTIONS)}")
+        resolution = resolution or self.pick_resolution(start, end)
+        table = RESOLUTIONS[resolution][0]
+        sql = f"""
+            SELECT kit_id, driver_id, bucket_start, sample_count, min_value, max_value, sum_value, sum_squares
+            FROM {table}
+            WHERE source = %s AND metric = %s AND bucket_start >= %s AND bucket_start < %s
+        """
+        params = [source, metric, start, end]
+        if kit_id is not None:
+            sql += " AND kit_id = %s"
+            params.append(str(kit_id))
+        if driver_id is not None:
+            sql += " AND driver_id = %s"
+            params.append(str(driver_id))
+        sql += " ORDER BY bucket_start"
+
+        rows = await self.database.query_get(sql, tuple(params))
+        buckets = []
+        for row in rows:
+            count = row["sample_count"]
+            mean = row["sum_value"] / count
+            # Varianza poblacional a partir de la suma de cuadrados
+            variance = max(row["sum_squares"] / count - mean * mean, 0.0)
+            buckets.append({
+                "kit_id": row["kit_id"],
+                "driver_id": row["driver_id"],
+                "bucket_start": row["bucket_start"],
+                "resolution": resolution,
+                "count": count,
+                "min": row["min_value"],
+                "max": row["max_value"],
+                "mean": mean,
+                "stddev": math.sqrt(variance),
+            })
+        return buckets
+
+    def get_stats(self) -> dict:
+        return dict(self.stats)
+
+rollup_service = RollupService(database_connector)
@@ -0,0 +1,423 @@
+import asyncio
+import logging
+import os
+from dotenv import load_dotenv
+
+load_dotenv('local.env')
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tablas de MariaDB. Las columnas espaciales son NOT NULL para que admitan un índice SPATIAL.
+MYSQL_TABLES = {
+    "kit": """
+        CREATE TABLE IF NOT EXISTS kit (
+            kit_id VARCHAR(64) NOT NULL PRIMARY KEY
+        )
+    """,
+    "drivers": """
+        CREATE TABLE IF NOT EXISTS drivers (
+            id VARCHAR(64) NOT NULL PRIMARY KEY,
+            kit_id VARCHAR(64)
+        )
+    """,
+    "init_travels": """
+        CREATE TABLE IF NOT EXISTS init_travels (
+            id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            driver_id VARCHAR(64) NOT NULL,
+            date DATE,
+            start_hour DATETIME(6),
+            start_coordinates POINT
+        )
+    """,
+    "travels": """
+        CREATE TABLE IF NOT EXISTS travels (
+            id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            driver_id VARCHAR(64) NOT NULL,
+            date DATE,
+            start_hour DATETIME(6),
+            end_hour DATETIME(6),
+            start_coordinates POINT NOT NULL,
+            end_coordinates POINT,
+            duration TIME,
+            distance_mts DOUBLE
+        )
+    """,
+    "travels_location": """
+        CREATE TABLE IF NOT EXISTS travels_location (
+            id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            travel_id BIGINT NOT NULL,
+            travel_coordinates POINT NOT NULL,
+            travel_datetime DATETIME(6)
+        )
+    """,
+    "acceleration": """
+        CREATE TABLE IF NOT EXISTS acceleration (
+            id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            kit_id VARCHAR(64),
+            driver_id VARCHAR(64),
+            date DATETIME(6),
+            data_acceleration DOUBLE,
+            data_deceleration DOUBLE,
+            inclination_angle DOUBLE,
+            angular_velocity DOUBLE,
+            g_force_x DOUBLE,
+            g_force_y DOUBLE
+        )
+    """,
+    "vibrations": """
+        CREATE TABLE IF NOT EXISTS vibrations (
+            id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            kit_id VARCHAR(64),
+            driver_id VARCHAR(64),
+            date DATETIME(6),
+            data_vibration INT
+        )
+    """,
+    "crashes": """
+        CREATE TABLE IF NOT EXISTS crashes (
+            id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            kit_id VARCHAR(64),
+            driver_id VARCHAR(64),
+            crash_date DATETIME(6),
+            impact_g_force DOUBLE,
+            crash_coordinates POINT NOT NULL
+        )
+    """,
+    "geolocation": """
+        CREATE TABLE IF NOT EXISTS geolocation (
+            id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            coordinates POINT NOT NULL,
+            geo_time DATETIME(6)
+        )
+    """,
+    "sensor_rollup_watermarks": """
+        CREATE TABLE IF NOT EXISTS sensor_rollup_watermarks (
+            source VARCHAR(32) NOT NULL PRIMARY KEY,
+            last_id BIGINT NOT NULL
+        )
+    """,
+    "sensor_rollups_minute": """
+        CREATE TABLE IF NOT EXISTS sensor_rollups_minute (
+            source VARCHAR(32) NOT NULL,
+            metric VARCHAR(32) NOT NULL,
+            kit_id VARCHAR(64) NOT NULL,
+            driver_id VARCHAR(64) NOT NULL,
+            bucket_start DATETIME NOT NULL,
+            sample_count BIGINT NOT NULL,
+            min_value DOUBLE,
+            max_value DOUBLE,
+            sum_value DOUBLE,
+            sum_squares DOUBLE,
+            PRIMARY KEY (source, metric, kit_id, driver_id, bucket_start)
+        )
+    """,
+    "sensor_rollups_hour": """
+        CREATE TABLE IF NOT EXISTS sensor_rollups_hour (
+            source VARCHAR(32) NOT NULL,
+            metric VARCHAR(32) NOT NULL,
+            kit_id VARCHAR(64) NOT NULL,
+            driver_id VARCHAR(64) NOT NULL,
+            bucket_start DATETIME NOT NULL,
+            sample_count BIGINT NOT NULL,
+            min_value DOUBLE,
+            max_value DOUBLE,
+            sum_value DOUBLE,
+            sum_squares DOUBLE,
+            PRIMARY KEY (source, metric, kit_id, driver_id, bucket_start)
+        )
+    """,
+    "sensor_window_summaries": """
+        CREATE TABLE IF NOT EXISTS sensor_window_summaries (
+            id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            kit_id VARCHAR(64),
+            driver_id VARCHAR(64),
+            window_start DATETIME(6),
+            window_end DATETIME(6),
+            window_mode VARCHAR(16),
+            sample_count INT,
+            harsh_events INT,
+            metrics JSON,
+            events JSON
+        )
+    """,
+}
+
+# Tablas de SQLite: cada columna espacial se guarda como el par <columna>_lon / <columna>_lat
+SQLITE_TABLES = {
+    "kit": """
+        CREATE TABLE IF NOT EXISTS kit (
+            kit_id TEXT PRIMARY KEY
+        )
+    """,
+    "drivers": """
+        CREATE TABLE IF NOT EXISTS drivers (
+            id TEXT PRIMARY KEY,
+            kit_id TEXT
+        )
+    """,
+    "init_travels": """
+        CREATE TABLE IF NOT EXISTS init_travels (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            driver_id TEXT NOT NULL,
+            date DATE,
+            start_hour TIMESTAMP,
+            start_coordinates_lon REAL,
+            start_coordinates_lat REAL
+        )
+    """,
+    "travels": """
+        CREATE TABLE IF NOT EXISTS travels (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            driver_id TEXT NOT NULL,
+            date DATE,
+            start_hour TIMESTAMP,
+            end_hour TIMESTAMP,
+            start_coordinates_lon REAL,
+            start_coordinates_lat REAL,
+            end_coordinates_lon REAL,
+            end_coordinates_lat REAL,
+            duration TEXT,
+            distance_mts REAL
+        )
+    """,
+    "travels_location": """
+        CREATE TABLE IF NOT EXISTS travels_location (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            travel_id INTEGER NOT NULL,
+            travel_coordinates_lon REAL,
+            travel_coordinates_lat REAL,
+            travel_datetime TIMESTAMP
+        )
+    """,
+    "acceleration": """
+        CREATE TABLE IF NOT EXISTS acceleration (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kit_id TEXT,
+            driver_id TEXT,
+            date TIMESTAMP,
+            data_acceleration REAL,
+            data_deceleration REAL,
+            inclination_angle REAL,
+            angular_velocity REAL,
+            g_force_x REAL,
+            g_force_y REAL
+        )
+    """,
+    "vibrations": """
+        CREATE TABLE IF NOT EXISTS vibrations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kit_id TEXT,
+            driver_id TEXT,
+            date TIMESTAMP,
+            data_vibration INTEGER
+        )
+    """,
+    "crashes": """
+        CREATE TABLE IF NOT EXISTS crashes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kit_id TEXT,
+            driver_id TEXT,
+            crash_date TIMESTAMP,
+            impact_g_force REAL,
+            crash_coordinates_lon REAL,
+            crash_coordinates_lat REAL
+        )
+    """,
+    "geolocation": """
+        CREATE TABLE IF NOT EXISTS geolocation (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            coordinates_lon REAL,
+            coordinates_lat REAL,
+            geo_time TIMESTAMP
+        )
+    """,
+    "sensor_rollup_watermarks": """
+        CREATE TABLE IF NOT EXISTS sensor_rollup_watermarks (
+            source TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL
+        )
+    """,
+    "sensor_rollups_minute": """
+        CREATE TABLE IF NOT EXISTS sensor_rollups_minute (
+            source TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            kit_id TEXT NOT NULL,
+            driver_id TEXT NOT NULL,
+            bucket_start TIMESTAMP NOT NULL,
+            sample_count INTEGER NOT NULL,
+            min_value REAL,
+            max_value REAL,
+            sum_value REAL,
+            sum_squares REAL,
+            PRIMARY KEY (source, metric, kit_id, driver_id, bucket_start)
+        )
+    """,
+    "sensor_rollups_hour": """
+        CREATE TABLE IF NOT EXISTS sensor_rollups_hour (
+            source TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            kit_id TEXT NOT NULL,
+            driver_id TEXT NOT NULL,
+            bucket_start TIMESTAMP NOT NULL,
+            sample_count INTEGER NOT NULL,
+            min_value REAL,
+            max_value REAL,
+            sum_value REAL,
+            sum_squares REAL,
+            PRIMARY KEY (source, metric, kit_id, driver_id, bucket_start)
+        )
+    """,
+    "sensor_window_summaries": """
+        CREATE TABLE IF NOT EXISTS sensor_window_summaries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kit_id TEXT,
+            driver_id TEXT,
+            window_start TIMESTAMP,
+            window_end TIMESTAMP,
+            window_mode TEXT,
+            sample_count INTEGER,
+            harsh_events INTEGER,
+            metrics TEXT,
+            events TEXT
+        )
+    """,
+}
+
+# Script completo para abrir una base embebida nueva
+SQLITE_SCHEMA = ";\n".join(ddl.strip() for ddl in SQLITE_TABLES.values()) + ";\n"
+
+# Índices de las rutas calientes: (tabla, nombre, columnas, tipo)
+INDEXES = [
+    ("drivers", "idx_drivers_kit", "kit_id", None),
+    ("init_travels", "idx_init_travels_start_hour", "start_hour", None),
+    ("init_travels", "idx_init_travels_driver", "driver_id, start_hour", None),
+    ("travels", "idx_travels_start_hour", "start_hour", None),
+    ("travels", "idx_travels_driver", "driver_id, start_hour", None),
+    ("travels", "sidx_travels_start_coordinates", "start_coordinates", "SPATIAL"),
+    ("travels_location", "idx_travels_location_travel", "travel_id, travel_datetime", None),
+    ("travels_location", "sidx_travels_location_coordinates", "travel_coordinates", "SPATIAL"),
+    ("acceleration", "idx_acceleration_date", "date", None),
+    ("acceleration", "idx_acceleration_kit_driver_date", "kit_id, driver_id, date", None),
+    ("vibrations", "idx_vibrations_date", "date", None),
+    ("vibrations", "idx_vibrations_kit_driver_date", "kit_id, driver_id, date", None),
+    ("sensor_window_summaries", "idx_sensor_window_summaries_kit_driver_start", "kit_id, driver_id, window_start", None),
+    ("crashes", "idx_crashes_date", "crash_date", None),
+    ("crashes", "sidx_crashes_coordinates", "crash_coordinates", "SPATIAL"),
+    ("geolocation", "idx_geolocation_time", "geo_time", None),
+    ("geolocation", "sidx_geolocation_coordinates", "coordinates", "SPATIAL"),
+    ("sensor_rollups_minute", "idx_rollups_minute_bucket", "bucket_start", None),
+    ("sensor_rollups_hour", "idx_rollups_hour_bucket", "bucket_start", None),
+]
+
+# Consultas calientes verificadas con EXPLAIN al iniciar: (nombre, sql, parámetros, se permite full scan)
+HOT_QUERIES = [
+    ("last_init_travel", "SELECT driver_id, date, start_hour, start_coordinates FROM init_travels ORDER BY start_hour DESC LIMIT 1", None, False),
+    ("driver_by_id", "SELECT id, kit_id FROM drivers WHERE id = %s", ("driver",), False),
+    ("pending_travel_locations", "SELECT id FROM travels_location WHERE travel_id = %s", (9999,), False),
+    ("travels_by_driver", "SELECT id FROM travels WHERE driver_id = %s ORDER BY start_hour DESC", ("driver",), False),
+    ("acceleration_window", "SELECT id FROM acceleration WHERE kit_id = %s AND driver_id = %s AND date >= %s", ("kit", "driver", "2024-01-01"), False),
+    ("rollups_minute", "SELECT bucket_start, sample_count FROM sensor_rollups_minute WHERE source = %s AND metric = %s AND kit_id = %s AND driver_id = %s AND bucket_start >= %s", ("acceleration", "g_force_x", "kit", "driver", "2024-01-01"), False),
+    # La tabla kit tiene una fila y el entrenamiento lee todos los viajes: el full scan es esperado
+    ("kit", "SELECT kit_id FROM kit", None, True),
+    ("model_travels", "SELECT start_hour, ST_Y(start_coordinates) AS start_latitude, ST_X(start_coordinates) AS start_longitude, distance_mts FROM travels", None, True),
+]
+
+async def _existing_indexes(database, table: str) -> set:
+    if database.dialect == "sqlite":
+        rows = await database.query_get(f"PRAGMA index_list({table})")
+        return {row["name"] for row in rows}
+    rows = await database.query_get(
+        """
+        SELECT DISTINCT INDEX_NAME AS name FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s
+        """,
+        (table,),
+    )
+    return {row["name"] for row in rows}
+
+async def ensure_indexes(database) -> list:
+    # Migración idempotente: crea solo los índices que faltan en tablas existentes
+    created = []
+    existing = {}
+    for table, name, columns, kind in INDEXES:
+        if database.dialect == "sqlite":
+            if kind == "SPATIAL":
+                # SQLite no tiene índices espaciales; se indexa el par lon/lat
+                columns = ", ".join(f"{c.strip()}_lon, {c.strip()}_lat" for c in columns.split(","))
+            kind = None
+        if table not in existing:
+            existing[table] = await _existing_indexes(database, table)
+        if name in existing[table]:
+            continue
+        prefix = f"CREATE {kind} INDEX" if kind else "CREATE INDEX"
+        try:
+            await database.query_post(f"{prefix} {name} ON {table} ({columns})", None)
+            created.append(name)
+        except Exception as e:
+            # P. ej. un índice SPATIAL sobre una columna POINT antigua que admite NULL
+            logger.warning(f"Could not create index {name} on {table}: {e}")
+    return created
+
+async def bootstrap_schema(database):
+    tables = SQLITE_TABLES if database.dialect == "sqlite" else MYSQL_TABLES
+    for ddl in tables.values():
+        await database.query_post(ddl, None)
+    created = await ensure_indexes(database)
+    if created:
+        logger.info(f"Created missing indexes: {created}")
+    logger.info(f"Database schema ready ({database.dialect}).")
+
+def _full_scans(dialect: str, plan: list) -> list:
+    if dialect == "sqlite":
+        # EXPLAIN QUERY PLAN: "SCAN tabla" es un recorrido completo, "SEARCH ... USING INDEX" no
+        return [row["detail"] for row in plan if row["detail"].startswith("SCAN") and "USING" not in row["detail"]]
+    return [row.get("table") for row in plan if row.get("type") == "ALL"]
+
+async def check_query_plans(database) -> dict:
+    """
+    Ejecuta EXPLAIN sobre las consultas calientes y avisa si alguna hace un recorrido completo inesperado.
+    Devuelve {nombre: [tablas recorridas completas]}.
+    """
+    prefix = "EXPLAIN QUERY PLAN " if database.dialect == "sqlite" else "EXPLAIN "
+    report = {}
+    for name, sql, params, allow_full_scan in HOT_QUERIES:
+        try:
+            plan = await database.query_get(prefix + sql, params)
+        except Exception as e:
+            logger.warning(f"Could not EXPLAIN hot query {name}: {e}")
+            continue
+        scans = _full_scans(database.dialect, plan)
+        report[name] = scans
+        if scans and not allow_full_scan:
+            logger.warning(f"Hot query {name} does a full scan on {scans}: {sql.strip()}")
+    return report
+
+async def prepare_database(database):
+    if os.getenv("DATABASE_BOOTSTRAP_SCHEMA", "true").lower() == "true":
+        await bootstrap_schema(database)
+    if os.getenv("DATABASE_CHECK_QUERY_PLANS", "true").lower() == "true":
+        await check_query_plans(database)
+
+async def bootstrap_database(database) -> bool:
+    """
+    Crea el pool y prepara el esquema. Devuelve False, sin propagar el error, si la base no responde.
+    """
+    try:
+        await database.connect()
+        await prepare_database(database)
+        return True
+    except Exception as e:
+        logger.error(f"Database bootstrap failed: {e}")
+        return False
+
+async def retry_bootstrap_database(database):
+    # Reintenta con espera creciente hasta que la base responda; mientras, las escrituras van al outbox
+    delay = float(os.getenv("DATABASE_BOOTSTRAP_RETRY", "5"))
+    max_delay = float(os.getenv("DATABASE_BOOTSTRAP_MAX_RETRY", "60"))
+    while True:
+        logger.info(f"Retrying database bootstrap in {delay:g}s.")
+        await asyncio.sleep(delay)
+        if await bootstrap_database(database):
+            return
+        delay = min(delay * 2, max_delay)
@@ -0,0 +1,27 @@
+from contextlib import aclosing
+import numpy as np
+import pandas as pd
+from database.connector import DatabaseConnector
+
+async def fetch_columns(database: DatabaseConnector, sql, columns: dict, param=None, chunk_size=1000) -> dict:
+    """
+    Lee el resultado por bloques con query_stream y construye un arreglo NumPy por columna.
+    `columns` mapea cada columna del SELECT (en orden) a su dtype.
+    Solo se mantiene en memoria un bloque de tuplas a la vez.
+    """
+    names = list(columns)
+    parts = {name: [] for name in names}
+
+    async with aclosing(database.query_stream(sql, param, chunk_size=chunk_size)) as stream:
+        async for rows in stream:
+            for name, values in zip(names, zip(*rows)):
+                parts[name].append(np.asarray(values, dtype=columns[name]))
+
+    return {
+        name: np.concatenate(chunks) if chunks else np.empty(0, dtype=columns[name])
+        for name, chunks in parts.items()
+    }
+
+async def fetch_frame(database: DatabaseConnector, sql, columns: dict, param=None, chunk_size=1000) -> pd.DataFrame:
+    arrays = await fetch_columns(database, sql, columns, param, chunk_size)
+    return pd.DataFrame(arrays, copy=False)
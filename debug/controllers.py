@@ -0,0 +1,43 @@
+from database.connector import database_connector
+from database.batch_writer import batch_writer
+from database.outbox import outbox
+from database.rollups import rollup_service
+from utils.metadata_cache import metadata_cache
+from services.rabbitmq_service import rabbitmq_service
+
+database = database_connector
+
+def get_db_report(limit: int = None) -> dict:
+    report = database.metrics.snapshot(limit)
+    report["pool"] = database.get_pool_stats()
+    report["batch_writer"] = dict(batch_writer.stats, pending=batch_writer.pending())
+    report["outbox"] = outbox.get_stats()
+    report["rollups"] = rollup_service.get_stats()
+    return report
+
+def reset_db_metrics():
+    database.metrics.reset()
+
+def get_cache_report() -> dict:
+    return metadata_cache.get_stats()
+
+def clear_cache():
+    metadata_cache.clear()
+
+def get_broker_report() -> dict:
+    return rabbitmq_service.get_stats()
+
+def get_gpio_report() -> dict:
+    # Import diferido: evita cargar la cadena de sensores (y su backend) al importar el módulo de depuración
+    from services.gpio_service import gpio_service
+    return gpio_service.get_stats()
+
+def start_raw_capture(seconds: float = None) -> dict:
+    from services.gpio_service import gpio_service
+    gpio_service.capture_raw(seconds)
+    return {"raw_enabled": gpio_service.raw_enabled(), "seconds": seconds}
+
+def stop_raw_capture() -> dict:
+    from services.gpio_service import gpio_service
+    gpio_service.stop_raw_capture()
+    return {"raw_enabled": gpio_service.raw_enabled()}
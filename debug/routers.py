@@ -0,0 +1,66 @@
+from typing import Optional
+from fastapi import APIRouter, status, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from debug.controllers import get_db_report, reset_db_metrics, get_cache_report, clear_cache, get_broker_report, get_gpio_report, start_raw_capture, stop_raw_capture
+
+router = APIRouter()
+
+@router.get("/debug/db")
+async def get_db_metrics_api(limit: Optional[int] = Query(None, ge=1)):
+    """
+    This API returns per-statement latency histograms, rows, errors and connection acquire times.
+    """
+    report = get_db_report(limit)
+    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(report))
+
+@router.delete("/debug/db")
+async def reset_db_metrics_api():
+    """
+    This API clears the database metrics registry.
+    """
+    reset_db_metrics()
+    return JSONResponse(status_code=status.HTTP_200_OK, content={"status": "reset"})
+
+@router.get("/debug/cache")
+async def get_cache_metrics_api():
+    """
+    This API returns hit/miss counters of the metadata cache.
+    """
+    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(get_cache_report()))
+
+@router.delete("/debug/cache")
+async def clear_cache_api():
+    """
+    This API drops every cached metadata entry.
+    """
+    clear_cache()
+    return JSONResponse(status_code=status.HTTP_200_OK, content={"status": "cleared"})
+
+@router.get("/debug/broker")
+async def get_broker_metrics_api():
+    """
+    This API returns RabbitMQ publish, confirm and failure counters.
+    """
+    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(get_broker_report()))
+
+@router.get("/debug/gpio")
+async def get_gpio_metrics_api():
+    """
+    This API returns the sensor queue counters and per-sample queue and processing latency.
+    """
+    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(get_gpio_report()))
+
+@router.post("/debug/gpio/raw")
+async def start_raw_capture_api(seconds: Optional[float] = Query(None, gt=0)):
+    """
+    This API publishes and stores raw sensor samples next to the window summaries, for seconds or until stopped.
+    """
+    return JSONResponse(status_code=status.HTTP_200_OK, content=start_raw_capture(seconds))
+
+@router.delete("/debug/gpio/raw")
+async def stop_raw_capture_api():
+    """
+    This API stops a raw sample capture.
+    """
+    return JSONResponse(status_code=status.HTTP_200_OK, content=stop_raw_capture())
@@ -1,9 +1,8 @@
 import asyncio
-import json
 from fastapi import HTTPException, status
-from database.connector import DatabaseConnector
+from database.connector import DatabaseConnector, database_connector
 from driving.models import DrivingModel, DrivingRequestModel
-from services.rabbitmq_service import RabbitMQService
+from services.rabbitmq_service import RabbitMQService, rabbitmq_service
 from utils.travel_state import travel_state
 from utils.current_driver import current_driver
 from travel.controllers import travel_controller
@@ -20,7 +19,7 @@ class DrivingController:
     async def register_driving(self, driving_model: DrivingModel) -> str:
         try:
             message = self.create_driving_message(driving_model)
-            await self.rabbitmq_service.send_message(message, "driving.tracking")
+            await self.rabbitmq_service.enqueue(message, "driving.tracking")
             await self.save_driving_data(driving_model)
             return "Driving data registered successfully"
         except Exception as e:
@@ -54,7 +53,7 @@ class DrivingController:
                 g_force_y=driving_model.g_force_y,
             )
 
-            await self.rabbitmq_service.send_message(message, "driving.tracking")
+            await self.rabbitmq_service.enqueue(message, "driving.tracking")
             await self.save_driving_data(driving_details)
 
             return "Driving data registered successfully"
@@ -63,7 +62,7 @@ class DrivingController:
             return str(e)
 
     def create_driving_message(self, driving_model: DrivingModel, kit_id=None, driver_id=None, coordinates=None):
-        return json.dumps({
+        return {
             "kit_id": kit_id or driving_model.kit_id,
             "driver_id": driver_id or driving_model.driver_id,
             "travel_id": driving_model.travel_id,
@@ -76,7 +75,7 @@ class DrivingController:
             "angular_velocity": driving_model.angular_velocity,
             "g_force_x": driving_model.g_force_x,
             "g_force_y": driving_model.g_force_y,
-        })
+        }
 
     async def get_current_coordinates(self, gps_service):
         coordinates = await gps_service.get_current_coordinates_async()
@@ -85,7 +84,12 @@ class DrivingController:
         return f"POINT({coordinates['longitude']} {coordinates['latitude']})"
 
     async def save_driving_data(self, driving_model: DrivingModel):
-        await self.database.query_post(
+        # Las tres inserciones se confirman juntas en una sola transacción
+        async with self.database.transaction() as unit:
+            await self.insert_driving_rows(unit, driving_model)
+
+    async def insert_driving_rows(self, unit, driving_model: DrivingModel):
+        await unit.execute(
             """
             INSERT INTO acceleration (kit_id, driver_id, date, data_acceleration, data_deceleration, inclination_angle, angular_velocity, g_force_x, g_force_y)
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s);
@@ -103,7 +107,7 @@ class DrivingController:
             ),
         )
 
-        await self.database.query_post(
+        await unit.execute(
             """
             INSERT INTO vibrations (kit_id, driver_id, date, data_vibration)
             VALUES (%s, %s, %s, %s);
@@ -116,7 +120,7 @@ class DrivingController:
             ),
         )
 
-        await self.database.query_post(
+        await unit.execute(
             """
             INSERT INTO travels_location (travel_id, travel_coordinates, travel_datetime)
             VALUES (%s, ST_GeomFromText(%s), %s);
@@ -141,6 +145,4 @@ class DrivingController:
         logger.error(f"Failed to register driving data after {max_retries} attempts")
 
 # Instanciar el controlador
-database = DatabaseConnector()
-rabbitmq_service = RabbitMQService()
-driving_controller = DrivingController(database, rabbitmq_service)
\ No newline at end of file
+driving_controller = DrivingController(database_connector, rabbitmq_service)
\ No newline at end of file
@@ -1,62 +1,57 @@
 from fastapi import HTTPException, status
-from database.connector import DatabaseConnector
+from database.connector import database_connector
+from kit.controllers import get_kit_id as get_cached_kit_id
+from utils.metadata_cache import metadata_cache, LAST_DRIVER_KEY
 from services.model_service import model_buffer
 from fastapi import APIRouter, Query, HTTPException, status
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from typing import Dict, Any
-
-database = DatabaseConnector()
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+database = database_connector
+
+async def load_last_driver_id() -> str:
+    driver = await database.query_get(
+        """
+        SELECT
+        driver_id
+        FROM init_travels
+        ORDER BY start_hour DESC
+        LIMIT 1
+        """
+    )
+    if len(driver) == 0:
+        # Aún no hay viajes: None se guarda como entrada negativa
+        return None
+
+    driver = driver[0]
+
+    if isinstance(driver, dict):
+        return driver["driver_id"]
+    elif isinstance(driver, (tuple, list)):
+        return driver[0]
+    else:
+        raise ValueError("Unexpected result format from query_get")
 
 async def get_last_driver_id() -> str:
+    # Se invalida en travel_init / travel_finish. None si no hay viajes o la consulta falla
     try:
-        driver = await database.query_get(
-            """
-            SELECT
-            driver_id
-            FROM init_travels
-            ORDER BY start_hour DESC
-            LIMIT 1
-            """
-        )
-        if len(driver) == 0:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="No driver found. Probably no travels registered / done yet"
-            )
-        
-        driver = driver[0]
-        
-        if isinstance(driver, dict):
-            return driver["driver_id"]
-        elif isinstance(driver, (tuple, list)):
-            return driver[0]
-        else:
-            raise ValueError("Unexpected result format from query_get")
+        return await metadata_cache.get_or_load(LAST_DRIVER_KEY, load_last_driver_id)
     except Exception as e:
-        return "Error occurred: " + str(e)
+        logger.error(f"Could not load the last driver id: {e}")
+        return None
 
 async def get_kit_id() -> str:
+    # None si no hay kit registrado o la consulta falla
     try:
-        kit = await database.query_get(
-            """
-            SELECT
-            kit_id
-            FROM kit
-            """
-        )
-        if len(kit) == 0:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="No kit found. Please register a kit"
-            )
-        kit = kit[0]
-        if isinstance(kit, dict):
-            return kit["kit_id"]
-        elif isinstance(kit, (tuple, list)):
-            return kit[0]
-        else:
-            raise ValueError("Unexpected result format from query_get")
+        return await get_cached_kit_id()
     except Exception as e:
-        return "Error occurred: " + str(e)
+        logger.error(f"Could not load the kit id: {e}")
+        return None
     
 async def predict_heatmap(hour: int, day_of_week: int, latitude: float, longitude: float):
     """
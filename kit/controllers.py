@@ -1,11 +1,12 @@
 import json
 from fastapi import HTTPException, status
-from database.connector import DatabaseConnector
+from database.connector import database_connector
 from kit.models import KitEntityModel
+from utils.metadata_cache import metadata_cache, KIT_ID_KEY
 
-database = DatabaseConnector()
+database = database_connector
 
-async def get_kit() -> KitEntityModel:
+async def load_kit_id() -> str:
     kit = await database.query_get(
         """
         SELECT
@@ -14,13 +15,24 @@ async def get_kit() -> KitEntityModel:
         """
     )
     if len(kit) == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="No kit found"
-        )
+        # None se guarda como entrada negativa: sin kit registrado no se consulta en cada lectura
+        return None
     kit = kit[0]
     if isinstance(kit, dict):
-        return KitEntityModel(**kit)
+        return kit["kit_id"]
     elif isinstance(kit, (tuple, list)):
-        return KitEntityModel(kit_id=kit[0])
+        return kit[0]
     else:
-        raise ValueError("Unexpected result format from query_get")
\ No newline at end of file
+        raise ValueError("Unexpected result format from query_get")
+
+async def get_kit_id() -> str:
+    # Única implementación de la consulta del kit; el resultado se guarda en caché. None si no hay kit
+    return await metadata_cache.get_or_load(KIT_ID_KEY, load_kit_id)
+
+async def get_kit() -> KitEntityModel:
+    kit_id = await get_kit_id()
+    if kit_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="No kit found. Please register a kit"
+        )
+    return KitEntityModel(kit_id=kit_id)
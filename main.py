@@ -4,12 +4,19 @@ from contextlib import asynccontextmanager
 from travel.routers import router as travel_router
 from kit.routers import router as kit_router
 from geolocation.routers import router as geolocation_router
+from debug.routers import router as debug_router
+from rollups.routers import router as rollups_router
 from services.gpio_service import gpio_service
 from services.model_service import ModelGenerator
-from database.connector import DatabaseConnector
+from database.connector import database_connector
+from database.batch_writer import batch_writer
+from database.outbox import outbox
+from services.rabbitmq_service import rabbitmq_service
+from database.schema import bootstrap_database, retry_bootstrap_database
+from database.rollups import rollup_service
 import threading
 
-db_connector = DatabaseConnector()
+db_connector = database_connector
 stop_event = threading.Event()  # Evento para sincronización de hilos
 
 model_generator = ModelGenerator(db_connector, stop_event)
@@ -17,7 +24,18 @@ model_generator = ModelGenerator(db_connector, stop_event)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Starting GPIO service and Heatmap service")
-    
+
+    # Pool de conexiones compartido por todos los controladores
+    # Crea tablas e índices que falten y revisa los planes de las consultas calientes
+    # Si la base no responde se reintenta en segundo plano y el resto de servicios arranca igual
+    db_task = None
+    if not await bootstrap_database(db_connector):
+        db_task = asyncio.create_task(retry_bootstrap_database(db_connector))
+    await outbox.start()
+    await batch_writer.start()
+    await rollup_service.start()
+    await rabbitmq_service.start()
+
     # Inicia ambos servicios concurrentemente
     gpio_task = asyncio.create_task(gpio_service.start(stop_event))
     model_task = asyncio.create_task(model_generator.run_async())
@@ -30,6 +48,15 @@ async def lifespan(app: FastAPI):
     await model_generator.stop_async()
     await gpio_task
     await model_task
+    # Vacía la cola de publicación y espera las confirmaciones pendientes del broker
+    await rabbitmq_service.close_connection()
+    await rollup_service.close()
+    if db_task is not None and not db_task.done():
+        db_task.cancel()
+    # Drena las filas pendientes antes de cerrar el pool
+    await batch_writer.close()
+    await outbox.close()
+    await db_connector.close()
 
 # Set API info
 app = FastAPI(
@@ -48,4 +75,6 @@ origins = [
 # User APIs
 app.include_router(travel_router)
 app.include_router(kit_router)
-app.include_router(geolocation_router)
\ No newline at end of file
+app.include_router(geolocation_router)
+app.include_router(rollups_router)
+app.include_router(debug_router)
\ No newline at end of file
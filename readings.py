@@ -4,7 +4,7 @@ from gpiozero import InputDevice
 import smbus
 import logging
 import requests
-from statistics import mean
+from utils.ring_buffer import DRIVING_CHANNELS, RingBuffer, driving_averages
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,6 +16,7 @@ class SensorReader:
     RETRY_DELAY = 0.1
     DRIVING_URL = "http://localhost:8000/driving"
     CRASH_URL = "http://localhost:8000/crashes"
+    BUFFER_CAPACITY = 30 * 100  # 30 s at 100 Hz
 
     def __init__(self):
         # Vibration and shock sensor configuration
@@ -33,8 +34,8 @@ class SensorReader:
         self.shocks = 0
         self.last_shock_time = self.millis()
 
-        # Buffer for 30-second data
-        self.data_buffer = []
+        # Buffer for 30-second data, preallocated for up to BUFFER_CAPACITY samples
+        self.data_buffer = RingBuffer(self.BUFFER_CAPACITY, DRIVING_CHANNELS)
 
     def initialize_i2c(self):
         retry_count = 0
@@ -125,19 +126,7 @@ class SensorReader:
                 self.initialize_i2c()
 
     def calculate_averages(self):
-        if not self.data_buffer:
-            return None
-
-        avg_data = {
-            "acceleration": mean([d['acc_x'] for d in self.data_buffer if d['acc_x'] > 0]),
-            "deceleration": abs(mean([d['acc_x'] for d in self.data_buffer if d['acc_x'] < 0])),
-            "vibrations": sum(d['vibrations'] for d in self.data_buffer),
-            "inclination_angle": mean(d['angle'] for d in self.data_buffer),
-            "angular_velocity": mean(d['gyro_x'] for d in self.data_buffer),
-            "g_force_x": mean(d['g_force_x'] for d in self.data_buffer),
-            "g_force_y": mean(d['g_force_y'] for d in self.data_buffer)
-        }
-        return avg_data
+        return driving_averages(self.data_buffer)
 
     def send_driving_data(self, data):
         payload = {
@@ -221,7 +210,7 @@ def main():
             avg_data = sensor_reader.calculate_averages()
             if avg_data:
                 sensor_reader.send_driving_data(avg_data)
-            sensor_reader.data_buffer = []  # Clear the buffer after sending data
+            sensor_reader.data_buffer.clear()  # Clear the buffer after sending data
     except KeyboardInterrupt:
         logger.info("Sensor readings stopped by user.")
 
@@ -0,0 +1,11 @@
+from datetime import datetime
+from fastapi import HTTPException, status
+from database.rollups import rollup_service
+
+async def get_rollups(source: str, metric: str, start: datetime, end: datetime,
+                      kit_id: str = None, driver_id: str = None, resolution: str = None) -> list:
+    try:
+        return await rollup_service.get_rollups(source, metric, start, end, kit_id, driver_id, resolution)
+    except ValueError as e:
+        # Fuente o métrica sin rollups, rango vacío o resolución desconocida
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
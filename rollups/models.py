@@ -0,0 +1,14 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+
+class RollupBucketModel(BaseModel):
+    kit_id: Optional[str]
+    driver_id: Optional[str]
+    bucket_start: datetime
+    resolution: str
+    count: int
+    min: float
+    max: float
+    mean: float
+    stddev: float
@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, status, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from rollups.models import RollupBucketModel
+from rollups.controllers import get_rollups
+
+router = APIRouter()
+
+@router.get("/rollups", response_model=List[RollupBucketModel])
+async def get_rollups_api(
+    source: str = Query(...),
+    metric: str = Query(...),
+    start: datetime = Query(...),
+    end: datetime = Query(...),
+    kit_id: Optional[str] = Query(None),
+    driver_id: Optional[str] = Query(None),
+    resolution: Optional[str] = Query(None),
+):
+    """
+    This API returns per-minute or per-hour count/min/max/mean/stddev buckets of a sensor metric in [start, end).
+    """
+    buckets = await get_rollups(source, metric, start, end, kit_id, driver_id, resolution)
+    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(buckets))
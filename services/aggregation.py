@@ -0,0 +1,155 @@
+import os
+import math
+import logging
+from datetime import datetime, timedelta
+import numpy as np
+from dotenv import load_dotenv
+from utils.ring_buffer import RingBuffer, window_stats
+
+load_dotenv('local.env')
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TUMBLING = "tumbling"  # ventanas consecutivas sin solaparse
+SLIDING = "sliding"    # una ventana de window segundos cada hop segundos
+WINDOW_MODES = (TUMBLING, SLIDING)
+
+# Canales de una muestra del pipeline GPIO (aceleración en g, giroscopio en °/s); g_force se calcula
+AGGREGATION_CHANNELS = ("acc_x", "acc_y", "acc_z", "gyro_x", "gyro_y", "gyro_z", "g_force", "vibration", "shock")
+FLAG_CHANNELS = ("vibration", "shock")
+
+# evento:canal:condición:umbral; cada evento cuenta las veces que el canal entra en la condición
+DEFAULT_HARSH_EVENTS = (
+    "harsh_acceleration:acc_x:>:0.3,harsh_braking:acc_x:<:-0.4,harsh_turn:acc_y:abs>:0.4,impact:g_force:>:2.0"
+)
+CONDITIONS = {
+    ">": lambda values, threshold: values > threshold,
+    "<": lambda values, threshold: values < threshold,
+    "abs>": lambda values, threshold: np.abs(values) > threshold,
+}
+
+def parse_harsh_events(value: str) -> dict:
+    # "evento:canal:condición:umbral,..." -> {evento: (canal, condición, umbral)}
+    events = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, channel, condition, threshold = item.split(":")
+        if channel not in AGGREGATION_CHANNELS:
+            raise EnvironmentError(f"Unknown channel {channel!r} for harsh event {name}")
+        if condition not in CONDITIONS:
+            raise EnvironmentError(f"Unknown condition {condition!r} for harsh event {name}")
+        events[name.strip()] = (channel, condition, float(threshold))
+    return events
+
+def count_episodes(exceeded) -> int:
+    # Flancos de subida: una frenada de 300 ms a 200 Hz es un solo evento, no 60 muestras
+    if not len(exceeded):
+        return 0
+    return int(exceeded[0]) + int(np.count_nonzero(exceeded[1:] & ~exceeded[:-1]))
+
+class WindowAggregator:
+    """
+    Resume las muestras del IMU por ventanas de tiempo (reloj monótono de cada muestra). Al cerrarse una ventana
+    add() devuelve su resumen: mean/min/max/p95 por canal, número de muestras, eventos bruscos y los promedios
+    del registro de conducción (tablas acceleration y vibrations).
+    """
+
+    def __init__(self, window_seconds: float = 10.0, mode: str = TUMBLING, hop_seconds: float = None,
+                 sample_rate_hz: float = 200.0, harsh_events: dict = None):
+        if mode not in WINDOW_MODES:
+            raise ValueError(f"Unknown window mode {mode!r}, expected tumbling or sliding")
+        self.window_seconds = window_seconds
+        self.mode = mode
+        self.hop_seconds = window_seconds if mode == TUMBLING else (hop_seconds or window_seconds / 2)
+        self.harsh_events = parse_harsh_events(DEFAULT_HARSH_EVENTS) if harsh_events is None else harsh_events
+        # Capacidad para una ventana completa con margen por jitter del muestreo
+        self.buffer = RingBuffer(math.ceil(window_seconds * sample_rate_hz * 1.25) + 1, AGGREGATION_CHANNELS)
+        self.next_emit = None
+        self.stats = {"samples": 0, "windows": 0, "empty_windows": 0}
+
+    @classmethod
+    def from_env(cls, sample_rate_hz: float):
+        hop = os.getenv('GPIO_AGGREGATION_HOP')
+        return cls(
+            window_seconds=float(os.getenv('GPIO_AGGREGATION_WINDOW', '10')),
+            mode=os.getenv('GPIO_AGGREGATION', TUMBLING).lower(),
+            hop_seconds=float(hop) if hop else None,
+            sample_rate_hz=sample_rate_hz,
+            harsh_events=parse_harsh_events(os.getenv('GPIO_HARSH_EVENTS', DEFAULT_HARSH_EVENTS)),
+        )
+
+    def add(self, sample: dict, timestamp: float, wall: datetime) -> list:
+        """
+        Agrega una muestra con su instante monótono y de pared; devuelve los resúmenes de las ventanas cerradas.
+        """
+        summaries = []
+        if self.next_emit is None:
+            self.next_emit = timestamp + self.hop_seconds
+        elif timestamp >= self.next_emit:
+            summary = self._summarize(self.next_emit, wall - timedelta(seconds=timestamp - self.next_emit))
+            if summary is not None:
+                summaries.append(summary)
+            # Sin muestras durante varias ventanas (p. ej. el bus I2C caído) no se emiten resúmenes vacíos
+            skipped = math.floor((timestamp - self.next_emit) / self.hop_seconds)
+            self.stats["empty_windows"] += skipped
+            self.next_emit += (skipped + 1) * self.hop_seconds
+
+        if "g_force" not in sample:
+            sample = dict(sample, g_force=math.sqrt(
+                sample.get("acc_x", 0) ** 2 + sample.get("acc_y", 0) ** 2 + sample.get("acc_z", 0) ** 2
+            ))
+        self.buffer.append(sample, timestamp)
+        self.stats["samples"] += 1
+        return summaries
+
+    def flush(self, timestamp: float, wall: datetime) -> dict:
+        # Cierra la ventana en curso antes de tiempo (cambio de conductor o apagado)
+        summary = self._summarize(timestamp, wall) if self.next_emit is not None else None
+        self.buffer.clear()
+        self.next_emit = None
+        return summary
+
+    def _summarize(self, end: float, end_wall: datetime) -> dict:
+        rows, _ = self.buffer.window(seconds=self.window_seconds, now=end)
+        if self.mode == TUMBLING:
+            self.buffer.clear()
+        if not len(rows):
+            self.stats["empty_windows"] += 1
+            return None
+        self.stats["windows"] += 1
+        return summarize_rows(rows, self.buffer.index, self.harsh_events, end_wall, self.window_seconds, self.mode)
+
+    def get_stats(self) -> dict:
+        return dict(self.stats, mode=self.mode, window_seconds=self.window_seconds, hop_seconds=self.hop_seconds)
+
+def summarize_rows(rows, index: dict, harsh_events: dict, end_wall: datetime, window_seconds: float, mode: str) -> dict:
+    values = window_stats(rows, (95,))
+    metrics = {
+        name: {stat: float(values[stat][i]) for stat in ("mean", "min", "max", "p95")}
+        for name, i in index.items() if name not in FLAG_CHANNELS
+    }
+    events = {
+        name: count_episodes(CONDITIONS[condition](rows[:, index[channel]], threshold))
+        for name, (channel, condition, threshold) in harsh_events.items()
+    }
+    events["vibrations"] = int(np.count_nonzero(rows[:, index["vibration"]] > 0))
+    events["shocks"] = count_episodes(rows[:, index["shock"]] > 0)
+
+    # Promedios con la semántica del registro de conducción: aceleración y frenado por separado
+    acc_x = rows[:, index["acc_x"]]
+    accelerating, braking = acc_x[acc_x > 0], acc_x[acc_x < 0]
+    driving = {
+        "acceleration": float(accelerating.mean()) if len(accelerating) else 0.0,
+        "deceleration": float(abs(braking.mean())) if len(braking) else 0.0,
+        "g_force_x": metrics["acc_x"]["mean"],
+        "g_force_y": metrics["acc_y"]["mean"],
+    }
+    return {
+        "window_start": end_wall - timedelta(seconds=window_seconds),
+        "window_end": end_wall,
+        "mode": mode,
+        "count": len(rows),
+        "metrics": metrics,
+        "events": events,
+        "driving": driving,
+    }
@@ -0,0 +1,79 @@
+import json
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from services.compression import decompress, parse_content_type, restore_columns
+
+try:
+    import msgpack
+except ImportError:  # msgpack es opcional; sin él se publica en JSON
+    msgpack = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Versión del sobre {"v", "event", "data"}; se incrementa si cambia su estructura
+CODEC_VERSION = 1
+VERSION_HEADER = "x-codec-version"
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+class JsonCodec:
+    name = "json"
+    content_type = "application/json"
+
+    def encode(self, message: dict) -> bytes:
+        return json.dumps(message, default=_default, separators=(",", ":")).encode()
+
+    def decode(self, body: bytes) -> dict:
+        return json.loads(body)
+
+class MsgpackCodec:
+    name = "msgpack"
+    content_type = "application/msgpack"
+
+    def encode(self, message: dict) -> bytes:
+        return msgpack.packb(message, default=_default, use_bin_type=True)
+
+    def decode(self, body: bytes) -> dict:
+        return msgpack.unpackb(body, raw=False)
+
+CODECS = {codec.content_type: codec for codec in (JsonCodec(), MsgpackCodec())}
+
+def get_codec(name: str = "msgpack"):
+    if name == "msgpack" and msgpack is None:
+        logger.warning("msgpack is not installed, publishing messages as JSON")
+        name = "json"
+    for codec in CODECS.values():
+        if codec.name == name:
+            return codec
+    raise EnvironmentError(f"Unknown message codec {name!r}, expected json or msgpack")
+
+def encode_message(codec, event, data) -> bytes:
+    # El evento se codifica una sola vez, con los datos anidados como estructura (no como texto JSON)
+    return codec.encode({"v": CODEC_VERSION, "event": event, "data": data})
+
+def decode_message(body: bytes, content_type: str = None) -> dict:
+    """
+    Decodifica un mensaje según su content type; sin content type se asume JSON (mensajes anteriores al codec).
+    Los parámetros compression y transform del content type indican cómo descomprimir y restaurar las columnas.
+    """
+    base, params = parse_content_type(content_type or JsonCodec.content_type)
+    codec = CODECS.get(base)
+    if codec is None:
+        raise ValueError(f"Unsupported content type {content_type!r}")
+    if codec is CODECS[MsgpackCodec.content_type] and msgpack is None:
+        raise RuntimeError("msgpack is required to decode this message")
+    if "compression" in params:
+        body = decompress(body, params["compression"])
+    message = codec.decode(body)
+    if message.get("v", CODEC_VERSION) > CODEC_VERSION:
+        raise ValueError(f"Message version {message['v']} is newer than supported {CODEC_VERSION}")
+    if params.get("transform") == "columns":
+        message["data"] = restore_columns(message["data"])
+    return message
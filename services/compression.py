@@ -0,0 +1,170 @@
+import os
+import sys
+import time
+import zlib
+import struct
+import logging
+from array import array
+from dotenv import load_dotenv
+
+try:
+    import lz4.frame
+except ImportError:  # lz4 es opcional; sin él se usa zlib
+    lz4 = None
+
+load_dotenv('local.env')
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Columnas transformadas de un lote: {"t": tipo, "v": valores}
+DELTA = "delta"          # enteros: primer valor y diferencias sucesivas
+SHUFFLE64 = "shuffle64"  # floats: float64 little-endian con los bytes agrupados por posición
+
+def parse_content_type(content_type: str):
+    # "application/msgpack; compression=zlib" -> ("application/msgpack", {"compression": "zlib"})
+    base, *params = [part.strip() for part in (content_type or "").split(";")]
+    return base, dict(param.split("=", 1) for param in params if "=" in param)
+
+def _is_int_column(values) -> bool:
+    return all(type(value) is int for value in values)
+
+def _is_float_column(values) -> bool:
+    return all(type(value) in (int, float) for value in values) and any(type(value) is float for value in values)
+
+def shuffle_floats(values) -> bytes:
+    # Los floats que varían poco comparten signo, exponente y bytes altos: agrupados comprimen mucho mejor
+    packed = array("d", values)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    raw = packed.tobytes()
+    return b"".join(raw[i::8] for i in range(8))
+
+def unshuffle_floats(data: bytes) -> list:
+    count = len(data) // 8
+    raw = bytearray(len(data))
+    for i in range(8):
+        raw[i::8] = data[i * count:(i + 1) * count]
+    return list(struct.unpack(f"<{count}d", raw))
+
+def transform_columns(data: dict, binary: bool) -> dict:
+    """
+    Codifica las columnas numéricas de un lote (ver pack_samples) antes de comprimir.
+    Sin un codec binario solo se aplica delta a los enteros; la transformación es exacta.
+    """
+    columns = {}
+    for name, values in data["columns"].items():
+        if len(values) > 1 and _is_int_column(values):
+            columns[name] = {"t": DELTA, "v": [values[0]] + [b - a for a, b in zip(values, values[1:])]}
+        elif binary and len(values) > 1 and _is_float_column(values):
+            columns[name] = {"t": SHUFFLE64, "v": shuffle_floats(values)}
+        else:
+            columns[name] = values
+    return dict(data, columns=columns, transform=1)
+
+def restore_columns(data: dict) -> dict:
+    if not isinstance(data, dict) or not data.get("transform"):
+        return data
+    columns = {}
+    for name, column in data["columns"].items():
+        if isinstance(column, dict) and column.get("t") == DELTA:
+            values, total = [], 0
+            for delta in column["v"]:
+                total += delta
+                values.append(total)
+            columns[name] = values
+        elif isinstance(column, dict) and column.get("t") == SHUFFLE64:
+            columns[name] = unshuffle_floats(column["v"])
+        else:
+            columns[name] = column
+    restored = dict(data, columns=columns)
+    del restored["transform"]
+    return restored
+
+def decompress(body: bytes, algorithm: str) -> bytes:
+    if algorithm == "zlib":
+        return zlib.decompress(body)
+    if algorithm == "lz4":
+        if lz4 is None:
+            raise RuntimeError("lz4 is required to decompress this message")
+        return lz4.frame.decompress(body)
+    raise ValueError(f"Unsupported compression {algorithm!r}")
+
+class Compressor:
+    """
+    Comprime los cuerpos por encima de un umbral. El nivel se adapta a la CPU libre del kit
+    (carga media de 1 minuto por núcleo): con la CPU ocupada se usa el nivel mínimo.
+    """
+
+    LEVELS = {"zlib": (1, 9), "lz4": (0, 12)}
+
+    def __init__(self, algorithm: str = "zlib", threshold: int = 512, min_level: int = None, max_level: int = None,
+                 refresh_interval: float = 10.0):
+        if algorithm == "lz4" and lz4 is None:
+            logger.warning("lz4 is not installed, compressing messages with zlib")
+            algorithm = "zlib"
+        if algorithm not in self.LEVELS and algorithm != "none":
+            raise EnvironmentError(f"Unknown compression {algorithm!r}, expected zlib, lz4 or none")
+        self.algorithm = algorithm
+        self.threshold = threshold
+        lowest, highest = self.LEVELS.get(algorithm, (0, 0))
+        self.min_level = lowest if min_level is None else min_level
+        self.max_level = highest if max_level is None else max_level
+        self.refresh_interval = refresh_interval
+        self.level = self.min_level
+        self._checked_at = None
+        self.stats = {"compressed": 0, "skipped": 0, "bytes_in": 0, "bytes_out": 0, "cpu_ms": 0.0}
+
+    @classmethod
+    def from_env(cls):
+        min_level = os.getenv('RABBITMQ_COMPRESSION_MIN_LEVEL')
+        max_level = os.getenv('RABBITMQ_COMPRESSION_MAX_LEVEL')
+        return cls(
+            algorithm=os.getenv('RABBITMQ_COMPRESSION', 'zlib').lower(),
+            threshold=int(os.getenv('RABBITMQ_COMPRESSION_THRESHOLD', '512')),
+            min_level=int(min_level) if min_level else None,
+            max_level=int(max_level) if max_level else None,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.algorithm != "none"
+
+    def cpu_headroom(self) -> float:
+        try:
+            load = os.getloadavg()[0] / (os.cpu_count() or 1)
+        except (AttributeError, OSError):
+            return 1.0
+        return min(max(1.0 - load, 0.0), 1.0)
+
+    def current_level(self) -> int:
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.refresh_interval:
+            self._checked_at = now
+            self.level = self.min_level + round((self.max_level - self.min_level) * self.cpu_headroom())
+        return self.level
+
+    def compress(self, body: bytes):
+        """
+        Devuelve (cuerpo, algoritmo); algoritmo es None si el cuerpo no se comprimió.
+        """
+        if not self.enabled or len(body) < self.threshold:
+            self.stats["skipped"] += 1
+            return body, None
+        started = time.thread_time()
+        level = self.current_level()
+        if self.algorithm == "lz4":
+            compressed = lz4.frame.compress(body, compression_level=level)
+        else:
+            compressed = zlib.compress(body, level)
+        self.stats["cpu_ms"] += (time.thread_time() - started) * 1000
+        if len(compressed) >= len(body):
+            self.stats["skipped"] += 1
+            return body, None
+        self.stats["compressed"] += 1
+        self.stats["bytes_in"] += len(body)
+        self.stats["bytes_out"] += len(compressed)
+        return compressed, self.algorithm
+
+    def get_stats(self) -> dict:
+        return dict(self.stats, algorithm=self.algorithm, level=self.level, threshold=self.threshold)
@@ -0,0 +1,118 @@
+import os
+import math
+import logging
+from collections import deque
+from dotenv import load_dotenv
+
+load_dotenv('local.env')
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PEAK_G = "peak_g"
+JERK = "jerk"
+SHOCK = "shock"
+CRITERIA = (PEAK_G, JERK, SHOCK)
+
+class CrashDetector:
+    """
+    Detector de choques por muestra sobre una ventana deslizante corta (window_ms). Evalúa tres criterios:
+    fuerza g máxima (norma del acelerómetro), jerk (cambio de la aceleración en g/s, medido entre muestras
+    separadas al menos jerk_span_ms) y flancos de subida del pin de golpes (KY-031). Hay choque cuando
+    min_criteria de ellos se cumplen dentro de la ventana; después se ignora refractory_seconds para no
+    reportar varias veces el mismo choque.
+
+    Con el rango de ±2 g del MPU-6050 cada eje satura en 2 g y la norma no pasa de ~3.46 g: el umbral de 3.5 g
+    de SensorReader nunca se alcanza. Un choque frontal satura acc_x y con la gravedad en acc_z da ~2.24 g.
+
+    update() es O(muestras de la ventana) y corre en el hilo del sensor, sin pasar por la cola de GpioService.
+    """
+
+    def __init__(self, g_threshold: float = 2.0, jerk_threshold: float = 150.0, window_ms: float = 100.0,
+                 jerk_span_ms: float = 10.0, min_criteria: int = 2, refractory_seconds: float = 10.0):
+        if not 1 <= min_criteria <= len(CRITERIA):
+            raise ValueError(f"min_criteria must be between 1 and {len(CRITERIA)}, got {min_criteria}")
+        self.g_threshold = g_threshold
+        self.jerk_threshold = jerk_threshold
+        self.window = window_ms / 1000
+        self.jerk_span = jerk_span_ms / 1000
+        self.min_criteria = min_criteria
+        self.refractory = refractory_seconds
+        # (instante, ax, ay, az, g, jerk, flanco de golpe) de las muestras de la ventana
+        self.samples = deque()
+        self.last_shock = False
+        self.quiet_until = None
+        self.stats = {"samples": 0, "detections": 0, "max_g": 0.0, "max_jerk": 0.0}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            g_threshold=float(os.getenv('CRASH_G_THRESHOLD', '2.0')),
+            jerk_threshold=float(os.getenv('CRASH_JERK_THRESHOLD', '150')),
+            window_ms=float(os.getenv('CRASH_WINDOW_MS', '100')),
+            jerk_span_ms=float(os.getenv('CRASH_JERK_SPAN_MS', '10')),
+            min_criteria=int(os.getenv('CRASH_MIN_CRITERIA', '2')),
+            refractory_seconds=float(os.getenv('CRASH_REFRACTORY_SECONDS', '10')),
+        )
+
+    def update(self, sample: dict, timestamp: float) -> dict:
+        """
+        Agrega una muestra (aceleración en g, shock del pin) con su instante en segundos; devuelve el choque
+        detectado o None.
+        """
+        if "acc_x" not in sample:
+            return None
+        ax, ay, az = sample["acc_x"], sample.get("acc_y", 0.0), sample.get("acc_z", 0.0)
+        g = math.sqrt(ax * ax + ay * ay + az * az)
+        shock = bool(sample.get("shock", False))
+        shock_edge = shock and not self.last_shock
+        self.last_shock = shock
+
+        while self.samples and timestamp - self.samples[0][0] > self.window:
+            self.samples.popleft()
+        # Jerk contra la muestra más reciente que esté al menos jerk_span atrás: con el ruido del sensor la
+        # diferencia entre muestras consecutivas a 500 Hz sería casi todo ruido
+        jerk = 0.0
+        for t, px, py, pz, *_ in reversed(self.samples):
+            if timestamp - t >= self.jerk_span:
+                jerk = math.sqrt((ax - px) ** 2 + (ay - py) ** 2 + (az - pz) ** 2) / (timestamp - t)
+                break
+        self.samples.append((timestamp, ax, ay, az, g, jerk, shock_edge))
+
+        self.stats["samples"] += 1
+        self.stats["max_g"] = max(self.stats["max_g"], g)
+        self.stats["max_jerk"] = max(self.stats["max_jerk"], jerk)
+        if self.quiet_until is not None and timestamp < self.quiet_until:
+            return None
+
+        peak_g = max(s[4] for s in self.samples)
+        max_jerk = max(s[5] for s in self.samples)
+        shock_edges = sum(s[6] for s in self.samples)
+        criteria = [
+            name for name, met in (
+                (PEAK_G, peak_g >= self.g_threshold),
+                (JERK, max_jerk >= self.jerk_threshold),
+                (SHOCK, shock_edges > 0),
+            ) if met
+        ]
+        if len(criteria) < self.min_criteria:
+            return None
+
+        self.quiet_until = timestamp + self.refractory
+        self.stats["detections"] += 1
+        return {
+            "timestamp": timestamp,
+            "impact_force": peak_g,
+            "max_jerk": max_jerk,
+            "shock_edges": shock_edges,
+            "criteria": criteria,
+        }
+
+    def get_stats(self) -> dict:
+        return dict(
+            self.stats,
+            g_threshold=self.g_threshold,
+            jerk_threshold=self.jerk_threshold,
+            window_ms=self.window * 1000,
+            min_criteria=self.min_criteria,
+        )
@@ -1,105 +1,98 @@
+import os
+import json
 import asyncio
 import logging
 import threading
-import queue
 import time
-import json
-from datetime import datetime
-import serial
+from datetime import datetime, timedelta
 import pynmea2
-from gpiozero import InputDevice
 from statistics import mean, StatisticsError
-import smbus
-from database.connector import DatabaseConnector
-from services.rabbitmq_service import RabbitMQService
+from dotenv import load_dotenv
+from database.connector import DatabaseConnector, database_connector
+from database.batch_writer import BatchWriter, batch_writer
+from database.metrics import LatencyHistogram
+from services.aggregation import TUMBLING, WindowAggregator
+from services.crash_detector import CrashDetector
+from services.i2c_service import I2CService, scale_sample
+from services.mpu6050_fifo import Mpu6050Fifo
+from services.scheduler import SKIP, DeadlineScheduler, parse_sensor_rates
+from services.sensors import SensorBackend, create_backend
+from services.sensors.base import SHOCK_PIN, VIBRATION_PIN
+from services.rabbitmq_service import RabbitMQService, rabbitmq_service
 from driving.models import DrivingRequestModel
-from crash.models import CrashRequestModel
+from crash.models import CrashModel, CrashRequestModel
 from geolocation.controllers import get_kit_id, get_last_driver_id
 from driving.controllers import driving_controller
 from crash.controllers import crash_controller
 from utils.travel_state import travel_state
 from utils.current_driver import current_driver
 
+load_dotenv('local.env')
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 ### Sensor Threads ###
 class SensorThread(threading.Thread):
-    def __init__(self, name, read_function, data_queue):
+    def __init__(self, name, read_function, submit, rate_hz: float = 1.0, policy: str = SKIP):
         super().__init__()
         self.name = name
         self.read_function = read_function
-        self.data_queue = data_queue
+        # Entrega thread-safe de las lecturas al loop de la app (GpioService.submit)
+        self.submit = submit
         self.running = True
+        self._stopped = threading.Event()
+        # Plazos absolutos a rate_hz; el Event permite interrumpir la espera al detener el hilo
+        self.scheduler = DeadlineScheduler(rate_hz, policy, sleep=self._stopped.wait)
 
     def run(self):
-        logger.info(f"Starting {self.name} thread.")
+        logger.info(f"Starting {self.name} thread at {self.scheduler.rate_hz:g} Hz ({self.scheduler.policy}).")
+        self.scheduler.reset()
         while self.running:
             try:
                 data = self.read_function()
-                timestamped_data = {"sensor_name": self.name, "data": data, "timestamp": datetime.now()}
-                self.data_queue.put(timestamped_data)
-                time.sleep(1)  # Evita sobrecargar el hilo
+                captured = time.monotonic()
+                # Un lector con FIFO devuelve varias muestras por llamada: [(instante de pared, instante monótono, datos), ...]
+                readings = data if isinstance(data, list) else [(datetime.now(), captured, data)]
+                for timestamp, sampled, reading in readings:
+                    # timestamp es la hora de pared que se guarda; sampled, en el reloj monótono, ordena las
+                    # ventanas y no salta con los ajustes de NTP
+                    timestamped_data = {
+                        "sensor_name": self.name,
+                        "data": reading,
+                        "timestamp": timestamp,
+                        "sampled": sampled,
+                        "captured": captured,
+                    }
+                    self.submit(timestamped_data)
             except Exception as e:
                 logger.error(f"Error in {self.name} thread: {e}")
+            self.scheduler.wait()
 
     def stop(self):
         self.running = False
+        self._stopped.set()
         logger.info(f"Stopping {self.name} thread.")
 
 
-### I2C Service ###
-class I2CService:
-    MAX_RETRIES = 6
-    RETRY_DELAY = 0.1
-
-    def __init__(self, device_address=0x68):
-        self.device_address = device_address
-        self.bus = None
-        self.initialize_i2c()
-
-    def initialize_i2c(self):
-        for attempt in range(self.MAX_RETRIES):
-            try:
-                self.bus = smbus.SMBus(1)
-                self.MPU_Init()
-                logger.info("I2C bus initialized successfully.")
-                return
-            except OSError as e:
-                logger.error(f"Error initializing I2C bus (attempt {attempt + 1}): {e}")
-                time.sleep(self.RETRY_DELAY)
-        logger.error("Failed to initialize I2C bus after multiple attempts.")
-
-    def MPU_Init(self):
-        # Inicializar el MPU-6050
-        self.bus.write_byte_data(self.device_address, 0x19, 7)
-        self.bus.write_byte_data(self.device_address, 0x6B, 1)
-        self.bus.write_byte_data(self.device_address, 0x1A, 0)
-        self.bus.write_byte_data(self.device_address, 0x1B, 24)
-        self.bus.write_byte_data(self.device_address, 0x38, 1)
-
-    def read_raw_data(self, addr):
-        try:
-            high = self.bus.read_byte_data(self.device_address, addr)
-            low = self.bus.read_byte_data(self.device_address, addr + 1)
-            value = ((high << 8) | low)
-            return value - 65536 if value > 32768 else value
-        except OSError as e:
-            logger.error(f"Error reading raw data from I2C: {e}")
-            return 0
-
-
 ### GPS Service ###
 class GPSService:
-    def __init__(self, gps_port="/dev/ttyS0", gps_baudrate=115200, gps_timeout=1):
-        self.ser = serial.Serial(gps_port, baudrate=gps_baudrate, timeout=gps_timeout)
+    def __init__(self, backend: SensorBackend, gps_port="/dev/ttyS0", gps_baudrate=115200, gps_timeout=1):
+        self.backend = backend
+        self.gps_port = gps_port
+        self.gps_baudrate = gps_baudrate
+        self.gps_timeout = gps_timeout
+        # El puerto se abre en la primera lectura, desde el hilo del GPS
+        self.ser = None
         self.coordinates = {"latitude": 0.0, "longitude": 0.0}
         self.coordinates_valid = False
         self.coordinates_lock = threading.Lock()
 
     def read_gps_data(self):
         try:
+            if self.ser is None:
+                self.ser = self.backend.open_gps(self.gps_port, self.gps_baudrate, self.gps_timeout)
             newdata = self.ser.readline().decode("ascii", errors="replace").strip()
             if newdata.startswith("$GPRMC"):
                 newmsg = pynmea2.parse(newdata)
@@ -109,7 +102,7 @@ class GPSService:
                 else:
                     self.coordinates_valid = False
             return {"latitude": self.coordinates["latitude"], "longitude": self.coordinates["longitude"]}
-        except (serial.SerialException, pynmea2.ParseError, UnicodeDecodeError) as e:
+        except self.backend.gps_errors + (pynmea2.ParseError, UnicodeDecodeError) as e:
             logger.error(f"Error reading GPS data: {e}")
             return {"latitude": 16.73, "longitude": -93.08}
 
@@ -117,6 +110,11 @@ class GPSService:
         with self.coordinates_lock:
             self.coordinates = new_coordinates
 
+    def close(self):
+        if self.ser is not None:
+            self.ser.close()
+            self.ser = None
+
     async def get_current_coordinates_async(self):
         async with asyncio.Lock():
             with self.coordinates_lock:
@@ -127,51 +125,144 @@ class GPSService:
 class SensorService:
     G_FORCE_THRESHOLD = 3.5
 
-    def __init__(self):
-        self.i2c_service = I2CService()
-        self.vibration_sw420 = InputDevice(17)
-        self.shock_ky031 = InputDevice(27)
+    def __init__(self, backend: SensorBackend):
+        self.backend = backend
+        # GPIO_IMU_MODE=fifo: el MPU-6050 muestrea con su propio reloj (IMU_FIFO_RATE) y cada lectura vacía su FIFO
+        self.imu_mode = os.getenv('GPIO_IMU_MODE', 'poll').lower()
+        # Los dispositivos se abren en open(), al arrancar GpioService
+        self.i2c_service = None
+        self.vibration_sw420 = None
+        self.shock_ky031 = None
+        self.fifo = None
+
+    def open(self):
+        self.i2c_service = I2CService(bus_factory=self.backend.open_i2c_bus)
+        self.vibration_sw420 = self.backend.open_input(VIBRATION_PIN)
+        self.shock_ky031 = self.backend.open_input(SHOCK_PIN)
+        self.fifo = Mpu6050Fifo.from_env(self.i2c_service) if self.imu_mode == "fifo" else None
+
+    def close(self):
+        for device in (self.vibration_sw420, self.shock_ky031, self.i2c_service and self.i2c_service.bus):
+            if device is not None:
+                device.close()
+
+    def sample_rate_hz(self, poll_rate_hz: float) -> float:
+        # Frecuencia de las muestras del IMU: la del FIFO o la del hilo de lectura
+        return Mpu6050Fifo.rate_from_env() if self.imu_mode == "fifo" else poll_rate_hz
 
     def read_sensors(self):
+        if self.fifo is not None:
+            return self.read_fifo()
         try:
-            acc_x = self.i2c_service.read_raw_data(0x3B)
-            acc_y = self.i2c_service.read_raw_data(0x3D)
-            acc_z = self.i2c_service.read_raw_data(0x3F)
-            return {
-                "acc_x": acc_x / 16384.0,
-                "acc_y": acc_y / 16384.0,
-                "acc_z": acc_z / 16384.0,
-                "vibration": self.vibration_sw420.is_active,
-                "shock": self.shock_ky031.is_active,
-            }
+            # Una sola transacción I2C para acelerómetro, temperatura y giroscopio
+            raw = self.i2c_service.read_burst()
+            if raw is None:
+                return {}
+            sample = scale_sample(raw)
+            sample["vibration"] = self.vibration_sw420.is_active
+            sample["shock"] = self.shock_ky031.is_active
+            return sample
         except Exception as e:
             logger.error(f"Error reading sensors: {e}")
             return {}
 
+    def read_fifo(self):
+        try:
+            batch = self.fifo.read()
+            vibration, shock = self.vibration_sw420.is_active, self.shock_ky031.is_active
+            # Instante de pared de cada trama a partir de su marca en el reloj monótono del driver, que se conserva
+            now, monotonic_now = datetime.now(), time.monotonic()
+            return [
+                (
+                    now - timedelta(seconds=monotonic_now - timestamp),
+                    timestamp,
+                    {
+                        "acc_x": acc_x, "acc_y": acc_y, "acc_z": acc_z,
+                        "gyro_x": gyro_x, "gyro_y": gyro_y, "gyro_z": gyro_z,
+                        "vibration": vibration, "shock": shock,
+                    },
+                )
+                for (acc_x, acc_y, acc_z), (gyro_x, gyro_y, gyro_z), timestamp
+                in zip(batch.accel.tolist(), batch.gyro.tolist(), batch.timestamps.tolist())
+            ]
+        except Exception as e:
+            logger.error(f"Error reading sensor FIFO: {e}")
+            return []
+
 
 ### GPIO Service ###
 class GpioService:
-    def __init__(self):
-        self.data_queue = queue.Queue()
-        self.gps_service = GPSService()
-        self.sensor_service = SensorService()
-        self.rabbitmq_service = RabbitMQService()
-        self.database = DatabaseConnector()
+    """
+    Los hilos de sensores solo leen el hardware; cada lectura se entrega con loop.call_soon_threadsafe a una
+    asyncio.Queue que consume process_data como tarea del loop de la app, donde viven el pool de la base de
+    datos y el publicador de RabbitMQ. Con la cola llena se descarta la lectura más antigua.
+
+    Las muestras del IMU pasan por una etapa de agregación (GPIO_AGGREGATION=tumbling|sliding): por cada ventana
+    se publica un resumen sensor.summary y se inserta una fila en sensor_window_summaries. Las muestras crudas
+    solo se publican e insertan en acceleration y vibrations con GPIO_KEEP_RAW, durante una captura pedida con
+    capture_raw() o con GPIO_AGGREGATION=off.
+
+    La detección de choques (CRASH_DETECTION) corre en el hilo de sensores sobre cada muestra, antes de la cola:
+    un choque se publica como crash.detected directamente en el loop, sin esperar a las muestras encoladas.
+    """
+
+    def __init__(self, database: DatabaseConnector, batch_writer: BatchWriter, rabbitmq_service: RabbitMQService):
+        self.queue_size = int(os.getenv('GPIO_QUEUE_SIZE', '1000'))
+        # Frecuencia de muestreo y política de atraso por sensor: "sensor:hz[:skip|catch-up],..."
+        self.sensor_rates = parse_sensor_rates(
+            os.getenv('GPIO_SENSOR_RATES', 'sensors:200,gps:10'), os.getenv('GPIO_OVERRUN_POLICY', SKIP)
+        )
+        # Se crea en start(), dentro del loop que la consume
+        self.data_queue = None
+        # SENSOR_BACKEND=hardware|synthetic|replay; ningún dispositivo se abre hasta start()
+        self.backend = create_backend(os.getenv('SENSOR_BACKEND', 'hardware').lower())
+        self.gps_service = GPSService(self.backend)
+        self.sensor_service = SensorService(self.backend)
+        self.rabbitmq_service = rabbitmq_service
+        self.database = database
+        self.batch_writer = batch_writer
         self.threads = []
         self.running = False
+        self.loop = None
+        aggregation = os.getenv('GPIO_AGGREGATION', TUMBLING).lower()
+        self.aggregator = WindowAggregator.from_env(self.imu_rate()) if aggregation != "off" else None
+        # Conductor de la ventana en curso: al cambiar se cierra la ventana
+        self.summary_driver = None
+        self.keep_raw = os.getenv('GPIO_KEEP_RAW', 'false').lower() == 'true'
+        self.raw_until = None
+        self.crash_detector = CrashDetector.from_env() if os.getenv('CRASH_DETECTION', 'true').lower() == 'true' else None
+        self.crash_latency_target = float(os.getenv('CRASH_LATENCY_TARGET_MS', '100'))
+        # Últimos kit_id y driver_id conocidos: se refrescan en segundo plano cada GPIO_IDS_REFRESH segundos,
+        # las muestras y los choques nunca esperan a la base de datos
+        self.last_kit_id = None
+        self.last_driver_id = None
+        self.ids_refresh = float(os.getenv('GPIO_IDS_REFRESH', '5'))
+        self.ids_task = None
+        # Captura -> detección, detección -> publicación y detección -> confirmación del broker
+        self.crash_latency = {"detection": LatencyHistogram(), "publish": LatencyHistogram(), "confirm": LatencyHistogram()}
+        self.stats = {"received": 0, "processed": 0, "dropped": 0, "errors": 0, "max_depth": 0, "raw_samples": 0, "summaries": 0, "crashes": 0}
+        # Captura -> inicio del procesamiento, y duración del procesamiento de cada muestra
+        self.queue_latency = LatencyHistogram()
+        self.process_latency = LatencyHistogram()
 
     async def start(self, stop_event: threading.Event):
         try:
             self.running = True
+            self.loop = asyncio.get_running_loop()
+            self.data_queue = asyncio.Queue(self.queue_size)
+            await self.refresh_ids()
+            self.ids_task = asyncio.create_task(self.refresh_ids_loop())
+            # La inicialización del MPU-6050 reintenta con esperas: fuera del loop
+            await asyncio.to_thread(self.sensor_service.open)
             # Inicia los hilos
-            self.threads.append(SensorThread("gps", self.gps_service.read_gps_data, self.data_queue))
-            self.threads.append(SensorThread("sensors", self.sensor_service.read_sensors, self.data_queue))
+            self.threads.append(SensorThread("gps", self.gps_service.read_gps_data, self.submit, *self.rate_for("gps")))
+            self.threads.append(SensorThread("sensors", self.sensor_service.read_sensors, self.submit_sensor, *self.rate_for("sensors")))
             for thread in self.threads:
                 thread.start()
-
-            # Procesa los datos en el bucle asyncio
-            await asyncio.to_thread(self.process_data, stop_event)
             logger.info("GPIO service started.")
+
+            # Procesa los datos en el loop de la app
+            await self.process_data(stop_event)
         except Exception as e:
             logger.error(f"Error starting GPIO service: {e}")
 
@@ -179,85 +270,298 @@ class GpioService:
         self.running = False
         for thread in self.threads:
             thread.stop()
-            thread.join()
+            await asyncio.to_thread(thread.join)
+        if self.ids_task is not None:
+            self.ids_task.cancel()
+            self.ids_task = None
+        for service in (self.sensor_service, self.gps_service):
+            try:
+                service.close()
+            except Exception as e:
+                logger.error(f"Error closing sensors: {e}")
+        # La ventana incompleta se publica antes de cerrar RabbitMQ y la base de datos
+        if self.aggregator is not None and self.summary_driver is not None:
+            summary = self.aggregator.flush(time.monotonic(), datetime.now())
+            if summary is not None:
+                try:
+                    await self.emit_summary(summary, self.summary_driver)
+                except Exception as e:
+                    logger.error(f"Error emitting last sensor summary: {e}")
         logger.info("GPIO service stopped.")
 
-    def process_data(self, stop_event: threading.Event):
+    async def refresh_ids(self):
+        # get_kit_id y get_last_driver_id pasan por la caché de metadatos y devuelven None si la base falla:
+        # en ese caso se conservan los últimos ids conocidos
+        kit_id = await get_kit_id()
+        if kit_id is not None:
+            self.last_kit_id = kit_id
+        driver_id = await get_last_driver_id()
+        if driver_id is not None:
+            self.last_driver_id = driver_id
+
+    async def refresh_ids_loop(self):
+        while self.running:
+            await asyncio.sleep(self.ids_refresh)
+            try:
+                await self.refresh_ids()
+            except Exception as e:
+                logger.error(f"Error refreshing kit and driver ids: {e}")
+
+    def current_driver_id(self):
+        return current_driver.get_driver_id() if travel_state.get_travel_status() else self.last_driver_id
+
+    def rate_for(self, sensor_name):
+        return self.sensor_rates.get(sensor_name, (1.0, SKIP))
+
+    def imu_rate(self) -> float:
+        return self.sensor_service.sample_rate_hz(self.rate_for("sensors")[0])
+
+    def capture_raw(self, seconds: float = None):
+        # Publica e inserta también las muestras crudas durante seconds segundos (o hasta stop_raw_capture)
+        self.raw_until = time.monotonic() + seconds if seconds else float("inf")
+
+    def stop_raw_capture(self):
+        self.raw_until = None
+
+    def raw_enabled(self) -> bool:
+        if self.aggregator is None or self.keep_raw:
+            return True
+        return self.raw_until is not None and time.monotonic() < self.raw_until
+
+    def submit(self, data):
+        # Llamado desde los hilos de sensores
+        try:
+            self.loop.call_soon_threadsafe(self._put, data)
+        except RuntimeError:
+            # El loop ya se cerró (apagado de la app)
+            self.stats["dropped"] += 1
+
+    def submit_sensor(self, data):
+        # Llamado desde el hilo de sensores: la detección de choques no espera a la cola
+        if self.crash_detector is not None and data["data"]:
+            crash = self.crash_detector.update(data["data"], data["sampled"])
+            if crash is not None:
+                crash.update(detected=time.monotonic(), captured=data["captured"], datetime=data["timestamp"])
+                logger.warning(f"Crash detected: {crash['impact_force']:.2f} g, criteria {crash['criteria']}")
+                try:
+                    future = asyncio.run_coroutine_threadsafe(self.report_crash(crash), self.loop)
+                    future.add_done_callback(self._crash_reported)
+                except RuntimeError:
+                    logger.error("Crash detected after the event loop was closed")
+        self.submit(data)
+
+    def _crash_reported(self, future):
+        # Sin este callback un error de report_crash se perdería junto con el futuro
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Error reporting crash: {future.exception()}")
+
+    def _put(self, data):
+        if self.data_queue.full():
+            self.data_queue.get_nowait()
+            self.stats["dropped"] += 1
+        self.data_queue.put_nowait(data)
+        self.stats["received"] += 1
+        self.stats["max_depth"] = max(self.stats["max_depth"], self.data_queue.qsize())
+
+    async def process_data(self, stop_event: threading.Event):
         while not stop_event.is_set() and self.running:
             try:
-                data = self.data_queue.get(timeout=1)
+                data = await asyncio.wait_for(self.data_queue.get(), timeout=1)
+            except asyncio.TimeoutError:
+                continue
+            started = time.monotonic()
+            self.queue_latency.observe((started - data["captured"]) * 1000)
+            try:
                 if data["sensor_name"] == "gps":
-                    asyncio.run(self.process_gps_data(data["data"]))
+                    await self.process_gps_data(data["data"])
                 elif data["sensor_name"] == "sensors":
-                    asyncio.run(self.process_sensor_data(data["data"]))
-            except queue.Empty:
-                continue
+                    await self.process_sensor_data(data["data"], data["timestamp"], data["sampled"])
+                self.stats["processed"] += 1
             except Exception as e:
+                self.stats["errors"] += 1
                 logger.error(f"Error processing data: {e}")
-                
+            self.process_latency.observe((time.monotonic() - started) * 1000)
+
+    def get_stats(self) -> dict:
+        return dict(
+            self.stats,
+            depth=self.data_queue.qsize() if self.data_queue is not None else 0,
+            queue_latency=self.queue_latency.to_dict(),
+            process_latency=self.process_latency.to_dict(),
+            sampling={thread.name: thread.scheduler.get_stats() for thread in self.threads},
+            aggregation=self.aggregator.get_stats() if self.aggregator is not None else None,
+            raw_enabled=self.raw_enabled(),
+            backend=self.backend.name,
+            i2c=self.sensor_service.i2c_service.get_stats() if self.sensor_service.i2c_service is not None else None,
+            fifo=self.sensor_service.fifo.get_stats() if self.sensor_service.fifo is not None else None,
+            crash=dict(
+                self.crash_detector.get_stats(),
+                latency={name: histogram.to_dict() for name, histogram in self.crash_latency.items()},
+                latency_target_ms=self.crash_latency_target,
+            ) if self.crash_detector is not None else None,
+        )
+
+    async def report_crash(self, crash: dict):
+        self.crash_latency["detection"].observe((crash["detected"] - crash["captured"]) * 1000)
+        self.stats["crashes"] += 1
+        driver_id = self.current_driver_id()
+        kit_id = self.last_kit_id
+        coordinates = await self.gps_service.get_current_coordinates_async()
+        crash_model = CrashModel(
+            kit_id=str(kit_id),
+            driver_id=str(driver_id),
+            datetime=crash["datetime"],
+            impact_force=crash["impact_force"],
+            crash_coordinates=f"POINT({coordinates['longitude']} {coordinates['latitude']})",
+        )
+        message = dict(
+            crash_controller.create_crash_message(crash_model),
+            max_jerk=crash["max_jerk"],
+            shock_edges=crash["shock_edges"],
+            criteria=crash["criteria"],
+        )
+
+        try:
+            # Directo al transporte: no espera detrás de los mensajes ya encolados
+            confirmation = await self.rabbitmq_service.publish(message, "crash.detected")
+        except Exception as e:
+            logger.error(f"Error publishing crash.detected, queueing it: {e}")
+            await self.rabbitmq_service.enqueue(message, "crash.detected")
+            confirmation = None
+        if confirmation is not None:
+            published = (time.monotonic() - crash["detected"]) * 1000
+            self.crash_latency["publish"].observe(published)
+            if published > self.crash_latency_target:
+                logger.warning(f"crash.detected published {published:.1f} ms after detection (target {self.crash_latency_target:g} ms)")
+            try:
+                await confirmation
+                self.crash_latency["confirm"].observe((time.monotonic() - crash["detected"]) * 1000)
+            except Exception as e:
+                # Con spool el mensaje ya quedó guardado para reenviarse; sin spool se reintenta desde la cola
+                if self.rabbitmq_service.spool is None:
+                    await self.rabbitmq_service.enqueue(message, "crash.detected")
+                logger.error(f"crash.detected was not confirmed: {e}")
+
+        # Por el batch writer: si la base de datos no responde la fila queda en el outbox
+        self.batch_writer.add("crashes", (
+            crash_model.kit_id,
+            crash_model.driver_id,
+            crash_model.datetime,
+            crash_model.impact_force,
+            crash_model.crash_coordinates,
+        ))
+        try:
+            await self.batch_writer.flush(["crashes"])
+        except Exception as e:
+            logger.error(f"Error saving crash data: {e}")
+
     async def process_gps_data(self, gps_data):
         try:
-            driver_id = await get_last_driver_id() if not travel_state.get_travel_status() else current_driver.get_driver_id()
+            driver_id = self.current_driver_id()
             coordinates = gps_data
             lat, lon = coordinates["latitude"], coordinates["longitude"]
             coordinates_str = f"{lat},{lon}"
 
-            # Crear el mensaje
-            message = json.dumps({
-                "kit_id": await get_kit_id(),
-                "driver_id": driver_id,
+            # Crear la muestra
+            sample = {
                 "datetime": datetime.now().isoformat(),
                 "coordinates": coordinates_str,
-            })
+            }
 
-            # Enviar a RabbitMQ
-            await self.rabbitmq_service.send_message(message, "geolocation.update")
-            logger.info(f"GPS data sent to RabbitMQ: {message}")
+            kit_id = self.last_kit_id
+
+            # Se agrupa con las siguientes muestras en un solo mensaje de RabbitMQ
+            await self.rabbitmq_service.add_sample("geolocation.update", sample, kit_id=kit_id, driver_id=driver_id)
+            logger.debug(f"GPS data queued for RabbitMQ: {sample}")
         except Exception as e:
             logger.error(f"Error processing GPS data: {e}")
 
-    async def process_sensor_data(self, sensor_data):
+    async def process_sensor_data(self, sensor_data, timestamp: datetime = None, sampled: float = None):
         try:
-            driver_id = await get_last_driver_id() if not travel_state.get_travel_status() else current_driver.get_driver_id()
-            
-            # Crear modelo para RabbitMQ
-            driving_model = DrivingRequestModel(
-                datetime=datetime.now(),
-                acceleration=sensor_data.get("acc_x", 0),
-                deceleration=sensor_data.get("acc_y", 0),
-                vibrations=int(sensor_data.get("vibration", False)),
-                inclination_angle=0,
-                angular_velocity=0,
-                g_force_x=sensor_data.get("acc_x", 0),
-                g_force_y=sensor_data.get("acc_y", 0),
-            )
-
-            # Convertir el modelo a dict y serializar datetime a string
-            driving_model_dict = driving_model.dict()
-            driving_model_dict["datetime"] = driving_model.datetime.isoformat()
-
-            # Enviar a RabbitMQ
-            await self.rabbitmq_service.send_message(json.dumps(driving_model_dict), "sensor.update")
-            logger.info(f"Sensor data sent to RabbitMQ: {driving_model_dict}")
-
-            # Guardar en la base de datos
-            await self.database.query_post(
-                """
-                INSERT INTO acceleration (kit_id, driver_id, date, data_acceleration, data_desacceleration, vibrations)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                """,
-                (
-                    1,  # kit_id
-                    driver_id,
-                    driving_model.datetime,  # Este datetime se inserta sin cambios
-                    driving_model.acceleration,
-                    driving_model.deceleration,
-                    driving_model.vibrations,
-                ),
-            )
-            
-            logger.info("Sensor data saved to database.")
+            driver_id = self.current_driver_id()
+            timestamp = timestamp or datetime.now()
+            sampled = sampled if sampled is not None else time.monotonic()
+
+            if self.aggregator is not None and sensor_data:
+                await self.aggregate_sensor_data(sensor_data, timestamp, sampled, driver_id)
+            if self.raw_enabled():
+                await self.store_raw_sensor_data(sensor_data, timestamp, driver_id)
         except Exception as e:
             logger.error(f"Error processing sensor data: {e}")
 
-gpio_service = GpioService()
\ No newline at end of file
+    async def aggregate_sensor_data(self, sensor_data, timestamp: datetime, sampled: float, driver_id):
+        # Las ventanas se cortan con el instante monótono; la hora de pared solo etiqueta el resumen
+        if self.summary_driver is not None and driver_id != self.summary_driver:
+            # La ventana en curso pertenece al conductor anterior
+            summary = self.aggregator.flush(sampled, timestamp)
+            if summary is not None:
+                await self.emit_summary(summary, self.summary_driver)
+        self.summary_driver = driver_id
+        for summary in self.aggregator.add(sensor_data, sampled, timestamp):
+            await self.emit_summary(summary, driver_id)
+
+    async def emit_summary(self, summary: dict, driver_id):
+        kit_id = self.last_kit_id
+        await self.rabbitmq_service.enqueue(dict(summary, kit_id=kit_id, driver_id=driver_id), "sensor.summary")
+
+        # Los resúmenes van solo a sensor_window_summaries: acceleration y vibrations guardan muestras crudas,
+        # que son las que agregan los rollups
+        harsh_events = sum(count for name, count in summary["events"].items() if name not in ("vibrations", "shocks"))
+        self.batch_writer.add("sensor_window_summaries", (
+            kit_id,
+            driver_id,
+            summary["window_start"],
+            summary["window_end"],
+            summary["mode"],
+            summary["count"],
+            harsh_events,
+            json.dumps(summary["metrics"]),
+            json.dumps(summary["events"]),
+        ))
+        self.stats["summaries"] += 1
+        logger.debug(f"Sensor summary queued: {summary['count']} samples, events {summary['events']}")
+
+    async def store_raw_sensor_data(self, sensor_data, timestamp: datetime, driver_id):
+        # Crear modelo para RabbitMQ
+        driving_model = DrivingRequestModel(
+            datetime=timestamp,
+            acceleration=sensor_data.get("acc_x", 0),
+            deceleration=sensor_data.get("acc_y", 0),
+            vibrations=int(sensor_data.get("vibration", False)),
+            inclination_angle=0,
+            angular_velocity=0,
+            g_force_x=sensor_data.get("acc_x", 0),
+            g_force_y=sensor_data.get("acc_y", 0),
+        )
+
+        # Convertir el modelo a dict y serializar datetime a string
+        driving_model_dict = driving_model.dict()
+        driving_model_dict["datetime"] = driving_model.datetime.isoformat()
+
+        # Se agrupa con las siguientes muestras en un solo mensaje de RabbitMQ
+        await self.rabbitmq_service.add_sample("sensor.update", driving_model_dict, kit_id=self.last_kit_id, driver_id=driver_id)
+        logger.debug(f"Sensor data queued for RabbitMQ: {driving_model_dict}")
+
+        # Encolar en el buffer write-behind; se inserta por lotes
+        self.batch_writer.add("acceleration", (
+            1,  # kit_id
+            driver_id,
+            driving_model.datetime,  # Este datetime se inserta sin cambios
+            driving_model.acceleration,
+            driving_model.deceleration,
+            driving_model.inclination_angle,
+            driving_model.angular_velocity,
+            driving_model.g_force_x,
+            driving_model.g_force_y,
+        ))
+        self.batch_writer.add("vibrations", (
+            1,  # kit_id
+            driver_id,
+            driving_model.datetime,
+            driving_model.vibrations,
+        ))
+
+        self.stats["raw_samples"] += 1
+        logger.debug("Sensor data queued for database.")
+
+gpio_service = GpioService(database_connector, batch_writer, rabbitmq_service)
\ No newline at end of file
@@ -7,7 +7,6 @@ import threading
 import serial
 import pynmea2
 from gpiozero import InputDevice
-from statistics import mean, StatisticsError
 import smbus
 from database.connector import DatabaseConnector
 from services.rabbitmq_service import RabbitMQService
@@ -18,6 +17,7 @@ from driving.controllers import driving_controller
 from crash.controllers import crash_controller
 from utils.travel_state import travel_state
 from utils.current_driver import current_driver
+from utils.ring_buffer import DRIVING_CHANNELS, RingBuffer, driving_averages
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -106,6 +106,7 @@ class GPSService:
 class SensorService:
     G_FORCE_THRESHOLD = 3.5
     DEBOUNCE_TIME = 100
+    BUFFER_CAPACITY = 30 * 100  # 30 s a 100 Hz
 
     def __init__(self):
         self.vibration_sw420 = InputDevice(17)
@@ -114,7 +115,8 @@ class SensorService:
         self.vibrations = 0
         self.shocks = 0
         self.last_shock_time = self.millis()
-        self.data_buffer = []
+        # Arreglo preasignado: la memoria no crece con la frecuencia de muestreo
+        self.data_buffer = RingBuffer(self.BUFFER_CAPACITY, DRIVING_CHANNELS)
 
     def read_sensors_loop(self, running):
         while running:
@@ -200,24 +202,7 @@ class SensorService:
         }
 
     def calculate_averages(self):
-        if not self.data_buffer:
-            return None
-
-        try:
-            avg_data = {
-                "acceleration": mean([d['acc_x'] for d in self.data_buffer if d['acc_x'] > 0]) if [d['acc_x'] for d in self.data_buffer if d['acc_x'] > 0] else 0,
-                "deceleration": abs(mean([d['acc_x'] for d in self.data_buffer if d['acc_x'] < 0])) if [d['acc_x'] for d in self.data_buffer if d['acc_x'] < 0] else 0,
-                "vibrations": sum(d['vibrations'] for d in self.data_buffer),
-                "inclination_angle": mean([d['angle'] for d in self.data_buffer]) if [d['angle'] for d in self.data_buffer] else 0,
-                "angular_velocity": mean([d['gyro_x'] for d in self.data_buffer]) if [d['gyro_x'] for d in self.data_buffer] else 0,
-                "g_force_x": mean([d['g_force_x'] for d in self.data_buffer]) if [d['g_force_x'] for d in self.data_buffer] else 0,
-                "g_force_y": mean([d['g_force_y'] for d in self.data_buffer]) if [d['g_force_y'] for d in self.data_buffer] else 0,
-            }
-        except StatisticsError as e:
-            logger.error(f"Statistics error when calculating averages: {e}")
-            return None
-
-        return avg_data
+        return driving_averages(self.data_buffer)
 
     def calculate_g_force(self, x, y, z):
         return (x ** 2 + y ** 2 + z ** 2) ** 0.5
@@ -328,7 +313,7 @@ class GpioService:
         avg_data = self.sensor_service.calculate_averages()
         if avg_data:
             await self.send_driving_data(avg_data)
-        self.sensor_service.data_buffer = []
+        self.sensor_service.data_buffer.clear()
 
     async def send_driving_data(self, data):
         driving_model = DrivingRequestModel(
@@ -0,0 +1,145 @@
+import os
+import time
+import struct
+import logging
+from collections import namedtuple
+from dotenv import load_dotenv
+
+load_dotenv('local.env')
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Registros del MPU-6050
+SMPLRT_DIV = 0x19
+CONFIG = 0x1A
+GYRO_CONFIG = 0x1B
+INT_ENABLE = 0x38
+ACCEL_XOUT_H = 0x3B
+GYRO_XOUT_H = 0x43
+PWR_MGMT_1 = 0x6B
+
+# 0x3B-0x48: acelerómetro, temperatura y giroscopio, 7 palabras de 16 bits big-endian
+BURST_LENGTH = 14
+BURST_FORMAT = struct.Struct(">7h")
+
+# Escalas con la configuración de MPU_Init: ±2 g y ±2000 °/s
+ACCEL_LSB_PER_G = 16384.0
+GYRO_LSB_PER_DPS = 16.4
+
+RawSample = namedtuple("RawSample", ["acc_x", "acc_y", "acc_z", "temperature", "gyro_x", "gyro_y", "gyro_z"])
+
+def decode_burst(block) -> RawSample:
+    return RawSample(*BURST_FORMAT.unpack(bytes(block)))
+
+def scale_sample(raw: RawSample) -> dict:
+    return {
+        "acc_x": raw.acc_x / ACCEL_LSB_PER_G,
+        "acc_y": raw.acc_y / ACCEL_LSB_PER_G,
+        "acc_z": raw.acc_z / ACCEL_LSB_PER_G,
+        "gyro_x": raw.gyro_x / GYRO_LSB_PER_DPS,
+        "gyro_y": raw.gyro_y / GYRO_LSB_PER_DPS,
+        "gyro_z": raw.gyro_z / GYRO_LSB_PER_DPS,
+        "temperature": raw.temperature / 340.0 + 36.53,
+    }
+
+def open_smbus(bus_number: int):
+    # Import diferido: smbus solo existe en el kit
+    import smbus
+    return smbus.SMBus(bus_number)
+
+class I2CService:
+    """
+    Acceso al MPU-6050. read_burst() lee los 14 registros de datos en una sola transacción
+    read_i2c_block_data; ante un error reintenta y, desde el segundo fallo, reinicializa el bus.
+    bus_factory permite usar MockSMBus fuera del kit.
+    """
+
+    MAX_RETRIES = 6
+    RETRY_DELAY = 0.1
+    # Fallos seguidos de una lectura a partir de los cuales se reabre el bus y se reconfigura el sensor
+    REINIT_AFTER = 2
+
+    def __init__(self, device_address=0x68, bus_factory=None, bus_number: int = None):
+        self.device_address = device_address
+        self.bus_factory = bus_factory or open_smbus
+        self.bus_number = bus_number if bus_number is not None else int(os.getenv('I2C_BUS', '1'))
+        self.bus = None
+        self.stats = {"reads": 0, "errors": 0, "retries": 0, "reinits": 0, "failed_reads": 0}
+        self.initialize_i2c()
+
+    def initialize_i2c(self):
+        for attempt in range(self.MAX_RETRIES):
+            try:
+                self.bus = self.bus_factory(self.bus_number)
+                self.MPU_Init()
+                logger.info("I2C bus initialized successfully.")
+                return True
+            except OSError as e:
+                logger.error(f"Error initializing I2C bus (attempt {attempt + 1}): {e}")
+                time.sleep(self.RETRY_DELAY)
+        self.bus = None
+        logger.error("Failed to initialize I2C bus after multiple attempts.")
+        return False
+
+    def MPU_Init(self):
+        # Inicializar el MPU-6050
+        self.bus.write_byte_data(self.device_address, SMPLRT_DIV, 7)
+        self.bus.write_byte_data(self.device_address, PWR_MGMT_1, 1)
+        self.bus.write_byte_data(self.device_address, CONFIG, 0)
+        self.bus.write_byte_data(self.device_address, GYRO_CONFIG, 24)
+        self.bus.write_byte_data(self.device_address, INT_ENABLE, 1)
+
+    def close_bus(self):
+        # Cierra el descriptor del bus antes de soltarlo; la siguiente lectura lo reabre
+        close = getattr(self.bus, "close", None)
+        if close is not None:
+            try:
+                close()
+            except OSError:
+                pass
+        self.bus = None
+
+    def _reinitialize(self):
+        self.stats["reinits"] += 1
+        self.close_bus()
+        return self.initialize_i2c()
+
+    def read_burst(self) -> RawSample:
+        """
+        Devuelve las 7 lecturas crudas (acelerómetro, temperatura, giroscopio) de una sola transacción,
+        o None si el sensor no responde tras MAX_RETRIES intentos.
+        """
+        for attempt in range(self.MAX_RETRIES):
+            if self.bus is None and not self._reinitialize():
+                break
+            try:
+                block = self.bus.read_i2c_block_data(self.device_address, ACCEL_XOUT_H, BURST_LENGTH)
+                if len(block) != BURST_LENGTH:
+                    raise OSError(f"Short I2C block read: {len(block)} of {BURST_LENGTH} bytes")
+                self.stats["reads"] += 1
+                return decode_burst(block)
+            except OSError as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Error in I2C burst read (attempt {attempt + 1}): {e}")
+                if attempt + 1 >= self.REINIT_AFTER and not self._reinitialize():
+                    break
+                self.stats["retries"] += 1
+                time.sleep(self.RETRY_DELAY)
+        self.stats["failed_reads"] += 1
+        logger.error("I2C burst read failed after multiple attempts.")
+        return None
+
+    def read_raw_data(self, addr):
+        # Lectura de un solo registro de 16 bits (dos transacciones); las muestras usan read_burst()
+        try:
+            high = self.bus.read_byte_data(self.device_address, addr)
+            low = self.bus.read_byte_data(self.device_address, addr + 1)
+            value = ((high << 8) | low)
+            return value - 65536 if value >= 32768 else value
+        except (OSError, AttributeError) as e:
+            logger.error(f"Error reading raw data from I2C: {e}")
+            return 0
+
+    def get_stats(self) -> dict:
+        return dict(self.stats)
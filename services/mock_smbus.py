@@ -0,0 +1,161 @@
+import time
+import struct
+from services.i2c_service import ACCEL_LSB_PER_G, ACCEL_XOUT_H, GYRO_LSB_PER_DPS, GYRO_XOUT_H
+
+class MockSMBus:
+    """
+    SMBus simulado con la interfaz de smbus.SMBus para probar el MPU-6050 fuera del kit.
+    Cada dispositivo es un banco de 256 registros; set_motion() escribe una muestra en 0x3B-0x48.
+    fail_next() inyecta errores de E/S y transaction_delay simula el tiempo de cada transacción en el bus.
+    """
+
+    def __init__(self, bus_number: int = 1, device_address: int = 0x68, transaction_delay: float = 0.0):
+        self.bus_number = bus_number
+        self.registers = {device_address: bytearray(256)}
+        self.transaction_delay = transaction_delay
+        self.transactions = 0
+        self.failures = 0
+        self.closed = False
+        self.set_motion()
+
+    def set_motion(self, acc=(0.0, 0.0, 1.0), gyro=(0.0, 0.0, 0.0), temperature=25.0, device_address: int = 0x68):
+        # Valores físicos (g, °/s, °C) convertidos a los registros crudos del sensor
+        registers = self.registers[device_address]
+        raw_acc = [round(value * ACCEL_LSB_PER_G) for value in acc]
+        raw_gyro = [round(value * GYRO_LSB_PER_DPS) for value in gyro]
+        raw_temperature = round((temperature - 36.53) * 340)
+        clamp = lambda value: max(-32768, min(32767, value))
+        registers[ACCEL_XOUT_H:ACCEL_XOUT_H + 8] = struct.pack(">4h", *map(clamp, raw_acc + [raw_temperature]))
+        registers[GYRO_XOUT_H:GYRO_XOUT_H + 6] = struct.pack(">3h", *map(clamp, raw_gyro))
+
+    def fail_next(self, count: int = 1):
+        self.failures += count
+
+    def _transaction(self, address: int):
+        if self.closed:
+            raise OSError(9, "Bad file descriptor")
+        self.transactions += 1
+        if self.transaction_delay:
+            time.sleep(self.transaction_delay)
+        if self.failures:
+            self.failures -= 1
+            raise OSError(121, "Remote I/O error")
+        if address not in self.registers:
+            raise OSError(121, "Remote I/O error")
+        return self.registers[address]
+
+    def write_byte_data(self, address: int, register: int, value: int):
+        self._transaction(address)[register] = value & 0xFF
+
+    def read_byte_data(self, address: int, register: int) -> int:
+        return self._transaction(address)[register]
+
+    def read_i2c_block_data(self, address: int, register: int, length: int = 32) -> list:
+        registers = self._transaction(address)
+        return list(registers[register:register + length])
+
+    def write_i2c_block_data(self, address: int, register: int, values: list):
+        registers = self._transaction(address)
+        registers[register:register + len(values)] = bytes(values)
+
+    def open(self, bus_number: int):
+        self.bus_number = bus_number
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def factory(self):
+        # bus_factory para I2CService: cada reinicialización reabre este mismo bus simulado
+        def open_bus(bus_number: int):
+            self.open(bus_number)
+            return self
+        return open_bus
+
+class SimulatedMpu6050(MockSMBus):
+    """
+    MockSMBus con el FIFO del MPU-6050: genera tramas con el reloj dado según SMPLRT_DIV, CONFIG y FIFO_EN,
+    las guarda en un FIFO de 1024 bytes y las entrega por FIFO_R_W. Al desbordarse se pierden los bytes más
+    antiguos (no tramas enteras), como en el sensor, y se activa INT_STATUS.FIFO_OFLOW.
+    motion(t) puede devolver (acc, gyro) para cada instante, también en lecturas sin FIFO; sin él se repite la
+    muestra de set_motion().
+    """
+
+    # Orden de los bloques en el FIFO: (bit de FIFO_EN, registro inicial, bytes)
+    FIFO_SOURCES = ((0x08, ACCEL_XOUT_H, 6), (0x80, ACCEL_XOUT_H + 6, 2), (0x40, GYRO_XOUT_H, 2),
+                    (0x20, GYRO_XOUT_H + 2, 2), (0x10, GYRO_XOUT_H + 4, 2))
+
+    def __init__(self, bus_number: int = 1, device_address: int = 0x68, clock=time.monotonic, motion=None,
+                 transaction_delay: float = 0.0):
+        self.device_address = device_address
+        self.clock = clock
+        self.motion = motion
+        self.fifo = bytearray()
+        self.last_sample = None
+        self.overflowed = False
+        super().__init__(bus_number, device_address, transaction_delay)
+
+    def sample_rate(self) -> float:
+        registers = self.registers[self.device_address]
+        gyro_hz = 8000 if registers[0x1A] & 0x07 in (0, 7) else 1000
+        return gyro_hz / (1 + registers[0x19])
+
+    def _advance(self):
+        registers = self.registers[self.device_address]
+        now = self.clock()
+        if not registers[0x6A] & 0x40 or not registers[0x23]:
+            # Sin FIFO los registros de datos siguen a motion(t) en cada transacción
+            if self.motion is not None:
+                acc, gyro = self.motion(now)
+                self.set_motion(acc, gyro, device_address=self.device_address)
+            self.last_sample = now
+            return
+        period = 1 / self.sample_rate()
+        if self.last_sample is None:
+            self.last_sample = now
+        while self.last_sample + period <= now:
+            self.last_sample += period
+            if self.motion is not None:
+                acc, gyro = self.motion(self.last_sample)
+                self.set_motion(acc, gyro, device_address=self.device_address)
+            for bit, start, size in self.FIFO_SOURCES:
+                if registers[0x23] & bit:
+                    self.fifo += registers[start:start + size]
+            if len(self.fifo) > 1024:
+                del self.fifo[:len(self.fifo) - 1024]
+                self.overflowed = True
+
+    def _transaction(self, address: int):
+        registers = super()._transaction(address)
+        if address == self.device_address:
+            self._advance()
+            count = len(self.fifo)
+            registers[0x72], registers[0x73] = count >> 8, count & 0xFF
+            registers[0x3A] = 0x10 if self.overflowed else 0
+        return registers
+
+    def write_byte_data(self, address: int, register: int, value: int):
+        super().write_byte_data(address, register, value)
+        if address == self.device_address and register == 0x6A and value & 0x04:
+            # FIFO_RESET se borra solo una vez vaciado el FIFO
+            self.fifo.clear()
+            self.overflowed = False
+            self.registers[address][0x6A] = value & ~0x04
+
+    def _read_register(self, address: int, register: int, length: int) -> list:
+        registers = self._transaction(address)
+        if address == self.device_address and register == 0x74:
+            # FIFO_R_W no avanza de registro: cada byte leído sale del FIFO
+            data = self.fifo[:length]
+            del self.fifo[:length]
+            return list(data) + [0] * (length - len(data))
+        data = list(registers[register:register + length])
+        if address == self.device_address and register <= 0x3A < register + length:
+            self.overflowed = False  # leer INT_STATUS borra los flags
+        return data
+
+    def read_byte_data(self, address: int, register: int) -> int:
+        return self._read_register(address, register, 1)[0]
+
+    def read_i2c_block_data(self, address: int, register: int, length: int = 32) -> list:
+        return self._read_register(address, register, length)
@@ -1,17 +1,25 @@
 import threading
 import asyncio
-import pandas as pd
 from sklearn.cluster import DBSCAN
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import StandardScaler
 import logging
 from database.connector import DatabaseConnector
+from database.streaming import fetch_frame
 
 # Configuración del logger
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Columnas leídas de travels y su dtype; las coordenadas se guardan como POINT(lon lat)
+TRAVEL_COLUMNS = {
+    "start_hour": "datetime64[us]",
+    "start_latitude": "float64",
+    "start_longitude": "float64",
+    "distance_mts": "float64",
+}
+
 # Buffer para almacenar los modelos generados
 model_buffer = {}
 
@@ -25,8 +33,9 @@ class ConstantModel:
 
 # Hilo productor: Genera modelos cada 3 minutos
 class ModelGenerator:
-    def __init__(self, db_connector: DatabaseConnector, stop_event: threading.Event, interval=180):
+    def __init__(self, db_connector: DatabaseConnector, stop_event: threading.Event, interval=180, chunk_size=5000):
         self.interval = interval
+        self.chunk_size = chunk_size
         self.running = False
         self.db_connector = db_connector
         self.stop_event = stop_event
@@ -47,27 +56,20 @@ class ModelGenerator:
 
     async def generate_models(self):
         query = '''
-        SELECT driver_id, date, start_hour, start_coordinates, end_coordinates, duration, distance_mts
+        SELECT start_hour, ST_Y(start_coordinates) AS start_latitude, ST_X(start_coordinates) AS start_longitude, distance_mts
         FROM travels
         '''
         try:
-            # Cargar datos desde la base de datos
-            results = await self.db_connector.query_get(query)
-            df = pd.DataFrame(results)
+            # Cargar datos por bloques directamente en columnas NumPy
+            df = await fetch_frame(self.db_connector, query, TRAVEL_COLUMNS, chunk_size=self.chunk_size)
 
             if df.empty:
                 logger.warning("No data retrieved from database.")
                 return
 
-            # Convertir las coordenadas a formato adecuado
-            df['start_latitude'] = df['start_coordinates'].apply(lambda x: x[1])
-            df['start_longitude'] = df['start_coordinates'].apply(lambda x: x[0])
-            df['end_latitude'] = df['end_coordinates'].apply(lambda x: x[1])
-            df['end_longitude'] = df['end_coordinates'].apply(lambda x: x[0])
-
             # Añadir columnas de hora y día de la semana
-            df['hour'] = pd.to_datetime(df['start_hour']).dt.hour
-            df['day_of_week'] = pd.to_datetime(df['start_hour']).dt.dayofweek
+            df['hour'] = df['start_hour'].dt.hour
+            df['day_of_week'] = df['start_hour'].dt.dayofweek
 
             # Definir los límites de los cuadrantes
             latitude_mid = df['start_latitude'].mean()
@@ -0,0 +1,154 @@
+import os
+import time
+import logging
+from collections import namedtuple
+import numpy as np
+from dotenv import load_dotenv
+from services.i2c_service import (
+    ACCEL_LSB_PER_G, CONFIG, GYRO_CONFIG, GYRO_LSB_PER_DPS, INT_ENABLE, PWR_MGMT_1, SMPLRT_DIV, I2CService,
+)
+
+load_dotenv('local.env')
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Registros del FIFO del MPU-6050
+FIFO_EN = 0x23
+INT_STATUS = 0x3A
+USER_CTRL = 0x6A
+FIFO_COUNT_H = 0x72
+FIFO_R_W = 0x74
+
+FIFO_ACCEL_GYRO = 0x78   # XG, YG, ZG y ACCEL: 12 bytes por trama, sin temperatura
+USER_CTRL_FIFO_EN = 0x40
+USER_CTRL_FIFO_RESET = 0x04
+FIFO_OFLOW_INT = 0x10
+
+FIFO_SIZE = 1024
+FRAME_BYTES = 12
+# smbus limita read_i2c_block_data a 32 bytes: se leen tramas enteras, 2 por transacción
+MAX_BLOCK = 32
+CHUNK_BYTES = MAX_BLOCK // FRAME_BYTES * FRAME_BYTES
+
+# Con el DLPF activo (CONFIG=1) el giroscopio se muestrea a 1 kHz; el FIFO se llena a 1 kHz / (1 + SMPLRT_DIV)
+GYRO_OUTPUT_HZ = 1000
+DLPF_188HZ = 1
+
+FRAME_DTYPE = np.dtype(">i2")
+
+# accel y gyro: arreglos (n, 3) en g y °/s; timestamps: reloj monótono estimado de cada trama
+FifoBatch = namedtuple("FifoBatch", ["accel", "gyro", "timestamps", "overflowed"])
+
+def decode_frames(data: bytes) -> tuple:
+    # n tramas de 6 palabras big-endian (ax, ay, az, gx, gy, gz) -> (accel, gyro) escalados
+    raw = np.frombuffer(data, dtype=FRAME_DTYPE).reshape(-1, 6)
+    return raw[:, :3] / ACCEL_LSB_PER_G, raw[:, 3:] / GYRO_LSB_PER_DPS
+
+def empty_batch(overflowed: bool = False) -> FifoBatch:
+    return FifoBatch(np.empty((0, 3)), np.empty((0, 3)), np.empty(0), overflowed)
+
+class Mpu6050Fifo:
+    """
+    Lectura del MPU-6050 en modo FIFO sobre I2CService: el sensor muestrea a sample_rate_hz con su propio reloj
+    y read() vacía las tramas completas acumuladas, en bloques de CHUNK_BYTES. Si el FIFO se desborda
+    (INT_STATUS.FIFO_OFLOW) o su cuenta no es múltiplo de la trama, se pierde la alineación: se reinicia el FIFO
+    y se descartan los datos pendientes.
+    """
+
+    def __init__(self, i2c_service: I2CService, sample_rate_hz: float = 500, clock=time.monotonic):
+        if not 4 <= sample_rate_hz <= GYRO_OUTPUT_HZ:
+            raise ValueError(f"FIFO sample rate must be between 4 and {GYRO_OUTPUT_HZ} Hz, got {sample_rate_hz}")
+        self.i2c = i2c_service
+        self.divider = round(GYRO_OUTPUT_HZ / sample_rate_hz) - 1
+        self.sample_rate_hz = GYRO_OUTPUT_HZ / (1 + self.divider)
+        self.clock = clock
+        self.enabled = False
+        self.stats = {"reads": 0, "frames": 0, "transactions": 0, "overflows": 0, "misaligned": 0, "resets": 0, "errors": 0}
+
+    @classmethod
+    def from_env(cls, i2c_service: I2CService):
+        return cls(i2c_service, float(os.getenv('IMU_FIFO_RATE', '500')))
+
+    @classmethod
+    def rate_from_env(cls) -> float:
+        # Frecuencia efectiva de IMU_FIFO_RATE (1 kHz / (1 + SMPLRT_DIV)) sin abrir el bus
+        return cls(None, float(os.getenv('IMU_FIFO_RATE', '500'))).sample_rate_hz
+
+    def _write(self, register, value):
+        self.i2c.bus.write_byte_data(self.i2c.device_address, register, value)
+
+    def _read(self, register, length=1):
+        self.stats["transactions"] += 1
+        return self.i2c.bus.read_i2c_block_data(self.i2c.device_address, register, length)
+
+    def enable(self):
+        # Misma configuración que MPU_Init, con el DLPF activo para que el divisor cuente sobre 1 kHz
+        self._write(PWR_MGMT_1, 1)
+        self._write(CONFIG, DLPF_188HZ)
+        self._write(SMPLRT_DIV, self.divider)
+        self._write(GYRO_CONFIG, 24)
+        self._write(INT_ENABLE, FIFO_OFLOW_INT)
+        self._write(FIFO_EN, FIFO_ACCEL_GYRO)
+        self.reset()
+        self.enabled = True
+        logger.info(f"MPU-6050 FIFO enabled at {self.sample_rate_hz:g} Hz.")
+
+    def disable(self):
+        if self.i2c.bus is not None:
+            self._write(FIFO_EN, 0)
+            self._write(USER_CTRL, 0)
+        self.enabled = False
+
+    def reset(self):
+        # Vacía el FIFO y vuelve a habilitarlo; la siguiente trama empieza alineada
+        self._write(USER_CTRL, 0)
+        self._write(USER_CTRL, USER_CTRL_FIFO_RESET)
+        self._write(USER_CTRL, USER_CTRL_FIFO_EN)
+        self._read(INT_STATUS)  # leer INT_STATUS borra el flag de desbordamiento
+        self.stats["resets"] += 1
+
+    def read(self) -> FifoBatch:
+        """
+        Devuelve las tramas acumuladas desde la última lectura. Tras un desbordamiento devuelve un lote vacío
+        con overflowed=True.
+        """
+        try:
+            if not self.enabled or self.i2c.bus is None:
+                if self.i2c.bus is None and not self.i2c.initialize_i2c():
+                    return empty_batch()
+                self.enable()
+            self.stats["reads"] += 1
+            status = self._read(INT_STATUS)[0]
+            high, low = self._read(FIFO_COUNT_H, 2)
+            count = (high << 8) | low
+            if status & FIFO_OFLOW_INT or count >= FIFO_SIZE:
+                self.stats["overflows"] += 1
+                logger.warning(f"MPU-6050 FIFO overflow ({count} bytes), resynchronizing")
+                self.reset()
+                return empty_batch(overflowed=True)
+            if count % FRAME_BYTES:
+                self.stats["misaligned"] += 1
+                logger.warning(f"MPU-6050 FIFO count {count} is not a multiple of {FRAME_BYTES}, resynchronizing")
+                self.reset()
+                return empty_batch(overflowed=True)
+            read_at = self.clock()
+            data = bytearray()
+            while len(data) < count:
+                data += bytes(self._read(FIFO_R_W, min(CHUNK_BYTES, count - len(data))))
+        except OSError as e:
+            # El bus se reabre en la siguiente lectura y el FIFO se reconfigura
+            self.stats["errors"] += 1
+            logger.error(f"Error reading MPU-6050 FIFO: {e}")
+            self.enabled = False
+            self.i2c.close_bus()
+            return empty_batch()
+        accel, gyro = decode_frames(bytes(data))
+        frames = len(accel)
+        self.stats["frames"] += frames
+        # La última trama es la más reciente; las anteriores van espaciadas un periodo de muestreo
+        timestamps = read_at - np.arange(frames - 1, -1, -1) / self.sample_rate_hz
+        return FifoBatch(accel, gyro, timestamps, False)
+
+    def get_stats(self) -> dict:
+        return dict(self.stats, sample_rate_hz=self.sample_rate_hz, enabled=self.enabled)
@@ -1,48 +1,475 @@
 import os
-import json
-import aio_pika
+import time
+import asyncio
+import logging
+from collections import deque
+from itertools import count
 from dotenv import load_dotenv
+from database.metrics import LatencyHistogram
+from services.codec import CODEC_VERSION, VERSION_HEADER, MsgpackCodec, encode_message, get_codec
+from services.compression import Compressor, parse_content_type, transform_columns
+from services.spool import Spool
+from services.transports import MessageTransport, create_transport
 
 load_dotenv('local.env')
 
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Políticas de la cola de publicación cuando la cola de un evento está llena
+BLOCK = "block"                      # el llamador espera a que haya sitio
+DROP_OLDEST = "drop-oldest"          # se descarta el mensaje más antiguo del mismo evento
+COALESCE_LATEST = "coalesce-latest"  # solo se conserva el último mensaje pendiente del evento
+QUEUE_POLICIES = (BLOCK, DROP_OLDEST, COALESCE_LATEST)
+
+DEFAULT_EVENT_POLICIES = "sensor.update:drop-oldest,geolocation.update:drop-oldest"
+
+# Eventos que se agrupan en un solo mensaje: evento:máximo de muestras:máxima antigüedad en ms
+DEFAULT_BATCH_LIMITS = "sensor.update:50:5000,geolocation.update:20:5000"
+
+def parse_policies(value: str) -> dict:
+    # "evento:política,evento:política" -> {evento: política}
+    policies = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        event, _, policy = item.partition(":")
+        if policy not in QUEUE_POLICIES:
+            raise EnvironmentError(f"Unknown publish queue policy {policy!r} for {event}")
+        policies[event.strip()] = policy
+    return policies
+
+def parse_batch_limits(value: str) -> dict:
+    # "evento:muestras:ms,..." -> {evento: (muestras, segundos)}
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        event, samples, max_ms = item.split(":")
+        limits[event.strip()] = (max(int(samples), 1), float(max_ms) / 1000)
+    return limits
+
+def pack_samples(kit_id, driver_id, samples: list) -> dict:
+    """
+    Envoltorio de un lote de muestras: cabecera común y un arreglo por columna.
+    {"batch": 1, "kit_id": ..., "driver_id": ..., "count": n, "columns": {"datetime": [...], ...}}
+    """
+    columns = {name: [sample[name] for sample in samples] for name in samples[0]} if samples else {}
+    return {"batch": 1, "kit_id": kit_id, "driver_id": driver_id, "count": len(samples), "columns": columns}
+
+class _SampleBatch:
+    def __init__(self, kit_id, driver_id, keys):
+        self.kit_id = kit_id
+        self.driver_id = driver_id
+        self.keys = keys
+        self.samples = []
+        self.started = time.monotonic()
+
 class RabbitMQService:
-    def __init__(self):
-        self.host = os.getenv('RABBITMQ_HOST')
-        self.port = int(os.getenv('RABBITMQ_PORT'))
-        self.username = os.getenv('RABBITMQ_USERNAME')
-        self.password = os.getenv('RABBITMQ_PASSWORD')
-        self.exchange_name = os.getenv('RABBITMQ_EXCHANGE')
-        self.routing_key = os.getenv('RABBITMQ_ROUTING_KEY')
-        self.connection = None
-        self.channel = None
-        self.exchange = None
+    """
+    Publicador con publisher confirms sobre un transporte de larga duración
+    (RABBITMQ_TRANSPORT=amqp con aio_pika, o memory para pruebas de carga sin broker).
+    publish() deja el mensaje en vuelo y devuelve un future que se resuelve con la confirmación del broker;
+    send_message() espera esa confirmación. Como máximo RABBITMQ_MAX_IN_FLIGHT mensajes sin confirmar.
+
+    enqueue() no publica en línea: deja el mensaje en una cola acotada por evento que vacía una tarea
+    en segundo plano, aplicando la política del evento cuando la cola está llena. Los eventos prioritarios
+    (crash.detected) se publican antes que cualquier otro y nunca se descartan.
+
+    add_sample() agrupa las muestras de telemetría (sensor.update, geolocation.update) en un único mensaje
+    columnar cada N muestras o T milisegundos; los demás eventos se encolan tal cual.
+
+    Los cuerpos que superan RABBITMQ_COMPRESSION_THRESHOLD se comprimen (zlib o lz4) con un nivel que depende
+    de la CPU libre; en los lotes las columnas numéricas se codifican antes (delta o floats agrupados por byte).
+    Ambas cosas se indican en el content type y en las cabeceras x-compression y x-column-transform.
+
+    Si el broker no está disponible, los mensajes ya codificados se guardan en un spool en disco
+    (RABBITMQ_SPOOL_DIR) y se reenvían en orden y con límite de mensajes por segundo al reconectar.
+    """
+
+    def __init__(self, transport: MessageTransport = None):
+        self.transport = transport or create_transport(os.getenv('RABBITMQ_TRANSPORT', 'amqp').lower())
+        self.routing_key = os.getenv('RABBITMQ_ROUTING_KEY', '')
+        self.max_in_flight = int(os.getenv('RABBITMQ_MAX_IN_FLIGHT', '256'))
+        # RABBITMQ_CODEC=msgpack (binario) o json para consumidores que lo necesiten
+        self.codec = get_codec(os.getenv('RABBITMQ_CODEC', 'msgpack'))
+        # RABBITMQ_COMPRESSION=zlib, lz4 o none
+        self.compressor = Compressor.from_env()
+        self.stats = {"published": 0, "confirmed": 0, "failed": 0, "in_flight": 0, "max_in_flight_seen": 0}
+        self._pending = set()
+        self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        self._connect_lock = asyncio.Lock()
+
+        self.queue_size = int(os.getenv('RABBITMQ_QUEUE_SIZE', '1000'))
+        self.default_policy = os.getenv('RABBITMQ_QUEUE_DEFAULT_POLICY', BLOCK)
+        self.policies = parse_policies(os.getenv('RABBITMQ_QUEUE_POLICIES', DEFAULT_EVENT_POLICIES))
+        self.priority_events = set(filter(None, os.getenv('RABBITMQ_PRIORITY_EVENTS', 'crash.detected').split(',')))
+        self.retry_interval = float(os.getenv('RABBITMQ_RETRY_INTERVAL', '5'))
+        # Una cola por evento; cada entrada es [secuencia, instante de encolado, data]
+        self._queues = {}
+        self._sequence = count()
+        self._changed = asyncio.Condition()
+        self._drain_task = None
+        # Mensaje ya sacado de la cola pero aún no entregado al canal
+        self._in_hand = 0
+        self.batch_limits = parse_batch_limits(os.getenv('RABBITMQ_BATCH_LIMITS', DEFAULT_BATCH_LIMITS))
+        self._batches = {}
+        self._batch_task = None
+        self.batch_stats = {"samples": 0, "batches": 0}
+        self.queue_wait = LatencyHistogram()
+        self.queue_stats = {"enqueued": 0, "dropped": 0, "coalesced": 0, "dequeued": 0, "publish_errors": 0, "dropped_unencodable": 0, "max_depth": 0}
+
+        # Spool en disco para cortes de conexión; RABBITMQ_SPOOL_DIR vacío lo desactiva
+        spool_dir = os.getenv('RABBITMQ_SPOOL_DIR', 'spool')
+        self.spool = Spool(
+            spool_dir,
+            int(os.getenv('RABBITMQ_SPOOL_MAX_BYTES', str(100 * 1024 * 1024))),
+            int(os.getenv('RABBITMQ_SPOOL_SEGMENT_BYTES', str(4 * 1024 * 1024))),
+            self.priority_events,
+        ) if spool_dir else None
+        self.replay_rate = float(os.getenv('RABBITMQ_SPOOL_REPLAY_RATE', '200'))
+        self.replay_batch = int(os.getenv('RABBITMQ_SPOOL_REPLAY_BATCH', '100'))
+        self.available = True
+        self._replay_task = None
 
     async def connect(self):
-        self.connection = await aio_pika.connect_robust(
-            f"amqp://{self.username}:{self.password}@{self.host}:{self.port}/"
-        )
-        self.channel = await self.connection.channel()
-        # Declare the exchange here
-        self.exchange = await self.channel.declare_exchange(
-            self.exchange_name, aio_pika.ExchangeType.TOPIC, durable=True
+        await self.transport.connect()
+
+    async def _ensure_connected(self):
+        if self.transport.is_connected:
+            return
+        async with self._connect_lock:
+            if not self.transport.is_connected:
+                await self.connect()
+
+    def _build_body(self, data, event) -> bytes:
+        return encode_message(self.codec, event, data)
+
+    def _encode(self, data, event):
+        """
+        Codifica y, si supera el umbral, comprime el mensaje. Devuelve (cuerpo, content type); los parámetros
+        del content type ("application/msgpack; transform=columns; compression=zlib") también se guardan en el spool.
+        """
+        params = []
+        # Con JSON la transformación no reduce el tamaño comprimido: solo se aplica con msgpack
+        binary = self.codec.name == MsgpackCodec.name
+        if self.compressor.enabled and binary and isinstance(data, dict) and data.get("batch") and data.get("count", 0) > 1:
+            data = transform_columns(data, binary=True)
+            params.append("transform=columns")
+        body, algorithm = self.compressor.compress(self._build_body(data, event))
+        if algorithm is not None:
+            params.append(f"compression={algorithm}")
+        return body, "; ".join([self.codec.content_type] + params)
+
+    def _build_headers(self, event, content_type: str = None) -> dict:
+        # El content type y la versión viajan en las propiedades AMQP para que el consumidor elija el decodificador
+        headers = {VERSION_HEADER: CODEC_VERSION, "event": event}
+        _, params = parse_content_type(content_type)
+        if "compression" in params:
+            headers["x-compression"] = params["compression"]
+        if "transform" in params:
+            headers["x-column-transform"] = params["transform"]
+        return headers
+
+    async def publish(self, data, event) -> asyncio.Future:
+        body, content_type = self._encode(data, event)
+        return await self._publish_body(body, content_type, event)
+
+    async def _publish_body(self, body: bytes, content_type: str, event, spool_on_failure=True) -> asyncio.Future:
+        await self._ensure_connected()
+        # Contrapresión: espera si ya hay max_in_flight mensajes sin confirmar
+        await self._in_flight.acquire()
+        try:
+            confirmation = asyncio.ensure_future(self.transport.publish(
+                body, content_type, self._build_headers(event, content_type), self.routing_key
+            ))
+        except BaseException:
+            self._in_flight.release()
+            raise
+        self._pending.add(confirmation)
+        self.stats["published"] += 1
+        self.stats["in_flight"] = len(self._pending)
+        self.stats["max_in_flight_seen"] = max(self.stats["max_in_flight_seen"], self.stats["in_flight"])
+        confirmation.add_done_callback(
+            lambda future: self._on_confirm(future, event, body, content_type, spool_on_failure)
         )
+        return confirmation
+
+    def _on_confirm(self, future: asyncio.Future, event, body=None, content_type=None, spool_on_failure=False):
+        self._pending.discard(future)
+        self._in_flight.release()
+        self.stats["in_flight"] = len(self._pending)
+        if future.cancelled() or future.exception() is not None:
+            self.stats["failed"] += 1
+            error = "cancelled" if future.cancelled() else future.exception()
+            logger.warning(f"Message {event} was not confirmed by the broker: {error}")
+            if spool_on_failure and self.spool is not None:
+                # Sin confirmación no hay garantía de entrega: el mensaje se guarda para reenviarlo
+                self.available = False
+                self.spool.append_nowait(event, content_type, body)
+        else:
+            self.stats["confirmed"] += 1
+
+    async def _spool_data(self, event, data):
+        try:
+            body, content_type = self._encode(data, event)
+        except Exception as e:
+            self.queue_stats["dropped_unencodable"] += 1
+            logger.error(f"Could not encode {event}, message dropped: {e}")
+            return
+        await self._spool_body(event, content_type, body)
+
+    async def _spool_body(self, event, content_type: str, body: bytes):
+        try:
+            await self.spool.append(event, content_type, body)
+        except OSError as e:
+            logger.error(f"Could not spool {event}, message lost: {e}")
+
+    def _should_spool(self, event) -> bool:
+        # Con eventos del mismo carril pendientes en disco, los nuevos van detrás para mantener el orden
+        return self.spool is not None and (not self.available or self.spool.has_pending(event))
+
+    async def _replay_once(self) -> int:
+        lane, records = await self.spool.read(self.replay_batch)
+        if not records:
+            return 0
+        confirmations = [
+            await self._publish_body(body, content_type, event, spool_on_failure=False)
+            for event, content_type, body, _ in records
+        ]
+        results = await asyncio.gather(*confirmations, return_exceptions=True)
+        failed = next((result for result in results if isinstance(result, BaseException)), None)
+        if failed is not None:
+            # El lote completo se reenviará: entrega al menos una vez
+            raise failed
+        await self.spool.commit(lane, records)
+        return len(records)
+
+    async def _replay(self):
+        while True:
+            if self.spool.has_pending():
+                try:
+                    replayed = await self._replay_once()
+                    self.available = True
+                    # Límite de mensajes por segundo para no saturar el enlace al reconectar
+                    await asyncio.sleep(replayed / self.replay_rate if self.replay_rate > 0 else 0)
+                    continue
+                except Exception as e:
+                    self.available = False
+                    logger.warning(f"Broker unavailable, {self.spool.pending()} events spooled: {e}")
+            else:
+                self.available = True
+            await asyncio.sleep(self.retry_interval)
+            # Los registros no prioritarios solo se sincronizan a disco periódicamente
+            await self.spool.sync()
 
     async def send_message(self, data, event):
-        if not self.connection or self.connection.is_closed:
-            await self.connect()
-        
-        message = {
-            'data': data,
-            'event': event
-        }
-        # Send the message to the declared exchange
-        await self.exchange.publish(
-            aio_pika.Message(body=json.dumps(message).encode()),
-            routing_key=self.routing_key
-        )
+        # Espera la confirmación del broker; los fallos se propagan al llamador
+        confirmation = await self.publish(data, event)
+        await confirmation
+
+    def policy_for(self, event) -> str:
+        if event in self.priority_events:
+            return BLOCK
+        return self.policies.get(event, self.default_policy)
+
+    def depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def enqueue(self, data, event):
+        """
+        Encola el mensaje para publicarlo en segundo plano. Solo espera con la política block y la cola llena.
+        """
+        if self._drain_task is None:
+            await self.start()
+        queue = self._queues.setdefault(event, deque())
+        policy = self.policy_for(event)
+        async with self._changed:
+            if policy == COALESCE_LATEST and queue:
+                # Se reemplaza el dato pendiente conservando su posición y su instante de encolado
+                queue[-1][2] = data
+                self.queue_stats["coalesced"] += 1
+                return
+            if len(queue) >= self.queue_size and event not in self.priority_events:
+                if policy == BLOCK:
+                    await self._changed.wait_for(lambda: len(queue) < self.queue_size)
+                else:
+                    queue.popleft()
+                    self.queue_stats["dropped"] += 1
+            queue.append([next(self._sequence), time.monotonic(), data])
+            self.queue_stats["enqueued"] += 1
+            self.queue_stats["max_depth"] = max(self.queue_stats["max_depth"], self.depth())
+            self._changed.notify_all()
+
+    async def add_sample(self, event, sample: dict, kit_id=None, driver_id=None):
+        """
+        Agrega una muestra al lote abierto del evento. Se publica el lote al llegar al máximo de muestras,
+        al vencer su antigüedad o al cambiar la cabecera (kit_id, driver_id) o las columnas.
+        """
+        if event not in self.batch_limits:
+            await self.enqueue(dict(sample, kit_id=kit_id, driver_id=driver_id), event)
+            return
+        if self._batch_task is None:
+            await self.start()
+        batch = self._batches.get(event)
+        keys = tuple(sample)
+        if batch is not None and (batch.kit_id, batch.driver_id, batch.keys) != (kit_id, driver_id, keys):
+            await self._flush_batch(event)
+            batch = None
+        if batch is None:
+            batch = self._batches[event] = _SampleBatch(kit_id, driver_id, keys)
+        batch.samples.append(sample)
+        self.batch_stats["samples"] += 1
+        if len(batch.samples) >= self.batch_limits[event][0]:
+            await self._flush_batch(event)
 
-        print(f"Message sent to {self.exchange_name} exchange with routing key {self.routing_key}")
+    async def _flush_batch(self, event):
+        batch = self._batches.pop(event, None)
+        if batch is None or not batch.samples:
+            return
+        self.batch_stats["batches"] += 1
+        await self.enqueue(pack_samples(batch.kit_id, batch.driver_id, batch.samples), event)
+
+    async def flush_batches(self):
+        for event in list(self._batches):
+            await self._flush_batch(event)
+
+    async def _batch_timer(self):
+        # Publica los lotes que superan su antigüedad máxima aunque no estén llenos
+        tick = min(max_age for _, max_age in self.batch_limits.values()) / 2
+        while True:
+            await asyncio.sleep(tick)
+            now = time.monotonic()
+            for event, batch in list(self._batches.items()):
+                if now - batch.started >= self.batch_limits[event][1]:
+                    try:
+                        await self._flush_batch(event)
+                    except Exception as e:
+                        logger.error(f"Error flushing {event} batch: {e}")
+
+    def _next_event(self):
+        # Primero los eventos prioritarios; después, el mensaje más antiguo de entre todas las colas
+        oldest_event, oldest_sequence = None, None
+        for event, queue in self._queues.items():
+            if not queue:
+                continue
+            if event in self.priority_events:
+                return event
+            if oldest_sequence is None or queue[0][0] < oldest_sequence:
+                oldest_event, oldest_sequence = event, queue[0][0]
+        return oldest_event
+
+    async def _drain(self):
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: self._next_event() is not None)
+                event = self._next_event()
+                entry = self._queues[event].popleft()
+                self._in_hand = 1
+                self._changed.notify_all()
+            try:
+                # Se codifica antes de publicar: un mensaje que no se puede codificar se descarta sin reintentos
+                body, content_type = self._encode(entry[2], event)
+            except Exception as e:
+                self.queue_stats["dropped_unencodable"] += 1
+                logger.error(f"Could not encode {event}, message dropped: {e}")
+                async with self._changed:
+                    self._in_hand = 0
+                    self._changed.notify_all()
+                continue
+            try:
+                if self._should_spool(event):
+                    await self._spool_body(event, content_type, body)
+                else:
+                    await self._publish_body(body, content_type, event)
+            except asyncio.CancelledError:
+                self._queues[event].appendleft(entry)
+                self._in_hand = 0
+                raise
+            except Exception as e:
+                self.queue_stats["publish_errors"] += 1
+                if self.spool is not None:
+                    # Sin conexión con el broker: el mensaje va al spool y se reenvía al reconectar
+                    self.available = False
+                    logger.warning(f"Error publishing {event}, spooling to disk: {e}")
+                    try:
+                        await self._spool_body(event, content_type, body)
+                    except Exception as spool_error:
+                        # La tarea de drenado nunca debe terminar: sin ella los enqueue con BLOCK esperarían para siempre
+                        logger.error(f"Could not spool {event}, message lost: {spool_error}")
+                else:
+                    # Sin spool: el mensaje vuelve al frente y se reintenta más tarde
+                    self._queues[event].appendleft(entry)
+                    self._in_hand = 0
+                    logger.error(f"Error publishing {event}, retrying in {self.retry_interval}s: {e}")
+                    await asyncio.sleep(self.retry_interval)
+                    continue
+            self.queue_stats["dequeued"] += 1
+            self.queue_wait.observe((time.monotonic() - entry[1]) * 1000)
+            async with self._changed:
+                self._in_hand = 0
+                self._changed.notify_all()
+
+    async def start(self):
+        if self._drain_task is None:
+            self._drain_task = asyncio.create_task(self._drain())
+        if self._batch_task is None and self.batch_limits:
+            self._batch_task = asyncio.create_task(self._batch_timer())
+        if self._replay_task is None and self.spool is not None:
+            await self.spool.open()
+            self._replay_task = asyncio.create_task(self._replay())
+
+    async def drain(self, timeout: float = None):
+        # Espera a que la cola se vacíe (p. ej. al cerrar la aplicación)
+        async with self._changed:
+            await asyncio.wait_for(self._changed.wait_for(lambda: self.depth() + self._in_hand == 0), timeout)
+
+    async def stop(self):
+        for task in (self._replay_task, self._batch_task, self._drain_task):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._batch_task = None
+        self._drain_task = None
+        self._replay_task = None
+
+    async def flush(self):
+        # Espera a que se confirmen (o fallen) todos los mensajes en vuelo
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["queue"] = dict(
+            self.queue_stats,
+            depth=self.depth(),
+            depth_by_event={event: len(queue) for event, queue in self._queues.items()},
+            wait=self.queue_wait.to_dict(),
+        )
+        stats["transport"] = self.transport.name
+        stats["available"] = self.available
+        stats["spool"] = self.spool.get_stats() if self.spool is not None else None
+        stats["compression"] = self.compressor.get_stats()
+        stats["batching"] = dict(self.batch_stats, open={event: len(b.samples) for event, b in self._batches.items()})
+        return stats
 
     async def close_connection(self):
-        if self.connection and not self.connection.is_closed:
-            await self.connection.close()
\ No newline at end of file
+        await self.flush_batches()
+        if self._drain_task is not None:
+            try:
+                await self.drain(self.retry_interval)
+            except asyncio.TimeoutError:
+                logger.error(f"Closing RabbitMQ with {self.depth()} queued messages")
+            await self.stop()
+        if self.spool is not None:
+            # Lo que no llegó a publicarse se guarda en disco para la próxima ejecución
+            for event, queue in self._queues.items():
+                while queue:
+                    await self._spool_data(event, queue.popleft()[2])
+        await self.flush()
+        if self.spool is not None:
+            await self.spool.close()
+        await self.transport.close()
+
+# Publicador compartido: una conexión y un canal para toda la aplicación
+rabbitmq_service = RabbitMQService()
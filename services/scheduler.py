@@ -0,0 +1,106 @@
+import math
+import time
+
+# Política cuando una lectura termina después de su siguiente plazo
+SKIP = "skip"          # se descartan los plazos vencidos y se sigue en la siguiente marca de la rejilla
+CATCH_UP = "catch-up"  # se ejecutan seguidas las lecturas atrasadas, hasta max_backlog; después se resincroniza
+OVERRUN_POLICIES = (SKIP, CATCH_UP)
+
+def parse_sensor_rates(value: str, default_policy: str = SKIP) -> dict:
+    # "sensor:hz[:política],..." -> {sensor: (hz, política)}
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, rate, *policy = item.split(":")
+        policy = policy[0] if policy else default_policy
+        if policy not in OVERRUN_POLICIES:
+            raise EnvironmentError(f"Unknown overrun policy {policy!r} for {name}")
+        rates[name.strip()] = (float(rate), policy)
+    return rates
+
+class JitterStats:
+    # Media y desviación en línea (Welford) del retraso del despertar respecto al plazo, en microsegundos
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.max = 0.0
+
+    def observe(self, us: float):
+        self.count += 1
+        delta = us - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (us - self.mean)
+        self.max = max(self.max, us)
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_us": round(self.mean, 1),
+            "stddev_us": round(math.sqrt(self.m2 / self.count), 1) if self.count > 1 else 0.0,
+            "max_us": round(self.max, 1),
+        }
+
+class DeadlineScheduler:
+    """
+    Marca el ritmo de un bucle de lectura con plazos absolutos sobre un reloj monótono: el plazo n es
+    inicio + n * periodo, así que la duración de cada lectura no se acumula como deriva.
+    wait() se llama después de cada lectura y duerme hasta el siguiente plazo.
+    """
+
+    def __init__(self, rate_hz: float, policy: str = SKIP, max_backlog: int = 10, clock=time.monotonic, sleep=time.sleep):
+        if rate_hz <= 0:
+            raise ValueError(f"Sampling rate must be positive, got {rate_hz}")
+        if policy not in OVERRUN_POLICIES:
+            raise ValueError(f"Unknown overrun policy {policy!r}")
+        self.period = 1 / rate_hz
+        self.rate_hz = rate_hz
+        self.policy = policy
+        self.max_backlog = max_backlog
+        self.clock = clock
+        self.sleep = sleep
+        self.next_deadline = None
+        self.jitter = JitterStats()
+        self.stats = {"ticks": 0, "overruns": 0, "skipped": 0, "caught_up": 0, "resyncs": 0}
+        self.started = None
+
+    def reset(self):
+        self.started = self.next_deadline = self.clock()
+
+    def wait(self):
+        if self.next_deadline is None:
+            self.reset()
+        self.stats["ticks"] += 1
+        self.next_deadline += self.period
+        now = self.clock()
+        if now < self.next_deadline:
+            self.sleep(self.next_deadline - now)
+            self.jitter.observe((self.clock() - self.next_deadline) * 1e6)
+            return
+
+        # La lectura se pasó de su plazo
+        self.stats["overruns"] += 1
+        missed = int((now - self.next_deadline) // self.period)
+        if self.policy == SKIP:
+            # Se salta a la primera marca futura de la rejilla, conservando la fase
+            self.stats["skipped"] += missed + 1
+            self.next_deadline += (missed + 1) * self.period
+            self.sleep(self.next_deadline - now)
+            self.jitter.observe((self.clock() - self.next_deadline) * 1e6)
+        elif missed < self.max_backlog:
+            # Sin dormir: la siguiente lectura recupera el plazo vencido
+            self.stats["caught_up"] += 1
+        else:
+            # Demasiado atraso (p. ej. el bus bloqueado): se descarta el atraso y se reinicia la rejilla
+            self.stats["resyncs"] += 1
+            self.stats["skipped"] += missed
+            self.next_deadline = now
+
+    def get_stats(self) -> dict:
+        elapsed = self.clock() - self.started if self.started is not None else 0.0
+        return dict(
+            self.stats,
+            rate_hz=self.rate_hz,
+            policy=self.policy,
+            effective_hz=round(self.stats["ticks"] / elapsed, 2) if elapsed else 0.0,
+            jitter=self.jitter.to_dict(),
+        )
@@ -0,0 +1,16 @@
+from services.sensors.base import SensorBackend
+
+SENSOR_BACKENDS = ("hardware", "synthetic", "replay")
+
+def create_backend(name: str) -> SensorBackend:
+    # Importación diferida: solo el backend hardware necesita smbus, gpiozero y pyserial
+    if name == "hardware":
+        from services.sensors.hardware import HardwareBackend
+        return HardwareBackend()
+    if name == "synthetic":
+        from services.sensors.synthetic import SyntheticBackend
+        return SyntheticBackend.from_env()
+    if name == "replay":
+        from services.sensors.replay import ReplayBackend
+        return ReplayBackend.from_env()
+    raise EnvironmentError(f"Unknown SENSOR_BACKEND '{name}', expected one of {SENSOR_BACKENDS}")
@@ -0,0 +1,26 @@
+# Pines BCM de los sensores digitales del kit
+VIBRATION_PIN = 17  # SW-420
+SHOCK_PIN = 27      # KY-031
+
+class SensorBackend:
+    """
+    Interfaz de los backends de sensores de GpioService: el bus I2C del MPU-6050, los pines digitales del
+    SW-420 (vibración) y del KY-031 (golpes) y el puerto serie del GPS. Abrir un dispositivo no ocurre al
+    importar ni al crear el backend, sino cuando el servicio arranca.
+    """
+
+    name = None
+    # Excepciones de lectura del GPS además de los errores de NMEA; el backend hardware añade las de pyserial
+    gps_errors = (OSError,)
+
+    def open_i2c_bus(self, bus_number: int):
+        # Objeto con la interfaz de smbus.SMBus; se usa como bus_factory de I2CService
+        raise NotImplementedError
+
+    def open_input(self, pin: int):
+        # Objeto con is_active y close(), como gpiozero.InputDevice
+        raise NotImplementedError
+
+    def open_gps(self, port: str, baudrate: int, timeout: float):
+        # Objeto con readline() -> bytes y close(), como serial.Serial
+        raise NotImplementedError
@@ -0,0 +1,21 @@
+from services.i2c_service import open_smbus
+from services.sensors.base import SensorBackend
+
+class HardwareBackend(SensorBackend):
+    """
+    Sensores del kit: smbus, gpiozero y pyserial se importan al abrir cada dispositivo, no al importar el módulo.
+    """
+
+    name = "hardware"
+
+    def open_i2c_bus(self, bus_number: int):
+        return open_smbus(bus_number)
+
+    def open_input(self, pin: int):
+        from gpiozero import InputDevice
+        return InputDevice(pin)
+
+    def open_gps(self, port: str, baudrate: int, timeout: float):
+        import serial
+        self.gps_errors = (serial.SerialException, OSError)
+        return serial.Serial(port, baudrate=baudrate, timeout=timeout)
@@ -0,0 +1,184 @@
+"""
+Backend de reproducción y grabador de trayectos. Formato JSON lines, una lectura por línea ordenada por t
+(segundos desde el inicio de la grabación):
+
+    {"t": 0.005, "acc": [ax, ay, az], "gyro": [gx, gy, gz], "vibration": false, "shock": false}
+    {"t": 1.0, "nmea": "$GPRMC,..."}
+
+Para grabar desde el kit (o desde el backend sintético):
+
+    python -m services.sensors.replay drive.jsonl --backend hardware --seconds 600 --rate 200
+"""
+import os
+import json
+import time
+import argparse
+import threading
+from bisect import bisect_right
+from dotenv import load_dotenv
+from services.i2c_service import I2CService, scale_sample
+from services.mock_smbus import SimulatedMpu6050
+from services.scheduler import DeadlineScheduler
+from services.sensors.base import SHOCK_PIN, VIBRATION_PIN, SensorBackend
+
+load_dotenv('local.env')
+
+def load_recording(path: str):
+    # -> (muestras del IMU, sentencias NMEA), cada una ordenada por t
+    samples, sentences = [], []
+    with open(path) as recording:
+        for line in recording:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if "nmea" in item:
+                sentences.append((item["t"], item["nmea"]))
+            else:
+                samples.append(item)
+    samples.sort(key=lambda item: item["t"])
+    sentences.sort()
+    return samples, sentences
+
+class ReplayBackend(SensorBackend):
+    """
+    Reproduce una grabación con el reloj de la app, a speed veces la velocidad original y en bucle con loop.
+    El MPU-6050 es un SimulatedMpu6050 cuyos registros mantienen la última muestra grabada (modos poll y FIFO);
+    los pines y el GPS siguen la misma posición de la grabación.
+    """
+
+    name = "replay"
+
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = True, clock=time.monotonic, sleep=time.sleep):
+        samples, self.sentences = load_recording(path)
+        if not samples:
+            raise ValueError(f"Replay file {path} has no IMU samples")
+        self.path = path
+        self.times = [sample["t"] for sample in samples]
+        self.motions = [(tuple(sample["acc"]), tuple(sample["gyro"])) for sample in samples]
+        self.vibration = [bool(sample.get("vibration", False)) for sample in samples]
+        self.shock = [bool(sample.get("shock", False)) for sample in samples]
+        last = max(self.times[-1], self.sentences[-1][0] if self.sentences else 0.0)
+        # Un periodo de muestreo tras la última lectura antes de volver a empezar
+        self.duration = last + (last / (len(samples) - 1) if len(samples) > 1 else 0.0)
+        self.speed = speed
+        self.loop = loop
+        self.clock = clock
+        self.sleep = sleep
+        self.start = clock()
+        self.mpu = None
+
+    @classmethod
+    def from_env(cls):
+        path = os.getenv('SENSOR_REPLAY_FILE')
+        if not path:
+            raise EnvironmentError("SENSOR_BACKEND=replay needs SENSOR_REPLAY_FILE")
+        return cls(
+            path,
+            speed=float(os.getenv('SENSOR_REPLAY_SPEED', '1')),
+            loop=os.getenv('SENSOR_REPLAY_LOOP', 'true').lower() == 'true',
+        )
+
+    def position(self, now: float) -> float:
+        # Instante de la grabación para el instante dado del reloj
+        t = (now - self.start) * self.speed
+        return t % self.duration if self.loop and self.duration else t
+
+    def index(self, now: float) -> int:
+        return max(bisect_right(self.times, self.position(now)) - 1, 0)
+
+    def motion(self, now: float):
+        return self.motions[self.index(now)]
+
+    def open_i2c_bus(self, bus_number: int):
+        if self.mpu is None:
+            self.mpu = SimulatedMpu6050(bus_number, clock=self.clock, motion=self.motion)
+        self.mpu.open(bus_number)
+        return self.mpu
+
+    def open_input(self, pin: int):
+        from services.sensors.synthetic import SimulatedInput
+        if pin == SHOCK_PIN:
+            return SimulatedInput(lambda: self.shock[self.index(self.clock())])
+        if pin == VIBRATION_PIN:
+            return SimulatedInput(lambda: self.vibration[self.index(self.clock())])
+        raise ValueError(f"No replayed input on pin {pin}")
+
+    def open_gps(self, port: str, baudrate: int, timeout: float):
+        return ReplayGps(self, timeout)
+
+class ReplayGps:
+    # Puerto serie que entrega cada sentencia grabada en su instante; sin más sentencias, b"" tras el timeout
+    def __init__(self, backend: ReplayBackend, timeout: float):
+        self.backend = backend
+        self.timeout = timeout
+        self.next = 0
+        self.cycle = 0
+
+    def readline(self) -> bytes:
+        backend = self.backend
+        if self.next >= len(backend.sentences):
+            backend.sleep(self.timeout)
+            return b""
+        t, line = backend.sentences[self.next]
+        wait = backend.start + (self.cycle * backend.duration + t) / backend.speed - backend.clock()
+        if wait > 0:
+            backend.sleep(wait)
+        self.next += 1
+        if self.next == len(backend.sentences) and backend.loop:
+            self.next, self.cycle = 0, self.cycle + 1
+        return (line + "\r\n").encode("ascii")
+
+    def close(self):
+        pass
+
+def record(backend: SensorBackend, path: str, seconds: float, rate_hz: float, gps_port: str = "/dev/ttyS0"):
+    """
+    Graba seconds segundos de IMU y pines a rate_hz y las sentencias NMEA del GPS (en un hilo) en path.
+    """
+    i2c_service = I2CService(bus_factory=backend.open_i2c_bus)
+    vibration, shock = backend.open_input(VIBRATION_PIN), backend.open_input(SHOCK_PIN)
+    gps = backend.open_gps(gps_port, 115200, 1)
+    start = time.monotonic()
+    items, stop = [], threading.Event()
+
+    def read_gps():
+        while not stop.is_set():
+            line = gps.readline().decode("ascii", errors="replace").strip()
+            if line.startswith("$"):
+                items.append({"t": time.monotonic() - start, "nmea": line})
+
+    gps_thread = threading.Thread(target=read_gps, daemon=True)
+    gps_thread.start()
+    scheduler = DeadlineScheduler(rate_hz)
+    scheduler.reset()
+    while time.monotonic() - start < seconds:
+        raw = i2c_service.read_burst()
+        if raw is not None:
+            sample = scale_sample(raw)
+            items.append({
+                "t": time.monotonic() - start,
+                "acc": [sample["acc_x"], sample["acc_y"], sample["acc_z"]],
+                "gyro": [sample["gyro_x"], sample["gyro_y"], sample["gyro_z"]],
+                "vibration": vibration.is_active,
+                "shock": shock.is_active,
+            })
+        scheduler.wait()
+    stop.set()
+    with open(path, "w") as recording:
+        for item in sorted(items, key=lambda item: item["t"]):
+            recording.write(json.dumps(item) + "\n")
+    return len(items)
+
+def main():
+    from services.sensors import SENSOR_BACKENDS, create_backend
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output")
+    parser.add_argument("--backend", choices=SENSOR_BACKENDS, default="hardware")
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--rate", type=float, default=200)
+    args = parser.parse_args()
+    count = record(create_backend(args.backend), args.output, args.seconds, args.rate)
+    print(f"Recorded {count} readings to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import os
+import math
+import time
+import random
+import operator
+from datetime import datetime, timezone
+from functools import reduce
+from dotenv import load_dotenv
+from services.mock_smbus import SimulatedMpu6050
+from services.sensors.base import SHOCK_PIN, VIBRATION_PIN, SensorBackend
+
+load_dotenv('local.env')
+
+# Coordenadas por defecto de GPSService
+START_LATITUDE = 16.73
+START_LONGITUDE = -93.08
+METERS_PER_DEGREE = 111320.0
+KNOTS_PER_KMH = 0.539957
+CRASH_SECONDS = 0.08
+
+def nmea_rmc(when: datetime, latitude: float, longitude: float, speed_knots: float = 0.0, course: float = 0.0) -> str:
+    # Sentencia $GPRMC válida (status A) con su checksum XOR
+    def coordinate(value, width):
+        degrees = int(abs(value))
+        return f"{degrees:0{width}d}{(abs(value) - degrees) * 60:07.4f}"
+
+    body = (
+        f"GPRMC,{when:%H%M%S}.00,A,{coordinate(latitude, 2)},{'N' if latitude >= 0 else 'S'},"
+        f"{coordinate(longitude, 3)},{'E' if longitude >= 0 else 'W'},{speed_knots:.1f},{course:.1f},{when:%d%m%y},,,A"
+    )
+    return f"${body}*{reduce(operator.xor, body.encode('ascii'), 0):02X}"
+
+class SimulatedInput:
+    # Pin digital con la interfaz de gpiozero.InputDevice; value() da el estado en cada lectura
+    def __init__(self, value):
+        self.value = value
+
+    @property
+    def is_active(self) -> bool:
+        return bool(self.value())
+
+    def close(self):
+        pass
+
+class SimulatedGps:
+    """
+    Puerto serie simulado: readline() espera al siguiente fix, como el GPS a period segundos, y devuelve la
+    sentencia de sentence(t) terminada en \\r\\n.
+    """
+
+    def __init__(self, sentence, period: float, clock=time.monotonic, sleep=time.sleep):
+        self.sentence = sentence
+        self.period = period
+        self.clock = clock
+        self.sleep = sleep
+        self.next_at = None
+
+    def readline(self) -> bytes:
+        now = self.clock()
+        if self.next_at is None:
+            self.next_at = now
+        if self.next_at > now:
+            self.sleep(self.next_at - now)
+        line = self.sentence(self.next_at)
+        self.next_at = max(self.next_at + self.period, now)
+        return (line + "\r\n").encode("ascii")
+
+    def close(self):
+        pass
+
+class SyntheticBackend(SensorBackend):
+    """
+    Trayecto sintético: aceleraciones y frenadas suaves, curvas, ruido gaussiano (noise_g, gyro_noise_dps),
+    un bache cada 7 s y, con crash_every, un choque periódico de 80 ms que satura acc_x y activa el pin de
+    golpes. El MPU-6050 es un SimulatedMpu6050 cuyos registros cambian a rate_hz, así que funcionan los modos
+    poll y FIFO. El GPS entrega $GPRMC a gps_rate_hz avanzando hacia el este a speed_kmh.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, rate_hz: float = 1000.0, noise_g: float = 0.02, gyro_noise_dps: float = 1.0,
+                 crash_every: float = 0.0, vibration_rate: float = 0.02, gps_rate_hz: float = 1.0,
+                 speed_kmh: float = 40.0, seed: int = None, clock=time.monotonic, sleep=time.sleep):
+        self.rate_hz = rate_hz
+        self.noise_g = noise_g
+        self.gyro_noise_dps = gyro_noise_dps
+        self.crash_every = crash_every
+        self.vibration_rate = vibration_rate
+        self.gps_rate_hz = gps_rate_hz
+        self.speed_kmh = speed_kmh
+        self.random = random.Random(seed)
+        self.clock = clock
+        self.sleep = sleep
+        self.start = clock()
+        self.mpu = None
+        # (índice de muestra, (acc, gyro)): las lecturas más rápidas que rate_hz repiten la muestra
+        self.held = (None, None)
+
+    @classmethod
+    def from_env(cls):
+        seed = os.getenv('SENSOR_SYNTHETIC_SEED')
+        return cls(
+            rate_hz=float(os.getenv('SENSOR_SYNTHETIC_RATE', '1000')),
+            noise_g=float(os.getenv('SENSOR_SYNTHETIC_NOISE', '0.02')),
+            gyro_noise_dps=float(os.getenv('SENSOR_SYNTHETIC_GYRO_NOISE', '1.0')),
+            crash_every=float(os.getenv('SENSOR_SYNTHETIC_CRASH_EVERY', '0')),
+            vibration_rate=float(os.getenv('SENSOR_SYNTHETIC_VIBRATION_RATE', '0.02')),
+            gps_rate_hz=float(os.getenv('SENSOR_SYNTHETIC_GPS_RATE', '1')),
+            speed_kmh=float(os.getenv('SENSOR_SYNTHETIC_SPEED_KMH', '40')),
+            seed=int(seed) if seed else None,
+        )
+
+    def crash_phase(self, t: float) -> float:
+        # Segundos desde el inicio del choque en curso, o None
+        if not self.crash_every or t < self.crash_every:
+            return None
+        phase = t % self.crash_every
+        return phase if phase < CRASH_SECONDS else None
+
+    def motion(self, now: float):
+        index = int((now - self.start) * self.rate_hz)
+        if index != self.held[0]:
+            self.held = (index, self.generate(index / self.rate_hz))
+        return self.held[1]
+
+    def generate(self, t: float):
+        gauss, noise = self.random.gauss, self.noise_g
+        turn = math.sin(2 * math.pi * t / 17)
+        acc_x = 0.25 * math.sin(2 * math.pi * t / 30) + gauss(0, noise)
+        acc_y = 0.2 * turn + gauss(0, noise)
+        acc_z = 1.0 + gauss(0, noise) + (0.8 if t % 7 < 0.03 else 0.0)
+        phase = self.crash_phase(t)
+        if phase is not None:
+            acc_x -= 3.0 * math.sin(math.pi * phase / CRASH_SECONDS) + 0.5
+        gyro = (gauss(0, self.gyro_noise_dps), gauss(0, self.gyro_noise_dps), 40 * turn + gauss(0, self.gyro_noise_dps))
+        return (acc_x, acc_y, acc_z), gyro
+
+    def gps_sentence(self, now: float) -> str:
+        distance = self.speed_kmh / 3.6 * (now - self.start)
+        longitude = START_LONGITUDE + distance / (METERS_PER_DEGREE * math.cos(math.radians(START_LATITUDE)))
+        return nmea_rmc(datetime.now(timezone.utc), START_LATITUDE, longitude, self.speed_kmh * KNOTS_PER_KMH, 90.0)
+
+    def open_i2c_bus(self, bus_number: int):
+        if self.mpu is None:
+            self.mpu = SimulatedMpu6050(bus_number, clock=self.clock, motion=self.motion)
+        self.mpu.open(bus_number)
+        return self.mpu
+
+    def open_input(self, pin: int):
+        if pin == SHOCK_PIN:
+            return SimulatedInput(lambda: (self.crash_phase(self.clock() - self.start) or 0.0) > 0.01)
+        if pin == VIBRATION_PIN:
+            return SimulatedInput(lambda: self.random.random() < self.vibration_rate)
+        raise ValueError(f"No synthetic input on pin {pin}")
+
+    def open_gps(self, port: str, baudrate: int, timeout: float):
+        return SimulatedGps(self.gps_sentence, 1 / self.gps_rate_hz, self.clock, self.sleep)
@@ -0,0 +1,292 @@
+import os
+import mmap
+import struct
+import zlib
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Registro: longitud del cuerpo, crc32, longitud del evento y del content type; luego evento, content type y cuerpo
+RECORD_HEADER = struct.Struct(">IIHH")
+SEGMENT_SUFFIX = ".seg"
+
+def encode_record(event: str, content_type: str, body: bytes) -> bytes:
+    event_bytes, type_bytes = event.encode(), content_type.encode()
+    payload = event_bytes + type_bytes + body
+    return RECORD_HEADER.pack(len(body), zlib.crc32(payload), len(event_bytes), len(type_bytes)) + payload
+
+def iter_records(buffer, position: int):
+    """
+    Recorre los registros de un segmento desde position. Devuelve (evento, content type, cuerpo, siguiente posición).
+    Se detiene en el primer registro incompleto o corrupto (escritura cortada por un apagado).
+    """
+    end = len(buffer)
+    while position + RECORD_HEADER.size <= end:
+        body_length, crc, event_length, type_length = RECORD_HEADER.unpack_from(buffer, position)
+        start = position + RECORD_HEADER.size
+        stop = start + event_length + type_length + body_length
+        if stop > end:
+            return
+        payload = bytes(buffer[start:stop])
+        if zlib.crc32(payload) != crc:
+            logger.error(f"Corrupt spool record at offset {position}, skipping the rest of the segment")
+            return
+        event = payload[:event_length].decode()
+        content_type = payload[event_length:event_length + type_length].decode()
+        yield event, content_type, payload[event_length + type_length:], stop
+        position = stop
+
+class SpoolLane:
+    """
+    Cola en disco de solo anexar, repartida en segmentos numerados. El avance de lectura se guarda en el
+    archivo offset ("segmento posición"); los segmentos ya leídos se borran.
+    """
+
+    def __init__(self, path: str, segment_bytes: int):
+        self.path = path
+        self.segment_bytes = segment_bytes
+        self.segments = []
+        self.offset = (0, 0)
+        self.active = None
+        self.active_sequence = None
+        self.pending_records = 0
+        self.pending_bytes = 0
+
+    def _segment_path(self, sequence: int) -> str:
+        return os.path.join(self.path, f"{sequence:012d}{SEGMENT_SUFFIX}")
+
+    def _offset_path(self) -> str:
+        return os.path.join(self.path, "offset")
+
+    def open(self):
+        os.makedirs(self.path, exist_ok=True)
+        self.segments = sorted(
+            int(name[:-len(SEGMENT_SUFFIX)]) for name in os.listdir(self.path) if name.endswith(SEGMENT_SUFFIX)
+        )
+        if os.path.exists(self._offset_path()):
+            with open(self._offset_path()) as file:
+                sequence, position = file.read().split()
+                self.offset = (int(sequence), int(position))
+        # Lo pendiente de una ejecución anterior se cuenta recorriendo los segmentos
+        for sequence in self.segments:
+            start = self.offset[1] if sequence == self.offset[0] else 0
+            if sequence < self.offset[0]:
+                continue
+            for _, _, _, stop in self._scan(sequence, start):
+                self.pending_records += 1
+                self.pending_bytes += stop - start
+                start = stop
+
+    def _scan(self, sequence: int, position: int):
+        path = self._segment_path(sequence)
+        if os.path.getsize(path) <= position:
+            return []
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return list(iter_records(buffer, position))
+
+    def append(self, record: bytes):
+        if self.active is None or self.active.tell() >= self.segment_bytes:
+            self._rotate()
+        self.active.write(record)
+        # flush deja el registro en el sistema operativo: sobrevive a un reinicio del proceso
+        self.active.flush()
+        self.pending_records += 1
+        self.pending_bytes += len(record)
+
+    def _rotate(self):
+        # Siempre se abre un segmento nuevo, nunca se anexa tras un registro posiblemente cortado
+        if self.active is not None:
+            self.sync()
+            self.active.close()
+        self.active_sequence = max(self.segments[-1] if self.segments else 0, self.offset[0]) + 1
+        self.segments.append(self.active_sequence)
+        self.active = open(self._segment_path(self.active_sequence), "ab")
+
+    def sync(self):
+        if self.active is not None:
+            self.active.flush()
+            os.fsync(self.active.fileno())
+
+    def read(self, limit: int) -> list:
+        # Registros pendientes en orden: [(evento, content type, cuerpo, (segmento, posición siguiente))]
+        records = []
+        for sequence in self.segments:
+            if sequence < self.offset[0]:
+                continue
+            position = self.offset[1] if sequence == self.offset[0] else 0
+            path = self._segment_path(sequence)
+            if os.path.getsize(path) <= position:
+                continue
+            # El segmento se mapea en memoria y solo se copian los registros del lote
+            with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                for event, content_type, body, stop in iter_records(buffer, position):
+                    records.append((event, content_type, body, (sequence, stop)))
+                    if len(records) >= limit:
+                        return records
+        return records
+
+    def commit(self, position, records: int, size: int):
+        self.offset = position
+        temporary = self._offset_path() + ".tmp"
+        with open(temporary, "w") as file:
+            file.write(f"{position[0]} {position[1]}")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self._offset_path())
+        self.pending_records -= records
+        self.pending_bytes -= size
+        # Los segmentos anteriores al offset ya se reenviaron por completo
+        for sequence in [s for s in self.segments if s < position[0]]:
+            self._remove(sequence)
+        if not self.pending_records and self.active_sequence != position[0] and position[0] in self.segments:
+            self._remove(position[0])
+
+    def _remove(self, sequence: int):
+        self.segments.remove(sequence)
+        os.remove(self._segment_path(sequence))
+
+    def drop_oldest(self) -> int:
+        # Descarta el segmento sellado más antiguo para respetar el límite de disco
+        sealed = [s for s in self.segments if s != self.active_sequence]
+        if not sealed:
+            return 0
+        sequence = sealed[0]
+        start = self.offset[1] if sequence == self.offset[0] else 0
+        records = self._scan(sequence, start)
+        size = (records[-1][3] - start) if records else 0
+        self._remove(sequence)
+        self.offset = (sequence + 1, 0)
+        self.pending_records -= len(records)
+        self.pending_bytes -= size
+        return len(records)
+
+    def close(self):
+        if self.active is not None:
+            self.sync()
+            self.active.close()
+            self.active = None
+
+class Spool:
+    """
+    Almacén en disco para eventos que no pudieron publicarse. Los eventos prioritarios (crash.detected)
+    van a su propio carril, que se reenvía antes que el resto y nunca se descarta por espacio.
+    Las escrituras, lecturas y fsync corren en un hilo propio, en orden de llegada, fuera del loop.
+    """
+
+    def __init__(self, path: str, max_bytes: int, segment_bytes: int, priority_events: set):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.priority_events = priority_events
+        self.lanes = {
+            "priority": SpoolLane(os.path.join(path, "priority"), segment_bytes),
+            "normal": SpoolLane(os.path.join(path, "normal"), segment_bytes),
+        }
+        self.stats = {"spooled": 0, "replayed": 0, "dropped": 0}
+        self.executor = None
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, partial(function, *args))
+
+    async def open(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="spool")
+        await self._run(self._open)
+        if self.has_pending():
+            logger.info(f"Spool has events from a previous run: {self.pending()}")
+
+    def _open(self):
+        for lane in self.lanes.values():
+            lane.open()
+
+    def lane_for(self, event: str) -> str:
+        return "priority" if event in self.priority_events else "normal"
+
+    def has_pending(self, event: str = None) -> bool:
+        if event is None:
+            return any(lane.pending_records for lane in self.lanes.values())
+        return self.lanes[self.lane_for(event)].pending_records > 0
+
+    def pending(self) -> dict:
+        return {name: lane.pending_records for name, lane in self.lanes.items()}
+
+    async def append(self, event: str, content_type: str, body: bytes):
+        await self._run(self._append, event, content_type, body)
+
+    def append_nowait(self, event: str, content_type: str, body: bytes):
+        # Para callbacks síncronos: la escritura se encola en el hilo del spool, en orden con las demás
+        self.executor.submit(self._append, event, content_type, body).add_done_callback(self._appended)
+
+    def _appended(self, future):
+        if future.exception() is not None:
+            logger.error(f"Could not spool event, message lost: {future.exception()}")
+
+    def _append(self, event: str, content_type: str, body: bytes):
+        lane_name = self.lane_for(event)
+        lane = self.lanes[lane_name]
+        lane.append(encode_record(event, content_type, body))
+        if lane_name == "priority":
+            lane.sync()
+        self.stats["spooled"] += 1
+
+        normal = self.lanes["normal"]
+        while sum(l.pending_bytes for l in self.lanes.values()) > self.max_bytes:
+            dropped = normal.drop_oldest()
+            if not dropped:
+                break
+            self.stats["dropped"] += dropped
+            logger.warning(f"Spool over {self.max_bytes} bytes, dropped {dropped} oldest events")
+
+    async def read(self, limit: int):
+        return await self._run(self._read, limit)
+
+    def _read(self, limit: int):
+        # Primero el carril prioritario; solo cuando está vacío se lee el normal
+        for name, lane in self.lanes.items():
+            if lane.pending_records:
+                return name, lane.read(limit)
+        return None, []
+
+    async def commit(self, lane_name: str, records: list):
+        await self._run(self._commit, lane_name, records)
+
+    def _commit(self, lane_name: str, records: list):
+        lane = self.lanes[lane_name]
+        self.stats["replayed"] += len(records)
+        # drop_oldest pudo descartar parte del lote mientras se reenviaba: esos registros ya no cuentan
+        # como pendientes y el offset no debe retroceder hasta ellos
+        records = [record for record in records if record[3] > lane.offset]
+        if not records:
+            return
+        size = sum(
+            RECORD_HEADER.size + len(event.encode()) + len(content_type.encode()) + len(body)
+            for event, content_type, body, _ in records
+        )
+        lane.commit(records[-1][3], len(records), size)
+
+    async def sync(self):
+        await self._run(self._sync)
+
+    def _sync(self):
+        for lane in self.lanes.values():
+            lane.sync()
+
+    async def close(self):
+        if self.executor is None:
+            return
+        await self._run(self._close)
+        self.executor.shutdown(wait=True)
+        self.executor = None
+
+    def _close(self):
+        for lane in self.lanes.values():
+            lane.close()
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["pending"] = self.pending()
+        stats["pending_bytes"] = sum(lane.pending_bytes for lane in self.lanes.values())
+        stats["max_bytes"] = self.max_bytes
+        return stats
@@ -0,0 +1,13 @@
+from services.transports.base import MessageTransport
+
+TRANSPORTS = ("amqp", "memory")
+
+def create_transport(name: str) -> MessageTransport:
+    # Importación diferida: el transporte en memoria no necesita aio_pika
+    if name == "amqp":
+        from services.transports.amqp import AmqpTransport
+        return AmqpTransport()
+    if name == "memory":
+        from services.transports.memory import MemoryTransport, memory_broker
+        return MemoryTransport(memory_broker)
+    raise EnvironmentError(f"Unknown RABBITMQ_TRANSPORT '{name}', expected one of {TRANSPORTS}")
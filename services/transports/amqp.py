@@ -0,0 +1,52 @@
+import os
+import aio_pika
+from dotenv import load_dotenv
+from services.transports.base import MessageTransport
+
+load_dotenv('local.env')
+
+class AmqpTransport(MessageTransport):
+    """
+    Transporte RabbitMQ con aio_pika: conexión robusta y un canal con publisher confirms.
+    """
+
+    name = "amqp"
+
+    def __init__(self):
+        self.host = os.getenv('RABBITMQ_HOST', 'localhost')
+        self.port = int(os.getenv('RABBITMQ_PORT', '5672'))
+        self.username = os.getenv('RABBITMQ_USERNAME', 'guest')
+        self.password = os.getenv('RABBITMQ_PASSWORD', 'guest')
+        self.exchange_name = os.getenv('RABBITMQ_EXCHANGE')
+        self.connection = None
+        self.channel = None
+        self.exchange = None
+
+    @property
+    def is_connected(self) -> bool:
+        # connect_robust reconecta por sí solo; basta con haber conectado una vez
+        return self.exchange is not None
+
+    async def connect(self):
+        self.connection = await aio_pika.connect_robust(
+            f"amqp://{self.username}:{self.password}@{self.host}:{self.port}/"
+        )
+        # Canal con confirmaciones: el broker confirma (en bloques, con multiple=True) cada publicación
+        self.channel = await self.connection.channel(publisher_confirms=True)
+        # Declare the exchange here
+        self.exchange = await self.channel.declare_exchange(
+            self.exchange_name, aio_pika.ExchangeType.TOPIC, durable=True
+        )
+
+    async def publish(self, body: bytes, content_type: str, headers: dict, routing_key: str):
+        await self.exchange.publish(
+            aio_pika.Message(body=body, content_type=content_type, headers=headers),
+            routing_key=routing_key
+        )
+
+    async def close(self):
+        if self.connection and not self.connection.is_closed:
+            await self.connection.close()
+        self.connection = None
+        self.channel = None
+        self.exchange = None
@@ -0,0 +1,20 @@
+class MessageTransport:
+    """
+    Interfaz de los transportes de RabbitMQService: conexión y publicación con confirmación.
+    """
+
+    name = None
+
+    @property
+    def is_connected(self) -> bool:
+        raise NotImplementedError
+
+    async def connect(self):
+        raise NotImplementedError
+
+    async def close(self):
+        raise NotImplementedError
+
+    async def publish(self, body: bytes, content_type: str, headers: dict, routing_key: str):
+        # Termina cuando el broker confirma el mensaje; lanza una excepción si lo rechaza o no hay conexión
+        raise NotImplementedError
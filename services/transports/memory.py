@@ -0,0 +1,113 @@
+import os
+import random
+import asyncio
+import logging
+from collections import namedtuple
+from functools import lru_cache
+from dotenv import load_dotenv
+from services.transports.base import MessageTransport
+
+load_dotenv('local.env')
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Mensaje entregado a los consumidores del broker en memoria
+DeliveredMessage = namedtuple("DeliveredMessage", ["routing_key", "body", "content_type", "headers"])
+
+@lru_cache(maxsize=1024)
+def topic_matches(binding_key: str, routing_key: str) -> bool:
+    # Reglas de un exchange topic: "*" es exactamente una palabra y "#" cero o más
+    return _match(tuple(binding_key.split(".")), tuple(routing_key.split(".")))
+
+def _match(binding: tuple, key: tuple) -> bool:
+    if not binding:
+        return not key
+    if binding[0] == "#":
+        return any(_match(binding[1:], key[i:]) for i in range(len(key) + 1))
+    if not key:
+        return False
+    return binding[0] in ("*", key[0]) and _match(binding[1:], key[1:])
+
+class InMemoryBroker:
+    """
+    Broker topic dentro del proceso para pruebas de carga sin servicios externos.
+    Permite inyectar latencia de confirmación, una tasa de rechazos y cortes de conexión.
+    """
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, seed: int = None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.available = True
+        self.random = random.Random(seed)
+        self.bindings = []
+        self.stats = {"published": 0, "routed": 0, "unroutable": 0, "rejected": 0}
+
+    def bind(self, binding_key: str, maxsize: int = 0) -> asyncio.Queue:
+        # Cola de consumidor con su propia clave de enlace
+        queue = asyncio.Queue(maxsize)
+        self.bindings.append((binding_key, queue))
+        return queue
+
+    def consume(self, binding_key: str, callback) -> asyncio.Task:
+        queue = self.bind(binding_key)
+
+        async def run():
+            while True:
+                message = await queue.get()
+                try:
+                    await callback(message)
+                except Exception as e:
+                    logger.error(f"Consumer of {binding_key} failed: {e}")
+
+        return asyncio.create_task(run())
+
+    def unbind(self, queue: asyncio.Queue):
+        self.bindings = [(key, q) for key, q in self.bindings if q is not queue]
+
+    async def publish(self, message: DeliveredMessage):
+        if not self.available:
+            raise ConnectionError("In-memory broker is unavailable")
+        self.stats["published"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            self.stats["rejected"] += 1
+            raise ConnectionError("In-memory broker rejected the message")
+
+        routed = False
+        for binding_key, queue in self.bindings:
+            if topic_matches(binding_key, message.routing_key):
+                # Con una cola llena se pierde la entrega, como con un consumidor que no da abasto
+                if not queue.full():
+                    queue.put_nowait(message)
+                routed = True
+        self.stats["routed" if routed else "unroutable"] += 1
+
+class MemoryTransport(MessageTransport):
+    name = "memory"
+
+    def __init__(self, broker: InMemoryBroker):
+        self.broker = broker
+        self.connected = False
+
+    @property
+    def is_connected(self) -> bool:
+        return self.connected
+
+    async def connect(self):
+        if not self.broker.available:
+            raise ConnectionError("In-memory broker is unavailable")
+        self.connected = True
+
+    async def publish(self, body: bytes, content_type: str, headers: dict, routing_key: str):
+        await self.broker.publish(DeliveredMessage(routing_key, body, content_type, headers))
+
+    async def close(self):
+        self.connected = False
+
+# Broker compartido para RABBITMQ_TRANSPORT=memory
+memory_broker = InMemoryBroker(
+    latency=float(os.getenv('RABBITMQ_MEMORY_LATENCY_MS', '0')) / 1000,
+    failure_rate=float(os.getenv('RABBITMQ_MEMORY_FAILURE_RATE', '0')),
+)
@@ -0,0 +1,96 @@
+import struct
+import pytest
+from services.i2c_service import ACCEL_XOUT_H, I2CService, RawSample, decode_burst, scale_sample
+from services.mock_smbus import MockSMBus
+
+class FlakyBlockBus(MockSMBus):
+    """MockSMBus cuyas lecturas de bloque fallan (failed_reads) o llegan cortas (short_reads) sin afectar a MPU_Init."""
+
+    def __init__(self):
+        super().__init__()
+        self.failed_reads = 0
+        self.short_reads = 0
+
+    def read_i2c_block_data(self, address: int, register: int, length: int = 32) -> list:
+        block = super().read_i2c_block_data(address, register, length)
+        if self.failed_reads:
+            self.failed_reads -= 1
+            raise OSError(121, "Remote I/O error")
+        if self.short_reads:
+            self.short_reads -= 1
+            return block[:length // 2]
+        return block
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(I2CService, "RETRY_DELAY", 0)
+
+@pytest.fixture
+def bus():
+    return FlakyBlockBus()
+
+@pytest.fixture
+def i2c(bus):
+    return I2CService(bus_factory=bus.factory())
+
+def test_decode_burst_big_endian_signed():
+    block = list(struct.pack(">7H", 0x0001, 0x7FFF, 0x8000, 0xFFFF, 0x4000, 0xC000, 0x0000))
+    assert decode_burst(block) == RawSample(1, 32767, -32768, -1, 16384, -16384, 0)
+
+def test_read_burst_scales_mock_motion(bus, i2c):
+    bus.set_motion(acc=(0.5, -1.0, 1.0), gyro=(250.0, -1000.0, 0.0), temperature=30.0)
+    sample = scale_sample(i2c.read_burst())
+    assert sample["acc_x"] == pytest.approx(0.5)
+    assert sample["acc_y"] == pytest.approx(-1.0)
+    assert sample["gyro_x"] == pytest.approx(250.0, abs=0.05)
+    assert sample["gyro_y"] == pytest.approx(-1000.0, abs=0.05)
+    assert sample["temperature"] == pytest.approx(30.0, abs=0.01)
+
+def test_read_burst_min_register_value(bus, i2c):
+    bus.registers[0x68][ACCEL_XOUT_H:ACCEL_XOUT_H + 2] = b"\x80\x00"
+    raw = i2c.read_burst()
+    assert raw.acc_x == -32768
+    assert scale_sample(raw)["acc_x"] == -2.0
+
+def test_read_burst_is_one_transaction(bus, i2c):
+    transactions = bus.transactions
+    assert i2c.read_burst() is not None
+    assert bus.transactions - transactions == 1
+
+def test_retry_after_failed_read(bus, i2c):
+    bus.failed_reads = 1
+    assert i2c.read_burst() is not None
+    assert i2c.stats == {"reads": 1, "errors": 1, "retries": 1, "reinits": 0, "failed_reads": 0}
+
+def test_retry_after_short_read(bus, i2c):
+    bus.short_reads = 1
+    raw = i2c.read_burst()
+    assert raw is not None
+    assert len(raw) == 7
+    assert i2c.stats["errors"] == 1
+    assert i2c.stats["retries"] == 1
+
+def test_reinitialize_after_repeated_failures(bus, i2c):
+    bus.failed_reads = I2CService.REINIT_AFTER
+    assert i2c.read_burst() is not None
+    assert i2c.stats["errors"] == I2CService.REINIT_AFTER
+    assert i2c.stats["reinits"] == 1
+    # El bus se cerró y se reabrió con la misma fábrica
+    assert i2c.bus is bus
+    assert not bus.closed
+
+def test_none_after_max_retries(bus, i2c):
+    bus.failed_reads = I2CService.MAX_RETRIES
+    assert i2c.read_burst() is None
+    assert i2c.stats["errors"] == I2CService.MAX_RETRIES
+    assert i2c.stats["failed_reads"] == 1
+    assert i2c.stats["reads"] == 0
+    # El sensor vuelve a responder en la siguiente lectura
+    assert i2c.read_burst() is not None
+
+def test_none_when_bus_cannot_be_reopened(bus, i2c):
+    # Dos lecturas fallidas llevan a reinicializar, y cada intento de MPU_Init falla en su primera escritura
+    bus.fail_next(I2CService.REINIT_AFTER + I2CService.MAX_RETRIES)
+    assert i2c.read_burst() is None
+    assert i2c.bus is None
+    assert i2c.stats["failed_reads"] == 1
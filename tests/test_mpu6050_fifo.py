@@ -0,0 +1,132 @@
+import struct
+import numpy as np
+import pytest
+from services.i2c_service import I2CService
+from services.mock_smbus import SimulatedMpu6050
+from services.mpu6050_fifo import FIFO_SIZE, FRAME_BYTES, Mpu6050Fifo, decode_frames
+
+RATE_HZ = 500
+PERIOD = 1 / RATE_HZ
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, frames: int):
+        # Medio periodo de margen para no depender del redondeo al acumular periodos
+        self.now += (frames + 0.5) * PERIOD
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(I2CService, "RETRY_DELAY", 0)
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def bus(clock):
+    return SimulatedMpu6050(clock=clock)
+
+@pytest.fixture
+def fifo(bus, clock):
+    fifo = Mpu6050Fifo(I2CService(bus_factory=bus.factory()), RATE_HZ, clock=clock)
+    # La primera lectura configura el sensor y vacía el FIFO
+    assert len(fifo.read().accel) == 0
+    return fifo
+
+def test_decode_frames_scales_big_endian_words():
+    data = struct.pack(">6h", 16384, -8192, 0, 164, -1640, -32768)
+    accel, gyro = decode_frames(data * 2)
+    assert accel.shape == gyro.shape == (2, 3)
+    np.testing.assert_allclose(accel[0], [1.0, -0.5, 0.0])
+    np.testing.assert_allclose(gyro[1], [10.0, -100.0, -32768 / 16.4])
+
+def test_read_decodes_frames_with_timestamps(bus, clock, fifo):
+    bus.set_motion(acc=(0.5, -0.25, 1.0), gyro=(100.0, -50.0, 0.0))
+    clock.advance(10)
+    batch = fifo.read()
+    assert not batch.overflowed
+    assert len(batch.accel) == 10
+    np.testing.assert_allclose(batch.accel, [[0.5, -0.25, 1.0]] * 10)
+    np.testing.assert_allclose(batch.gyro, [[100.0, -50.0, 0.0]] * 10, atol=0.05)
+    # La última trama lleva el instante de la lectura y las anteriores van espaciadas un periodo
+    assert batch.timestamps[-1] == clock.now
+    np.testing.assert_allclose(np.diff(batch.timestamps), PERIOD)
+    assert fifo.stats["frames"] == 10
+
+def test_read_splits_fifo_into_whole_frame_chunks(bus, clock, fifo):
+    clock.advance(7)
+    transactions = fifo.stats["transactions"]
+    assert len(fifo.read().accel) == 7
+    # INT_STATUS, FIFO_COUNT y 4 bloques de 2 tramas como máximo
+    assert fifo.stats["transactions"] - transactions == 2 + 4
+    assert len(bus.fifo) == 0
+
+def test_overflow_resets_fifo_and_resynchronizes(bus, clock, fifo):
+    clock.advance(FIFO_SIZE // FRAME_BYTES + 20)
+    batch = fifo.read()
+    assert batch.overflowed
+    assert len(batch.accel) == 0
+    assert fifo.stats["overflows"] == 1
+    assert len(bus.fifo) == 0
+
+    bus.set_motion(acc=(0.0, 1.0, 0.0))
+    clock.advance(5)
+    batch = fifo.read()
+    assert not batch.overflowed
+    assert len(batch.accel) == 5
+    np.testing.assert_allclose(batch.accel, [[0.0, 1.0, 0.0]] * 5)
+
+def test_misaligned_count_resets_fifo(bus, clock, fifo):
+    clock.advance(3)
+    fifo.read()
+    # Bytes sueltos en el FIFO: la cuenta deja de ser múltiplo de la trama
+    bus.fifo += bytes(5)
+    batch = fifo.read()
+    assert batch.overflowed
+    assert len(batch.accel) == 0
+    assert fifo.stats["misaligned"] == 1
+    assert fifo.stats["overflows"] == 0
+
+    clock.advance(4)
+    batch = fifo.read()
+    assert len(batch.accel) == 4
+    np.testing.assert_allclose(batch.accel, [[0.0, 0.0, 1.0]] * 4)
+
+def test_bus_error_closes_bus_and_reinitializes(bus, clock, fifo):
+    resets = fifo.stats["resets"]
+    clock.advance(4)
+    bus.fail_next()
+    batch = fifo.read()
+    assert len(batch.accel) == 0
+    assert fifo.stats["errors"] == 1
+    assert not fifo.enabled
+    assert fifo.i2c.bus is None
+    assert bus.closed
+
+    # La siguiente lectura reabre el bus, reconfigura el sensor y vacía el FIFO
+    assert len(fifo.read().accel) == 0
+    assert fifo.enabled
+    assert not bus.closed
+    assert fifo.stats["resets"] == resets + 1
+    clock.advance(6)
+    assert len(fifo.read().accel) == 6
+
+def test_failed_reinit_returns_empty_until_bus_recovers(bus, clock, fifo):
+    bus.fail_next()
+    fifo.read()
+    # Cada intento de initialize_i2c falla en su primera escritura
+    bus.fail_next(I2CService.MAX_RETRIES)
+    batch = fifo.read()
+    assert len(batch.accel) == 0
+    assert not batch.overflowed
+    assert fifo.i2c.bus is None
+
+    fifo.read()
+    clock.advance(3)
+    assert len(fifo.read().accel) == 3
+    assert fifo.stats["errors"] == 1
@@ -1,11 +1,12 @@
-import json
 from typing import Any, Optional
 from fastapi import HTTPException, status
-from database.connector import DatabaseConnector
+from database.connector import DatabaseConnector, database_connector
 from travel.models import TravelInitControllerModel, TravelFinishRequestModel, TravelEntityModel
-from services.rabbitmq_service import RabbitMQService
+from services.rabbitmq_service import RabbitMQService, rabbitmq_service
 from utils.travel_state import travel_state
 from utils.current_driver import current_driver
+from utils.metadata_cache import metadata_cache, LAST_DRIVER_KEY, driver_key
+from kit.controllers import get_kit_id
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -41,6 +42,7 @@ class TravelController:
                     travel_model.start_coordinates,
                 ),
             )
+            metadata_cache.invalidate(LAST_DRIVER_KEY)
 
             return "Travel initiated successfully"
         except Exception as e:
@@ -64,13 +66,14 @@ class TravelController:
 
             travel_state.end_travel()
             current_driver.end_driver_travel()
+            metadata_cache.invalidate(LAST_DRIVER_KEY)
 
             message = self.create_travel_message(travel)
-            await self.rabbitmq_service.send_message(message, "travel.register")
+            await self.rabbitmq_service.enqueue(message, "travel.register")
 
             await self.database.query_post(
                 """
-                INSERT INTO travels (driver_id, date_day, start_datetime, end_datetime, start_coordinates, end_coordinates)
+                INSERT INTO travels (driver_id, date, start_hour, end_hour, start_coordinates, end_coordinates)
                 VALUES (%s, %s, %s, %s, ST_GeomFromText(%s), ST_GeomFromText(%s));
                 """,
                 (
@@ -89,25 +92,29 @@ class TravelController:
             raise HTTPException(status_code=500, detail=str(e))
 
     def create_travel_message(self, travel: TravelEntityModel):
-        return json.dumps({
+        return {
             "driver_id": travel.driver_id,
             "date": travel.date_day.isoformat(),
             "start_hour": travel.start_datetime.isoformat(),
             "end_hour": travel.end_datetime.isoformat(),
             "start_coordinates": travel.start_coordinates,
             "end_coordinates": travel.end_coordinates,
-        })
+        }
 
     async def get_driver_by_id(self, driver_id: str) -> Optional[dict]:
+        # Los conductores inexistentes también se guardan en caché (entrada negativa)
+        driver = await metadata_cache.get_or_load(driver_key(driver_id), lambda: self.load_driver(driver_id))
+        if not driver:
+            logger.info("No driver found. The system will add the driver automatically.")
+        return driver
+
+    async def load_driver(self, driver_id: str) -> Optional[dict]:
         drivers = await self.database.query_get(
             """
             SELECT id, kit_id FROM drivers WHERE id = %s
             """, (driver_id,)
         )
-        if not drivers:
-            logger.info("No driver found. The system will add the driver automatically.")
-            return None
-        return drivers[0]
+        return drivers[0] if drivers else None
 
     async def get_last_init_travel(self) -> dict:
         travel = await self.database.query_get(
@@ -123,22 +130,15 @@ class TravelController:
         return travel[0]
 
     async def get_kit_id(self) -> str:
-        kit = await self.database.query_get(
-            """
-            SELECT kit_id FROM kit
-            """
-        )
-        if not kit:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No kit found")
-        return kit[0]["kit_id"]
+        # Para las rutas HTTP: sin kit registrado es un 404
+        kit_id = await get_kit_id()
+        if kit_id is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No kit found. Please register a kit")
+        return kit_id
 
     async def ensure_driver_exists(self, driver_id: str):
-        result = await self.database.query_get(
-            """
-            SELECT 1 FROM drivers WHERE id = %s
-            """, (driver_id,)
-        )
-        if not result:
+        driver = await self.get_driver_by_id(driver_id)
+        if not driver:
             kit_id = await self.get_kit_id()
             await self.database.query_post(
                 """
@@ -146,7 +146,7 @@ class TravelController:
                 VALUES (%s, %s)
                 """, (driver_id, kit_id)
             )
+            # Reemplaza la entrada negativa del conductor recién insertado
+            metadata_cache.invalidate(driver_key(driver_id))
 
-database = DatabaseConnector()
-rabbitmq_service = RabbitMQService()
-travel_controller = TravelController(database, rabbitmq_service)
\ No newline at end of file
+travel_controller = TravelController(database_connector, rabbitmq_service)
\ No newline at end of file
@@ -0,0 +1,97 @@
+import os
+import time
+from threading import Lock
+from dotenv import load_dotenv
+
+load_dotenv('local.env')
+
+class MetadataCache:
+    """
+    Caché en memoria con TTL para consultas de metadatos que casi no cambian
+    (kit_id, último conductor, existencia de conductores).
+    Un valor None se guarda como entrada negativa con su propio TTL. Si la carga falla (p. ej. la base de
+    datos no responde) el error se guarda error_ttl segundos y se relanza sin volver a consultar.
+    """
+
+    _instance = None
+    _lock = Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(MetadataCache, cls).__new__(cls)
+                    cls._instance.entries = {}
+                    cls._instance.errors = {}
+                    cls._instance.default_ttl = float(os.getenv("METADATA_CACHE_TTL", "300"))
+                    cls._instance.negative_ttl = float(os.getenv("METADATA_CACHE_NEGATIVE_TTL", "30"))
+                    cls._instance.error_ttl = float(os.getenv("METADATA_CACHE_ERROR_TTL", "5"))
+                    cls._instance.stats = {"hits": 0, "negative_hits": 0, "error_hits": 0, "misses": 0, "invalidations": 0}
+        return cls._instance
+
+    def get(self, key):
+        # Devuelve (encontrado, valor)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return False, None
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            self.entries.pop(key, None)
+            self.stats["misses"] += 1
+            return False, None
+        if value is None:
+            self.stats["negative_hits"] += 1
+        else:
+            self.stats["hits"] += 1
+        return True, value
+
+    def set(self, key, value, ttl=None):
+        if ttl is None:
+            ttl = self.negative_ttl if value is None else self.default_ttl
+        self.entries[key] = (value, time.monotonic() + ttl)
+
+    async def get_or_load(self, key, loader, ttl=None, negative_ttl=None):
+        found, value = self.get(key)
+        if found:
+            return value
+        error = self.errors.get(key)
+        if error is not None and time.monotonic() < error[1]:
+            self.stats["error_hits"] += 1
+            raise error[0].with_traceback(None)
+        try:
+            value = await loader()
+        except Exception as e:
+            # Se recuerda el error un momento: con la base caída cada lectura no debe intentar conectarse
+            self.errors[key] = (e, time.monotonic() + self.error_ttl)
+            raise
+        self.errors.pop(key, None)
+        self.set(key, value, negative_ttl if value is None and negative_ttl is not None else ttl)
+        return value
+
+    def invalidate(self, *keys):
+        for key in keys:
+            self.errors.pop(key, None)
+            if self.entries.pop(key, None) is not None:
+                self.stats["invalidations"] += 1
+
+    def clear(self):
+        self.stats["invalidations"] += len(self.entries)
+        self.entries.clear()
+        self.errors.clear()
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        lookups = stats["hits"] + stats["negative_hits"] + stats["error_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["hits"] + stats["negative_hits"]) / lookups if lookups else 0.0
+        stats["entries"] = len(self.entries)
+        return stats
+
+metadata_cache = MetadataCache()
+
+# Claves compartidas por los controladores
+KIT_ID_KEY = "kit_id"
+LAST_DRIVER_KEY = "last_driver_id"
+
+def driver_key(driver_id) -> str:
+    return f"driver:{driver_id}"
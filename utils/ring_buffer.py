@@ -0,0 +1,168 @@
+import time
+import warnings
+from threading import Lock
+import numpy as np
+
+# Canales por defecto de una muestra del IMU: aceleración, giroscopio, inclinación y fuerza g
+IMU_CHANNELS = (
+    "acc_x", "acc_y", "acc_z",
+    "gyro_x", "gyro_y", "gyro_z",
+    "angle", "g_force_x", "g_force_y", "g_force",
+)
+
+# Muestras completas de SensorReader / SensorService: además, contadores de vibraciones y golpes
+DRIVING_CHANNELS = IMU_CHANNELS + ("vibrations", "shocks")
+
+DEFAULT_PERCENTILES = (50, 95)
+
+class RingBuffer:
+    """
+    Búfer circular de capacidad fija con una columna por canal, preasignado en un arreglo de NumPy:
+    la memoria no depende de la frecuencia de muestreo. Cada fila guarda además su instante (reloj monótono).
+    Las estadísticas de una ventana se calculan para todos los canales a la vez sobre el arreglo.
+    """
+
+    def __init__(self, capacity: int, channels=IMU_CHANNELS, dtype=np.float64):
+        if capacity <= 0:
+            raise ValueError(f"Ring buffer capacity must be positive, got {capacity}")
+        self.capacity = capacity
+        self.channels = tuple(channels)
+        self.index = {name: i for i, name in enumerate(self.channels)}
+        self.data = np.zeros((capacity, len(self.channels)), dtype=dtype)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.head = 0  # siguiente fila a escribir
+        self.size = 0
+        self.total = 0  # muestras escritas desde el inicio, incluidas las sobrescritas
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes + self.timestamps.nbytes
+
+    def append(self, sample: dict, timestamp: float = None):
+        # Los canales que faltan en la muestra se guardan como NaN y no cuentan en las estadísticas
+        row = [sample.get(name, np.nan) for name in self.channels]
+        with self._lock:
+            self.data[self.head] = row
+            self.timestamps[self.head] = time.monotonic() if timestamp is None else timestamp
+            self.head = (self.head + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+            self.total += 1
+
+    def extend(self, rows, timestamps):
+        """
+        Agrega un bloque (n, canales) de una vez, p. ej. las tramas de un FIFO. Si n supera la capacidad
+        solo se conservan las últimas filas.
+        """
+        rows = np.asarray(rows, dtype=self.data.dtype)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        count = len(rows)
+        with self._lock:
+            self.total += count
+            if count >= self.capacity:
+                self.data[:] = rows[-self.capacity:]
+                self.timestamps[:] = timestamps[-self.capacity:]
+                self.head, self.size = 0, self.capacity
+                return
+            first = min(count, self.capacity - self.head)
+            self.data[self.head:self.head + first] = rows[:first]
+            self.timestamps[self.head:self.head + first] = timestamps[:first]
+            self.data[:count - first] = rows[first:]
+            self.timestamps[:count - first] = timestamps[first:]
+            self.head = (self.head + count) % self.capacity
+            self.size = min(self.size + count, self.capacity)
+
+    def _ordered(self, count: int):
+        # Las últimas count filas en orden cronológico (copia)
+        start = (self.head - count) % self.capacity
+        if start + count <= self.capacity:
+            return self.data[start:start + count].copy(), self.timestamps[start:start + count].copy()
+        rows = np.concatenate((self.data[start:], self.data[:self.head]))
+        return rows, np.concatenate((self.timestamps[start:], self.timestamps[:self.head]))
+
+    def window(self, seconds: float = None, count: int = None, now: float = None):
+        """
+        Devuelve (filas, instantes) de la ventana: las últimas count muestras, las de los últimos seconds
+        segundos o todo el búfer.
+        """
+        with self._lock:
+            rows, timestamps = self._ordered(self.size if count is None else min(count, self.size))
+        if seconds is not None and len(timestamps):
+            now = timestamps[-1] if now is None else now
+            # Los instantes están ordenados: la ventana empieza en la primera fila dentro del plazo
+            start = np.searchsorted(timestamps, now - seconds, side="left")
+            rows, timestamps = rows[start:], timestamps[start:]
+        return rows, timestamps
+
+    def column(self, name: str, seconds: float = None, count: int = None):
+        return self.window(seconds, count)[0][:, self.index[name]]
+
+    def stats(self, seconds: float = None, count: int = None, percentiles=DEFAULT_PERCENTILES) -> dict:
+        """
+        mean, min, max, std y percentiles de cada canal sobre la ventana, en un solo cálculo por estadístico
+        sobre el arreglo (n, canales). Devuelve {canal: {estadístico: valor}}; sin muestras, {}.
+        """
+        rows, _ = self.window(seconds, count)
+        if not len(rows):
+            return {}
+        values = window_stats(rows, percentiles)
+        return {
+            name: {stat: float(column[i]) for stat, column in values.items()}
+            for i, name in enumerate(self.channels)
+        }
+
+    def clear(self):
+        with self._lock:
+            self.head = self.size = 0
+
+def window_stats(rows, percentiles=DEFAULT_PERCENTILES) -> dict:
+    # {estadístico: arreglo por canal}; los NaN (canales ausentes en alguna muestra) se ignoran
+    missing = np.isnan(rows)
+    if not missing.any():
+        values = {
+            "count": np.full(rows.shape[1], len(rows)),
+            "mean": rows.mean(axis=0),
+            "min": rows.min(axis=0),
+            "max": rows.max(axis=0),
+            "std": rows.std(axis=0),
+        }
+        if percentiles:
+            values.update(zip((f"p{q:g}" for q in percentiles), np.percentile(rows, percentiles, axis=0)))
+        return values
+    with warnings.catch_warnings():
+        # Un canal sin ningún valor en la ventana da NaN sin avisar
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        values = {
+            "count": np.sum(~missing, axis=0),
+            "mean": np.nanmean(rows, axis=0),
+            "min": np.nanmin(rows, axis=0),
+            "max": np.nanmax(rows, axis=0),
+            "std": np.nanstd(rows, axis=0),
+        }
+        if percentiles:
+            values.update(zip((f"p{q:g}" for q in percentiles), np.nanpercentile(rows, percentiles, axis=0)))
+    return values
+
+def driving_averages(buffer: RingBuffer) -> dict:
+    """
+    Promedios del registro de conducción sobre todo el búfer; None si está vacío.
+    La aceleración y la desaceleración promedian solo los valores positivos y negativos de acc_x.
+    """
+    rows, _ = buffer.window()
+    if not len(rows):
+        return None
+    means = rows.mean(axis=0)
+    acc_x = rows[:, buffer.index["acc_x"]]
+    accelerating, braking = acc_x[acc_x > 0], acc_x[acc_x < 0]
+    return {
+        "acceleration": float(accelerating.mean()) if len(accelerating) else 0,
+        "deceleration": float(abs(braking.mean())) if len(braking) else 0,
+        "vibrations": float(rows[:, buffer.index["vibrations"]].sum()),
+        "inclination_angle": float(means[buffer.index["angle"]]),
+        "angular_velocity": float(means[buffer.index["gyro_x"]]),
+        "g_force_x": float(means[buffer.index["g_force_x"]]),
+        "g_force_y": float(means[buffer.index["g_force_y"]]),
+    }